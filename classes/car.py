@@ -8,6 +8,174 @@ Original file is located at
 """
 
 import numpy as np
+from classes import soc_kernels
+from classes.events import CarEvents
+
+# speed bands [km/h] and speed factors for consumption
+# hard coded based on assumptions (speed 0: factor 0)
+SPEED_LIMITS = np.array([30, 50, 70])
+SPEED_FACTORS = np.array([1.473, 1.08, 0.955, 1.286])
+
+# temperature bands [°C] and heating/cooling power [kW]
+# heating power for 5 degrees deviation from 20°C: 0.5 [kW]
+# cooling power for 5 degrees deviation from 20°C: 0.25 [kW]
+# (above 40°C: no additional consumption)
+TEMPERATURE_LIMITS = np.array([-20, -15, -10, -5, 0, 5, 10, 15, 20, 
+                               25, 30, 35, 40])
+TEMPERATURE_POWERS = np.array([4, 3.5, 3, 2.5, 2, 1.5, 1, 0.5, 0, 
+                               0.25, 0.5, 0.75, 1, 0])
+
+
+def distance_profiles(speeds, ts_length):
+    """ returns driven distances [km] for every timestep
+    - speeds: speed profile (1-D) or speed profiles (2-D: cars x timesteps)
+    """
+    return (ts_length / 60) * np.asarray(speeds)
+
+
+def speed_factors(speeds):
+    """ returns speed factor (for multiplying consumption) for every timestep
+    - bands are looked up at once (upper limits of SPEED_LIMITS inclusive)
+    - speeds: speed profile (1-D) or speed profiles (2-D: cars x timesteps)
+    """
+    speeds = np.asarray(speeds)
+    factors = SPEED_FACTORS[np.searchsorted(SPEED_LIMITS, speeds, side="left")]
+    return np.where(speeds == 0, 0, factors)
+
+
+def weather_consumptions(temperatures, ts_length):
+    """ returns additional consumption [kWh] per timestep dep. on temperature
+    - bands are looked up at once (upper limits of TEMPERATURE_LIMITS incl.)
+    - temperatures: 1-D profile or 2-D profiles (cars x timesteps)
+    """
+    temperatures = np.asarray(temperatures)
+    bands = np.searchsorted(TEMPERATURE_LIMITS, temperatures, side="left")
+    return TEMPERATURE_POWERS[bands] * (ts_length / 60)
+
+
+def consumption_profiles(speeds, 
+                         temperatures, 
+                         base_consumption, 
+                         ts_length):
+    """ returns consumption profiles [kWh] for one car or a whole fleet
+    consumption = speed factor * distance * base consumption / 100
+                  (+ weather consumption, only if car is driving)
+    Args:
+    - speeds:              1-D speed profile or 2-D (cars x timesteps)
+    - temperatures:        temperatures [°C] (1-D for all cars or 2-D)
+    - base_consumption:    WLTP consumption [kWh/100km] (scalar or per car)
+    - ts_length:           timestep length [min]
+    """
+    speeds = np.asarray(speeds)
+    base_consumption = np.asarray(base_consumption, dtype = float)
+    if (speeds.ndim == 2) and (base_consumption.ndim == 1):
+        base_consumption = base_consumption[:, np.newaxis]   # one per car
+
+    weather_cons = weather_consumptions(temperatures, ts_length)
+    cons = (speed_factors(speeds) 
+            * distance_profiles(speeds, ts_length) 
+            * base_consumption / 100)
+
+    # add weather consumption only if car is driving
+    return np.where(cons != 0, cons + weather_cons, cons)
+
+
+def max_profiles_fleet(states, 
+                       consumption, 
+                       capacities, 
+                       car_charging_powers, 
+                       max_charge, 
+                       ts_length, 
+                       home_chrg_pwr, 
+                       work_chrg_pwr, 
+                       chrg_eff, 
+                       dischrg_eff,
+                       initial_state_of_charge = None):
+    """ simulates max strategy for a whole fleet of cars at once
+    - same results as Car.max_profile_generation() for every single car
+    - one state of charge vector (all cars) is stepped through time, 
+      driving, charging at home/work and charging power reduction 
+      (state of charge above 80%) are applied as masked array operations
+
+    Args:
+    - states:              mobility states profiles (cars x timesteps)
+    - consumption:         consumption profiles (cars x timesteps)
+    - capacities:          battery capacity of each car [kWh]
+    - car_charging_powers: max poss chrg power of each car [kW]
+    - max_charge:          max state of charge allowed [in %]
+    - ts_length:           timestep length
+    - home_chrg_pwr:       max power of charging station at home
+    - work_chrg_pwr:       max power of charging station at work
+    - chrg_eff:            efficiency of charging
+    - dischrg_eff:         efficiency of discharging
+    - initial_state_of_charge: state of charge before first timestep 
+                           [kWh] (e.g. carried from previous period), 
+                           default: max state of charge
+    Returns the 7 profiles of Car.max_profile_generation() as 
+    (cars x timesteps) arrays
+    """
+    states = np.atleast_2d(states)
+    consumption = np.atleast_2d(consumption)
+    capacities = np.asarray(capacities, dtype = float).reshape(-1)
+    car_charging_powers = np.asarray(car_charging_powers, 
+                                     dtype = float).reshape(-1)
+    max_state_of_charge = max_charge * capacities
+    taper_limits = soc_kernels.TAPER_LIMITS * capacities[:, np.newaxis]
+
+    locations = soc_kernels.location_codes(states)
+    home = (locations == soc_kernels.HOME)
+    work = (locations == soc_kernels.WORK)
+    location_pwr = soc_kernels.charging_power_table(home_chrg_pwr, 
+                                                    work_chrg_pwr)[locations]
+
+    if initial_state_of_charge is None:
+        state_of_charge = max_state_of_charge.copy()   # max cap. at ts 0
+    else:
+        state_of_charge = np.zeros(len(capacities))
+        state_of_charge[:] = np.ravel(initial_state_of_charge)
+    state_of_charge_profile = np.zeros(consumption.shape)
+    chrg_profile = np.zeros(consumption.shape)
+
+    for i in range(consumption.shape[1]):
+        driving = (consumption[:, i] != 0)
+
+        # car at home/work, not driving and battery not full
+        charging = (~driving 
+                    & (home[:, i] | work[:, i]) 
+                    & (state_of_charge < max_state_of_charge))
+
+        # reduced charging power of car (state of charge above 80%)
+        band = (state_of_charge[:, np.newaxis] > taper_limits).sum(axis = 1)
+        car_chrg_pwr = soc_kernels.TAPER_FACTORS[band] * car_charging_powers
+        possible_kwh = (np.minimum(location_pwr[:, i], car_chrg_pwr) 
+                        * (ts_length/60) * chrg_eff)
+        needed_kwh = np.minimum(possible_kwh, 
+                                max_state_of_charge - state_of_charge)
+        needed_kwh = np.where(charging, needed_kwh, 0)
+
+        # subtract consumption (depending on dischrg_eff) or add charging
+        state_of_charge = np.where(
+            driving, 
+            state_of_charge - (consumption[:, i] * (2 - dischrg_eff)), 
+            state_of_charge + needed_kwh)
+        state_of_charge_profile[:, i] = state_of_charge
+        chrg_profile[:, i] = needed_kwh
+
+    # consumed power of chrg stations and load profiles
+    home_profile = np.where(home, chrg_profile * (2 - dischrg_eff), 0)
+    work_profile = np.where(work, chrg_profile * (2 - dischrg_eff), 0)
+    load_profile_home = np.where(home_profile != 0, home_chrg_pwr, 0)
+    load_profile_work = np.where(work_profile != 0, work_chrg_pwr, 0)
+    load_profile = load_profile_home + load_profile_work
+
+    return (state_of_charge_profile, 
+            chrg_profile, 
+            home_profile, 
+            work_profile,
+            load_profile,
+            load_profile_home,
+            load_profile_work)
+
 
 class Car:
     """ Class Car:
@@ -26,7 +194,8 @@ class Car:
                  csv_database_electric_cars,
                  min_charge,
                  max_charge,
-                 ts_length):
+                 ts_length,
+                 backend = None):
         """ inits Car class with:
         Args: 
           - states_profile:       array with all states (from Household class)
@@ -37,6 +206,10 @@ class Car:
           - min_charge:           min state of charge allowed [in %]
           - max_charge:           max state of charge allowed
           - ts_length:            timestep length
+          - backend:              "python" (reference implementation), 
+                                  "compiled" (numba kernels) or "events" 
+                                  (trip/dwell simulation), default: 
+                                  "compiled" if numba is installed
         Instance attributes:
           - segment:              segment of car 
               (can be increased, if battery cap. not enough for profile gen.)
@@ -45,6 +218,13 @@ class Car:
           - min_state_of_charge:  min state of chrg allowed [kWh](can be incr.)
           - max_state_of_charge:  max state of chrg allowed [kWh](can be incr.)
           - time_z:               timestep with lowest capacity in period
+          - feasible:             true, if profile generation is possible
+              (max_state_of_charge_profile())
+          - required_state_of_charge: state of charge needed before first 
+              timestep for just in time charging (just_in_time_profile())
+          - cache:                derived profiles (consumption, charging 
+              options) for (segment, start, end, ts_length), 
+              states/speeds/temperatures are not changed after init
         """
         self.states = states_profile
         self.speeds = speeds_profile
@@ -59,6 +239,14 @@ class Car:
         self.max_state_of_charge = self.max_charge * self.capacity
         self.ts_length = ts_length
         self.time_z = 0
+        self.feasible = True
+        self.required_state_of_charge = None
+        self.cache = {}
+        if backend is None:
+            backend = soc_kernels.DEFAULT_BACKEND
+        if backend not in soc_kernels.BACKENDS:
+            raise ValueError("Unknown backend: " + str(backend))
+        self.backend = backend
 
     def max_state_of_charge_profile(self, 
                                     start, 
@@ -66,18 +254,22 @@ class Car:
                                     home_chrg_pwr, 
                                     work_chrg_pwr, 
                                     chrg_eff, 
-                                    dischrg_eff):
+                                    dischrg_eff,
+                                    initial_state_of_charge = None):
         """
         - checks whether car can manage profile
         - generates state of charge profile for max strategy
         - max_state_of_charge_profile() has to be run before min_state_of_
               charge_profile() and before generate_consumption_profile()
 
-        feasibility check:
-        1. create state of charge profile for max strategy for current segment
-        2. check, if any state_of_charge is below min_state_of_charge
-        3. increase car segment to segment with higher battery capacity
-        4. adjust segment, capacity, min_soc, max_soc of car object and retry
+        feasibility check (single pass, see get_feasible_segment()):
+        1. check max strategy for current segment and all higher segments 
+           up to segment 6 at once (one batched call for every backend)
+        2. choose lowest segment without state_of_charge below 
+           min_state_of_charge
+        3. adjust segment, capacity, min_soc, max_soc of car object
+        4. create state of charge profile for max strategy for this 
+           segment (backend of car, see max_profile_generation())
         5. if not possible with highest segment (6): don´t return profile
 
         Args:
@@ -87,69 +279,232 @@ class Car:
         - work_chrg_pwr:  max power of charging station at work
         - chrg_eff:       efficiency of charging
         - dischrg_eff:    efficiency of discharging
+        - initial_state_of_charge: state of charge before first timestep 
+                          (carried from previous period), default: max soc
         """
-
-        # as long as there are timesteps when state_of_charge is lower than 
-        # min_state_of_charge and segment can be incr. (max cap.: segment 6):
-        # increase segment
-        # increase cap., min_state_of_charge, max_state_of_charge accordingly
-        while ((self.segment in [1,2,3,4,5]) and 
-               any(x < self.min_state_of_charge for x in
-                  self.max_profile_generation(start, 
-                                              end, 
-                                              home_chrg_pwr, 
-                                              work_chrg_pwr, 
-                                              chrg_eff, 
-                                              dischrg_eff)[0])):    
-            self.segment = self.segment + 1
-            self.capacity = self.csv_database_electric_cars[self.segment, 3]
-            self.min_state_of_charge = self.min_charge * self.capacity
-            self.max_state_of_charge = self.max_charge * self.capacity
-
-            # !! Warning-Output für Erstellung der MA rausgenommen (ergibt sehr lange Ausgaben) !!
-            #print("Warning: Battery Capacity of car not high enough." \
-             #     "Segment is adjusted to segment:", self.segment)
-
-        else:
-            # if no adjustment needed or all adjustments done:
-            # get max_state_of_charge_profile for final car segment
-            profiles = self.max_profile_generation(start, 
-                                                   end, 
-                                                   home_chrg_pwr,
-                                                   work_chrg_pwr, 
-                                                   chrg_eff, 
-                                                   dischrg_eff)
-            max_state_of_charge_profile = profiles[0]
-            chrg_profile = profiles[1]
-            home_profile = profiles[2]
-            work_profile = profiles[3]
-            load_profile = profiles[4]
-            load_profile_home = profiles[5]
-            load_profile_work = profiles[6]
-        
-        if any(x < self.min_state_of_charge 
-               for x in max_state_of_charge_profile):
+        segment = int(np.ravel(self.segment)[0])
+        feasibility = self.get_feasible_segment(start, 
+                                                end, 
+                                                home_chrg_pwr, 
+                                                work_chrg_pwr, 
+                                                chrg_eff, 
+                                                dischrg_eff,
+                                                initial_state_of_charge)
+        feasible = feasibility[1]
+        self.feasible = feasible
+
+        # adjust segment, capacity, min_soc, max_soc of car object
+        # !! Warning-Output für Erstellung der MA rausgenommen (ergibt sehr lange Ausgaben) !!
+        #print("Warning: Battery Capacity of car not high enough." \
+         #     "Segment is adjusted to segment:", self.segment)
+        if feasibility[0] != segment:
+            self.set_segment(self.segment + (feasibility[0] - segment))
+
+        # profiles and time_z for final segment (backend of car)
+        profiles = self.max_profile_generation(start, 
+                                               end, 
+                                               home_chrg_pwr, 
+                                               work_chrg_pwr, 
+                                               chrg_eff, 
+                                               dischrg_eff,
+                                               initial_state_of_charge)
+
+        if not feasible:
             # if after adjustment to highest segment still not possible
             # !! Warning-Output für Erstellung der MA rausgenommen (ergibt sehr lange Ausgaben) !!
             #print("Profile generation not possible. Capacity too low.")
             #print("\n")
-            temp = 0 # Platzhalter
+            return None
+
+        # return consists of 4 parts:
+        # 1. max_SOC_profile:           SOC for every timestep
+        # 2. chrg_profile:              possible chrg power for every ts
+        # 3. home_profile:              charged energy at home for every ts
+        # 4. work_profile:              charged energy at home for every ts 
+        # 5.-7. load profiles
+        return profiles
+
+    def set_segment(self, segment):
+        """ sets car segment and adjusts capacity, min_soc, max_soc
+        - cached profiles are kept (cache keys contain segment, profiles 
+          depend only on mobility, temperatures and segment)
+        """
+        self.segment = segment
+        self.capacity = self.csv_database_electric_cars[self.segment, 3]
+        self.min_state_of_charge = self.min_charge * self.capacity
+        self.max_state_of_charge = self.max_charge * self.capacity
 
+    def get_feasible_segment(self, 
+                             start, 
+                             end, 
+                             home_chrg_pwr, 
+                             work_chrg_pwr, 
+                             chrg_eff, 
+                             dischrg_eff,
+                             initial_state_of_charge = None,
+                             first_segment = None):
+        """ finds lowest car segment that can manage profile (single pass)
+        - candidates: first_segment (default: current segment) and, for
+          segments 1-5, all higher segments up to segment 6 (max. capacity)
+        - all candidates are checked in one call, simulation stops after 
+          lowest feasible segment (get_segment_feasibility())
+        - initial_state_of_charge: state of charge before first timestep 
+          [kWh] for all segments, default: max soc of each segment
+        returns:
+        1. lowest feasible segment (segment 6, if none is feasible)
+        2. feasible:  true, if no state_of_charge below min_state_of_charge
+        """
+        if first_segment is None:
+            first_segment = int(np.ravel(self.segment)[0])
+        if first_segment in [1,2,3,4,5,6]:
+            segments = np.arange(first_segment, 7)
+        else:
+            segments = np.array([first_segment])
+
+        feasible = self.get_segment_feasibility(start, 
+                                                end, 
+                                                home_chrg_pwr, 
+                                                work_chrg_pwr, 
+                                                chrg_eff, 
+                                                dischrg_eff,
+                                                segments,
+                                                initial_state_of_charge)[0]
+        
+        # lowest feasible segment (or highest segment, if none feasible)
+        if feasible.any():
+            k = np.argmax(feasible)
         else:
-            # return consists of 4 parts:
-            # 1. max_SOC_profile:           SOC for every timestep
-            # 2. chrg_profile:              possible chrg power for every ts
-            # 3. home_profile:              charged energy at home for every ts
-            # 4. work_profile:              charged energy at home for every ts 
-
-            return (max_state_of_charge_profile, 
-                    chrg_profile, 
-                    home_profile, 
-                    work_profile,
-                    load_profile,
-                    load_profile_home,
-                    load_profile_work)
-  
+            k = len(segments) - 1
+        return int(segments[k]), bool(feasible[k])
+
+    def get_segment_feasibility(self, 
+                                start, 
+                                end, 
+                                home_chrg_pwr, 
+                                work_chrg_pwr, 
+                                chrg_eff, 
+                                dischrg_eff,
+                                segments,
+                                initial_state_of_charge = None,
+                                bool_stop = True):
+        """ checks max strategy for several segments of car in one call
+        - consumption and capacity depend on segment, 
+          charging power of car stays the same
+        - consumption of every segment is read from cache 
+          (generate_consumption_profile())
+        - backend "python": all segments at once (max_profiles_fleet(), 
+          one row per segment)
+        - backends "compiled", "events": compiled kernel 
+          (soc_kernels.max_soc_segments_kernel), stops at first state of 
+          charge below min
+        Args:
+        - segments:       candidate segments (ascending)
+        - initial_state_of_charge: state of charge before first timestep 
+                          [kWh] (one for all or one per segment), 
+                          default: max soc of each segment
+        - bool_stop:      stop after lowest feasible segment (higher 
+                          segments: not feasible, compiled kernel only)
+        returns:
+        1. feasible:  true, if no state_of_charge below min_state_of_charge
+                      (one per segment)
+        2. state of charge after last timestep (one per segment, 
+           only for feasible segments)
+        """
+        segments = np.asarray(segments)
+        capacities = self.csv_database_electric_cars[segments, 3]
+        consumption = np.array([self.generate_consumption_profile(start, 
+                                                                  end, 
+                                                                  segment)
+                                for segment in segments])
+        if initial_state_of_charge is None:
+            initial_state_of_charge = self.max_charge * capacities
+        initial_state_of_charge = np.broadcast_to(
+            np.asarray(initial_state_of_charge, dtype = float).reshape(-1),
+            capacities.shape)
+
+        if (self.backend == "python"):
+            profiles = max_profiles_fleet(
+                np.broadcast_to(self.states, consumption.shape), 
+                consumption, 
+                capacities, 
+                np.repeat(np.ravel(self.car_charging_power)[0], 
+                          len(segments)),
+                self.max_charge, 
+                self.ts_length, 
+                home_chrg_pwr, 
+                work_chrg_pwr, 
+                chrg_eff, 
+                dischrg_eff,
+                initial_state_of_charge)
+
+            # any state_of_charge below min_state_of_charge?
+            feasible = ~(profiles[0] 
+                         < (self.min_charge 
+                            * capacities)[:, np.newaxis]).any(axis = 1)
+            return feasible, profiles[0][:, -1]
+
+        return soc_kernels.max_soc_segments_kernel(
+            consumption, 
+            self.get_charging_options(start, end), 
+            np.asarray(capacities, dtype = float), 
+            np.asarray(self.car_charging_power, dtype = float).item(), 
+            float(self.max_charge), 
+            float(self.min_charge), 
+            np.array(initial_state_of_charge, dtype = float), 
+            float(self.ts_length), 
+            float(home_chrg_pwr), 
+            float(work_chrg_pwr), 
+            float(chrg_eff), 
+            float(dischrg_eff),
+            bool_stop)
+
+    def get_required_capacity(self, 
+                              start, 
+                              end, 
+                              home_chrg_pwr, 
+                              work_chrg_pwr, 
+                              chrg_eff, 
+                              dischrg_eff,
+                              tolerance = 0.01):
+        """ returns min battery capacity [kWh] the profile needs (continuous)
+        - consumption and charging power of current car segment
+        - no state_of_charge below min_state_of_charge for max strategy
+        - search between 0 and capacity that needs no charging at all, 
+          16 capacities are simulated at once per step 
+          (max_profiles_fleet()) until interval is smaller than tolerance
+        """
+        if not (self.max_charge > self.min_charge):
+            raise ValueError("max_charge must be higher than min_charge")
+        consumption = self.generate_consumption_profile(start, end)
+        lower = 0.0
+        upper = (sum(consumption) * (2 - dischrg_eff) 
+                 / (self.max_charge - self.min_charge))
+        car_chrg_pwr = np.ravel(self.car_charging_power)[0]
+
+        while (upper - lower) > tolerance:
+            capacities = np.linspace(lower, upper, 18)[1:-1]
+            profiles = max_profiles_fleet(
+                np.broadcast_to(self.states, (16, len(consumption))), 
+                np.broadcast_to(consumption, (16, len(consumption))), 
+                capacities, 
+                np.repeat(car_chrg_pwr, 16), 
+                self.max_charge, 
+                self.ts_length, 
+                home_chrg_pwr, 
+                work_chrg_pwr, 
+                chrg_eff, 
+                dischrg_eff)
+            feasible = ~(profiles[0] 
+                         < (self.min_charge * capacities)[:, np.newaxis]).any(axis = 1)
+            if feasible.any():
+                k = np.argmax(feasible)
+                upper = capacities[k]
+                if k > 0:
+                    lower = capacities[k - 1]
+            else:
+                lower = capacities[-1]
+        return upper
+
     def min_state_of_charge_profile(self, 
                                     start,
                                     end, 
@@ -168,6 +523,21 @@ class Car:
         2. iterate until timestep 0 and add/substract to soc_profile
         3. start at last timestep and iterate until time_z
         """
+        if (self.backend == "events"):
+            return self.event_min_state_of_charge_profile(start, 
+                                                          end, 
+                                                          home_chrg_pwr, 
+                                                          work_chrg_pwr, 
+                                                          chrg_eff, 
+                                                          dischrg_eff)
+        if (self.backend == "compiled"):
+            return self.compiled_min_state_of_charge_profile(start, 
+                                                             end, 
+                                                             home_chrg_pwr, 
+                                                             work_chrg_pwr, 
+                                                             chrg_eff, 
+                                                             dischrg_eff)
+
         consumption_profile = self.generate_consumption_profile(start, end)
         chrg_opts = self.get_charging_options(start, end)
         state_of_charge = self.min_state_of_charge      # at time_z
@@ -193,8 +563,8 @@ class Car:
                 state_of_charge = state_of_charge + (diff / dischrg_eff)
 
             # if car at home/work in next periode
-            elif ((chrg_opts[i+1] == "home") 
-                    | (chrg_opts[i+1] == "work") 
+            elif ((chrg_opts[i+1] == soc_kernels.HOME) 
+                    | (chrg_opts[i+1] == soc_kernels.WORK) 
                     & (state_of_charge > self.min_state_of_charge)):
                 charging_location = chrg_opts[i+1]   # in next periode
 
@@ -213,9 +583,9 @@ class Car:
                 chrg_profile[i+1] = charging_results[2]
 
                 # add consumed power to consumption profile of chrg stations
-                if chrg_opts[i] == "home":
+                if chrg_opts[i] == soc_kernels.HOME:
                     home_profile[i+1] = charging_results[2] * (2 - dischrg_eff)
-                elif chrg_opts[i] == "work":
+                elif chrg_opts[i] == soc_kernels.WORK:
                     work_profile[i+1] = charging_results[2] * (2 - dischrg_eff)
 
             # car not driving and battery empty at min_state_of_charge
@@ -244,8 +614,8 @@ class Car:
 
               
             # if car at home/work in next periode
-            elif ((chrg_opts[i+1] == "home") 
-                    | (chrg_opts[i+1] == "work") 
+            elif ((chrg_opts[i+1] == soc_kernels.HOME) 
+                    | (chrg_opts[i+1] == soc_kernels.WORK) 
                     & (state_of_charge > self.min_state_of_charge)):
                 charging_location = chrg_opts[i+1]  #in next periode
 
@@ -264,9 +634,9 @@ class Car:
                 chrg_profile[i+1] = charging_results[2]
 
                 # add consumed power to consumption profile of chrg stations
-                if chrg_opts[i] == "home":
+                if chrg_opts[i] == soc_kernels.HOME:
                     home_profile[i+1] = charging_results[2] * (2 - dischrg_eff)
-                elif chrg_opts[i] == "work":
+                elif chrg_opts[i] == soc_kernels.WORK:
                     work_profile[i+1] = charging_results[2] * (2 - dischrg_eff)
 
              # car not driving and battery empty at min_state_of_charge
@@ -297,7 +667,162 @@ class Car:
                 load_profile_home,
                 load_profile_work)
     
-    def generate_consumption_profile(self, start, end):
+    def just_in_time_profile(self, 
+                             start,
+                             end, 
+                             home_chrg_pwr, 
+                             work_chrg_pwr, 
+                             chrg_eff, 
+                             dischrg_eff,
+                             end_state_of_charge = None):
+        """ gives state of charge profile for min strategy, calculated just 
+        in time per trip and charging window (CarEvents.just_in_time())
+        - independent of max strategy (no time_z needed), so both 
+          strategies can be calculated independently
+        - state of charge is min_state_of_charge (or end_state_of_charge, 
+          e.g. carried from following period) at last timestep, 
+          before every trip the required energy is charged as late as 
+          possible (w/o feas. check)
+        - required_state_of_charge: state of charge needed before first 
+          timestep (can be carried to previous period)
+        - return: same 7 profiles as min_state_of_charge_profile()
+        """
+        events = self.get_events(start, end)
+        min_state_of_charge = np.ravel(self.min_state_of_charge)[0]
+        if end_state_of_charge is None:
+            end_state_of_charge = min_state_of_charge
+        just_in_time = events.just_in_time(
+            np.ravel(self.capacity)[0], 
+            np.ravel(self.car_charging_power)[0], 
+            min_state_of_charge, 
+            self.ts_length, 
+            home_chrg_pwr, 
+            work_chrg_pwr, 
+            chrg_eff, 
+            dischrg_eff,
+            end_state_of_charge)
+        pieces = just_in_time[0]
+        self.required_state_of_charge = just_in_time[1]
+        profiles = events.expand_min(pieces, end_state_of_charge, dischrg_eff)
+        state_of_charge_profile = profiles[0]
+        chrg_profile = profiles[1]
+
+        # add consumed power to consumption profile of chrg stations
+        home_profile = np.where(events.locations == soc_kernels.HOME, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        work_profile = np.where(events.locations == soc_kernels.WORK, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        return ((state_of_charge_profile, chrg_profile, home_profile, 
+                 work_profile) 
+                + self.compiled_load_profiles(home_profile, 
+                                              work_profile, 
+                                              home_chrg_pwr, 
+                                              work_chrg_pwr))
+
+    def get_trip_requirements(self, 
+                              start,
+                              end, 
+                              home_chrg_pwr, 
+                              work_chrg_pwr, 
+                              chrg_eff, 
+                              dischrg_eff):
+        """ returns table with one row per trip for just in time charging
+        (first/last timestep, energy needed [kWh], required state of 
+        charge at departure [kWh], latest start of charging), 
+        see CarEvents.trip_requirements()
+        """
+        events = self.get_events(start, end)
+        pieces = events.just_in_time(
+            np.ravel(self.capacity)[0], 
+            np.ravel(self.car_charging_power)[0], 
+            np.ravel(self.min_state_of_charge)[0], 
+            self.ts_length, 
+            home_chrg_pwr, 
+            work_chrg_pwr, 
+            chrg_eff, 
+            dischrg_eff)[0]
+        return events.trip_requirements(pieces, dischrg_eff)
+
+    def get_checkpoints(self,
+                        timesteps,
+                        max_state_of_charge_profile,
+                        min_state_of_charge_profile):
+        """ returns state snapshots (dicts with int/float values, e.g. for
+        json) at end of given timesteps:
+        - timestep
+        - segment:                  current segment of car
+        - state_of_charge:          state of charge of max strategy
+        - required_state_of_charge: state of charge of min strategy
+                                    (just_in_time_profile()), needed
+                                    for all following trips
+        """
+        return [{"timestep": int(t),
+                 "segment": int(np.ravel(self.segment)[0]),
+                 "state_of_charge": float(max_state_of_charge_profile[t]),
+                 "required_state_of_charge":
+                     float(min_state_of_charge_profile[t])}
+                for t in timesteps]
+
+    def resume_profiles(self,
+                        checkpoint,
+                        end,
+                        home_chrg_pwr,
+                        work_chrg_pwr,
+                        chrg_eff,
+                        dischrg_eff):
+        """ recomputes profiles after checkpoint (see get_checkpoints())
+        up to last timestep, timesteps before checkpoint are not simulated
+        - max strategy: starts with state of charge of checkpoint,
+          segment can be increased (feasibility check of suffix)
+        - min strategy: just in time charging (just_in_time_profile())
+        - suffix is simulated on a copy, car object is not changed
+        returns:
+        1. profiles of max strategy after checkpoint timestep
+           (None, if not feasible)
+        2. profiles of min strategy after checkpoint timestep
+        3. checkpoint after recomputation: 
+           - segment higher than checkpoint: suffix needs a higher 
+             segment, profiles before checkpoint have to be recomputed 
+             with this segment
+           - required_state_of_charge differs from checkpoint: min 
+             strategy before checkpoint has to be recomputed as well 
+             (end_state_of_charge)
+        """
+        first = checkpoint["timestep"] + 1
+        car = Car(self.states[first:end],
+                  self.speeds[first:end],
+                  self.temperature_array[first:end],
+                  self.segment,
+                  self.csv_database_electric_cars,
+                  self.min_charge,
+                  self.max_charge,
+                  self.ts_length,
+                  self.backend)
+        car.car_charging_power = self.car_charging_power   # not adjusted
+        car.set_segment(checkpoint["segment"])
+        max_strategy = car.max_state_of_charge_profile(
+            0,
+            end - first,
+            home_chrg_pwr,
+            work_chrg_pwr,
+            chrg_eff,
+            dischrg_eff,
+            checkpoint["state_of_charge"])
+        min_strategy = car.just_in_time_profile(0,
+                                                end - first,
+                                                home_chrg_pwr,
+                                                work_chrg_pwr,
+                                                chrg_eff,
+                                                dischrg_eff)
+        return (max_strategy,
+                min_strategy,
+                {"timestep": checkpoint["timestep"],
+                 "segment": int(np.ravel(car.segment)[0]),
+                 "state_of_charge": checkpoint["state_of_charge"],
+                 "required_state_of_charge":
+                     float(car.required_state_of_charge)})
+
+    def generate_consumption_profile(self, start, end, segment = None):
         """ returns consumption profile of car
         consumption is influenced by:
         - car segment
@@ -307,35 +832,37 @@ class Car:
         Args:
         - start: first timestep
         - end: last timestep
+        - segment: car segment, default: current segment of car
         """
-        weather_cons_prf = self.get_weather_consumption(start, 
-                                                        end, 
-                                                        self.temperature_array)
-        dist_prf = self.get_distance_profile(start, end)
-        base_cons = self.csv_database_electric_cars[self.segment, 4]  # base consumption
-        speed_factors = self.get_speed_factors(start, end)  # speed factors
-        cons_profile = np.zeros(end-start)
-
-        # for each timestep: calculate consumption
-        for i in range(len(cons_profile)):
-            distance = dist_prf[i]                  
-            speed_factor = speed_factors[i]
-            cons_profile[i] = (speed_factor * distance * base_cons / 100)
-
-        # add weather consumption only if car is driving
-        for i in range(len(cons_profile)):
-            if (cons_profile[i] != 0):
-                cons_profile[i] = cons_profile[i] + weather_cons_prf[i]
-                
-        return cons_profile
+        if segment is None:
+            segment = self.segment
+        key = ("consumption", 
+               int(np.ravel(segment)[0]), 
+               start, 
+               end, 
+               self.ts_length)
+        if key not in self.cache:
+            base_cons = self.csv_database_electric_cars[segment, 4]  # base consumption
+            cons_profile = np.zeros(end-start)
+            cons_profile[:] = consumption_profiles(self.speeds, 
+                                                   self.temperature_array, 
+                                                   base_cons, 
+                                                   self.ts_length)
+            cons_profile.flags.writeable = False    # shared via cache
+            self.cache[key] = cons_profile
+        return self.cache[key]
     
     def get_charging_options(self, start, end):
-        """ returns array with charging options ("home", "work" or "0")
+        """ returns array with charging options (location codes, uint8):
+        soc_kernels.HOME (state 8), soc_kernels.WORK (states 1, 2) or 
+        soc_kernels.NO_CHARGING
         """
-        chrg_opts = np.where((self.states == 8), 
-                             "home", 
-                             np.where(((self.states == 1) | (self.states == 2)), "work", 0)) 
-        return chrg_opts
+        key = ("charging_options", start, end)
+        if key not in self.cache:
+            chrg_opts = soc_kernels.location_codes(self.states)
+            chrg_opts.flags.writeable = False    # shared via cache
+            self.cache[key] = chrg_opts
+        return self.cache[key]
 
     def get_charging_power(self, start, end, home_chrg_pwr, work_chrg_pwr):
         """ returns array with charing options [kW]
@@ -344,41 +871,22 @@ class Car:
         """
         poss_chrg_pwr = np.zeros(end-start)
         chrg_opts = self.get_charging_options(start, end)
-        for i in range(len(chrg_opts)):
-            poss_chrg_pwr[i] = np.where(chrg_opts[i] == "home", 
-                                        home_chrg_pwr, 
-                                        (np.where(chrg_opts[i] == "work", 
-                                                  work_chrg_pwr, 
-                                                  0)))
+        poss_chrg_pwr[:len(chrg_opts)] = soc_kernels.charging_power_table(
+            home_chrg_pwr, work_chrg_pwr)[chrg_opts]
         return poss_chrg_pwr
 
     def get_distance_profile(self, start, end):
         """ returns array with driven distances (in each timestep) for car
         """
         distance = np.zeros(end-start)
-        for i in range(len(distance)):
-            distance[i] = (self.ts_length / 60) * self.speeds[i]
+        distance[:] = distance_profiles(self.speeds, self.ts_length)
         return distance
 
     def get_speed_factors(self, start, end):
         """ returns factor (for multiplying consumption) for every timestep 
         depending on speed
         """
-        # get speed profile and substitute entries for speed factor
-        # hard coded based on assumptions
-        speed_factors = self.speeds.copy()
-        for i in range(len(speed_factors)):
-            if speed_factors[i] == 0:
-                speed_factors[i] = 0
-            elif speed_factors[i] <= 30:
-                speed_factors[i] = 1.473
-            elif speed_factors[i] <= 50:
-                speed_factors[i] = 1.08
-            elif speed_factors[i] <= 70:
-                speed_factors[i] = 0.955
-            else:
-                speed_factors[i] = 1.286
-        return speed_factors
+        return speed_factors(self.speeds)
 
     def get_weather_consumption(self, start, end, temperature_array):
         """ returns additional consumption per timestep dep. on temperature
@@ -387,36 +895,9 @@ class Car:
           - heating power for 5 degrees deviation from 20°C: 0.5 [kW]
           - cooling power for 5 degrees deviation from 20°C: 0.25 [kW]
         """
-
-        # get temperature profile and substitute entries for power consumption
-        weather_consumption =  np.zeros(end-start)
-        for i in range(len(temperature_array)):
-            if temperature_array[i] <= (-20):
-                weather_consumption[i] = 4 * (self.ts_length/60)      
-            elif temperature_array[i] <= (-15):
-                weather_consumption[i] = 3.5 * (self.ts_length/60)
-            elif temperature_array[i] <= (-10):
-                weather_consumption[i] = 3 * (self.ts_length/60)
-            elif temperature_array[i] <= (-5):
-                weather_consumption[i] = 2.5 * (self.ts_length/60)
-            elif temperature_array[i] <= (0):
-                weather_consumption[i] = 2 * (self.ts_length/60)
-            elif temperature_array[i] <= (5):
-                weather_consumption[i] = 1.5 * (self.ts_length/60)
-            elif temperature_array[i] <= (10):
-                weather_consumption[i] = 1 * (self.ts_length/60)
-            elif temperature_array[i] <= (15):
-                weather_consumption[i] = 0.5 * (self.ts_length/60)
-            elif temperature_array[i] <= (20):
-                weather_consumption[i] = 0 * (self.ts_length/60)
-            elif temperature_array[i] <= (25):
-                weather_consumption[i] = 0.25 * (self.ts_length/60)
-            elif temperature_array[i] <= (30):
-                weather_consumption[i] = 0.5 * (self.ts_length/60)
-            elif temperature_array[i] <= (35):
-                weather_consumption[i] = 0.75 * (self.ts_length/60)
-            elif temperature_array[i] <= (40):
-                weather_consumption[i] = 1 * (self.ts_length/60)
+        weather_consumption = np.zeros(end-start)
+        weather_consumption[:len(temperature_array)] = weather_consumptions(
+            temperature_array, self.ts_length)
         return weather_consumption
 
     def max_charging(self, 
@@ -445,7 +926,7 @@ class Car:
         elif (0.95 * self.capacity < state_of_charge <= 1.0 * self.capacity):
             car_chrg_pwr = 1/16 * car_chrg_pwr
 
-        if (charging_location == "home"):
+        if (charging_location == soc_kernels.HOME):
 
             # how much charging is possible? [kWh]
             possible_kwh = ((min(home_chrg_pwr, car_chrg_pwr)) 
@@ -458,7 +939,7 @@ class Car:
             # consumption of charging station
             consumed_kwh = needed_kwh * (2 - chrg_eff)
 
-        elif (charging_location == "work"):
+        elif (charging_location == soc_kernels.WORK):
 
             # how much charging is possible? [kWh]
             possible_kwh = ((min(work_chrg_pwr, car_chrg_pwr)) 
@@ -504,7 +985,7 @@ class Car:
         elif (0.95 * self.capacity < state_of_charge <= 1.0 * self.capacity):
             car_chrg_pwr = 1/16 * car_chrg_pwr
 
-        if (charging_location == "home"):
+        if (charging_location == soc_kernels.HOME):
 
             # how much charging is possible? [kWh]
             possible_kwh = ((min(home_chrg_pwr, car_chrg_pwr)) 
@@ -517,7 +998,7 @@ class Car:
             # consumption of charging station
             consumed_kwh = needed_kwh * (2 - chrg_eff)
 
-        elif (charging_location == "work"):
+        elif (charging_location == soc_kernels.WORK):
 
             # how much charging is possible? [kWh]
             possible_kwh = ((min(work_chrg_pwr, car_chrg_pwr)) 
@@ -544,11 +1025,33 @@ class Car:
                                home_chrg_pwr, 
                                work_chrg_pwr, 
                                chrg_eff, 
-                               dischrg_eff): 
+                               dischrg_eff,
+                               initial_state_of_charge = None): 
         """ this method creates max_state_of_charge_profile and
         is needed for feasibility check in method max_state_of_charge_profile
+        - initial_state_of_charge: state of charge before first timestep 
+          (carried from previous period), default: max soc
         """
+        if (self.backend == "events"):
+            return self.event_max_profile_generation(start, 
+                                                     end, 
+                                                     home_chrg_pwr, 
+                                                     work_chrg_pwr, 
+                                                     chrg_eff, 
+                                                     dischrg_eff,
+                                                     initial_state_of_charge)
+        if (self.backend == "compiled"):
+            return self.compiled_max_profile_generation(start, 
+                                                        end, 
+                                                        home_chrg_pwr, 
+                                                        work_chrg_pwr, 
+                                                        chrg_eff, 
+                                                        dischrg_eff,
+                                                        initial_state_of_charge)
+
         state_of_charge = self.max_state_of_charge # max cap. at timestep 0
+        if initial_state_of_charge is not None:
+            state_of_charge = initial_state_of_charge
         state_of_charge_profile = np.zeros(end-start)
         load_profile = np.zeros(end-start)
         load_profile_home = np.zeros(end-start)
@@ -571,8 +1074,7 @@ class Car:
                 state_of_charge = state_of_charge - (diff  * (2 - dischrg_eff))
 
             # if car at home/work and battery not full
-            elif (((chrg_opts[i] == "home") 
-                    | (chrg_opts[i] == "work")) 
+            elif ((chrg_opts[i] != soc_kernels.NO_CHARGING) 
                     & (state_of_charge < self.max_state_of_charge)):
                 charging_location = chrg_opts[i]
 
@@ -592,9 +1094,9 @@ class Car:
                 chrg_profile[i] = charging_results[2]
 
                 # add consumed power to consumption profile of chrg stations
-                if chrg_opts[i] == "home":
+                if chrg_opts[i] == soc_kernels.HOME:
                     home_profile[i] = charging_results[2] * (2 - dischrg_eff)
-                elif chrg_opts[i] == "work":
+                elif chrg_opts[i] == soc_kernels.WORK:
                     work_profile[i] = charging_results[2] * (2 - dischrg_eff)
             
             # car not driving, battery already full or not at charging point
@@ -626,4 +1128,192 @@ class Car:
                 work_profile,
                 load_profile,
                 load_profile_home,
-                load_profile_work)
\ No newline at end of file
+                load_profile_work)
+
+    def compiled_max_profile_generation(self, 
+                                        start,
+                                        end, 
+                                        home_chrg_pwr, 
+                                        work_chrg_pwr, 
+                                        chrg_eff, 
+                                        dischrg_eff,
+                                        initial_state_of_charge = None): 
+        """ same as max_profile_generation, forward iteration runs in 
+        compiled kernel (soc_kernels.max_soc_kernel)
+        """
+        consumption_profile = self.generate_consumption_profile(start, end)
+        locations = self.get_charging_options(start, end)
+        if initial_state_of_charge is None:
+            initial_state_of_charge = self.max_state_of_charge
+        profiles = soc_kernels.max_soc_kernel(
+            consumption_profile, 
+            locations, 
+            np.asarray(self.capacity, dtype = float).item(), 
+            np.asarray(self.car_charging_power, dtype = float).item(), 
+            np.asarray(self.max_state_of_charge, dtype = float).item(), 
+            np.asarray(initial_state_of_charge, dtype = float).item(), 
+            float(self.ts_length), 
+            float(home_chrg_pwr), 
+            float(work_chrg_pwr), 
+            float(chrg_eff), 
+            float(dischrg_eff))
+        state_of_charge_profile = profiles[0]
+        chrg_profile = profiles[1]
+
+        # timestep with minimal state_of_charge
+        self.time_z = np.where(
+            state_of_charge_profile == state_of_charge_profile.min())[0][0]
+
+        # add consumed power to consumption profile of chrg stations
+        home_profile = np.where(locations == soc_kernels.HOME, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        work_profile = np.where(locations == soc_kernels.WORK, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        return ((state_of_charge_profile, chrg_profile, home_profile, 
+                 work_profile) 
+                + self.compiled_load_profiles(home_profile, 
+                                              work_profile, 
+                                              home_chrg_pwr, 
+                                              work_chrg_pwr))
+
+    def compiled_min_state_of_charge_profile(self, 
+                                             start,
+                                             end, 
+                                             home_chrg_pwr, 
+                                             work_chrg_pwr, 
+                                             chrg_eff, 
+                                             dischrg_eff):
+        """ same as min_state_of_charge_profile, backward iterations run in 
+        compiled kernel (soc_kernels.min_soc_kernel)
+        """
+        consumption_profile = self.generate_consumption_profile(start, end)
+        locations = self.get_charging_options(start, end)
+        profiles = soc_kernels.min_soc_kernel(
+            consumption_profile, 
+            locations, 
+            np.asarray(self.capacity, dtype = float).item(), 
+            np.asarray(self.car_charging_power, dtype = float).item(), 
+            np.asarray(self.min_state_of_charge, dtype = float).item(), 
+            int(self.time_z), 
+            float(self.ts_length), 
+            float(home_chrg_pwr), 
+            float(work_chrg_pwr), 
+            float(chrg_eff), 
+            float(dischrg_eff))
+        return (profiles 
+                + self.compiled_load_profiles(profiles[2], 
+                                              profiles[3], 
+                                              home_chrg_pwr, 
+                                              work_chrg_pwr))
+
+    def compiled_load_profiles(self, 
+                               home_profile, 
+                               work_profile, 
+                               home_chrg_pwr, 
+                               work_chrg_pwr):
+        """ returns load profiles (overall, home, work) for compiled backend
+        """
+        load_profile_home = np.where(home_profile != 0, home_chrg_pwr, 0.0)
+        load_profile_work = np.where(work_profile != 0, work_chrg_pwr, 0.0)
+        load_profile = load_profile_home + load_profile_work
+        return (load_profile, load_profile_home, load_profile_work)
+
+    def get_events(self, start, end):
+        """ returns CarEvents object (trips and dwells) of car
+        (run-length encoding is done once per segment, start, end)
+        """
+        key = ("events", 
+               int(np.ravel(self.segment)[0]), 
+               start, 
+               end, 
+               self.ts_length)
+        if key not in self.cache:
+            self.cache[key] = CarEvents(
+                self.generate_consumption_profile(start, end), 
+                self.get_charging_options(start, end))
+        return self.cache[key]
+
+    def event_max_profile_generation(self, 
+                                     start,
+                                     end, 
+                                     home_chrg_pwr, 
+                                     work_chrg_pwr, 
+                                     chrg_eff, 
+                                     dischrg_eff,
+                                     initial_state_of_charge = None): 
+        """ same as max_profile_generation, simulated per trip/dwell 
+        (CarEvents) and expanded to profiles for every timestep
+        """
+        events = self.get_events(start, end)
+        if initial_state_of_charge is not None:
+            initial_state_of_charge = np.ravel(initial_state_of_charge)[0]
+        pieces = events.max_strategy(
+            np.ravel(self.capacity)[0], 
+            np.ravel(self.car_charging_power)[0], 
+            np.ravel(self.max_state_of_charge)[0], 
+            self.ts_length, 
+            home_chrg_pwr, 
+            work_chrg_pwr, 
+            chrg_eff, 
+            dischrg_eff,
+            initial_state_of_charge)
+        profiles = events.expand_max(pieces, dischrg_eff)
+        state_of_charge_profile = profiles[0]
+        chrg_profile = profiles[1]
+
+        # timestep with minimal state_of_charge
+        self.time_z = np.where(
+            state_of_charge_profile == state_of_charge_profile.min())[0][0]
+
+        # add consumed power to consumption profile of chrg stations
+        locations = events.locations
+        home_profile = np.where(locations == soc_kernels.HOME, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        work_profile = np.where(locations == soc_kernels.WORK, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        return ((state_of_charge_profile, chrg_profile, home_profile, 
+                 work_profile) 
+                + self.compiled_load_profiles(home_profile, 
+                                              work_profile, 
+                                              home_chrg_pwr, 
+                                              work_chrg_pwr))
+
+    def event_min_state_of_charge_profile(self, 
+                                          start,
+                                          end, 
+                                          home_chrg_pwr, 
+                                          work_chrg_pwr, 
+                                          chrg_eff, 
+                                          dischrg_eff):
+        """ same as min_state_of_charge_profile, simulated per trip/dwell 
+        (CarEvents) and expanded to profiles for every timestep
+        """
+        events = self.get_events(start, end)
+        min_state_of_charge = np.ravel(self.min_state_of_charge)[0]
+        pieces = events.min_strategy(
+            np.ravel(self.capacity)[0], 
+            np.ravel(self.car_charging_power)[0], 
+            min_state_of_charge, 
+            int(self.time_z), 
+            self.ts_length, 
+            home_chrg_pwr, 
+            work_chrg_pwr, 
+            chrg_eff, 
+            dischrg_eff)
+        profiles = events.expand_min(pieces, min_state_of_charge, dischrg_eff)
+        state_of_charge_profile = profiles[0]
+        chrg_profile = profiles[1]
+
+        # consumed power is assigned to charging location of timestep before
+        # (as in min_state_of_charge_profile)
+        previous = np.roll(events.locations, 1)
+        home_profile = np.where(previous == soc_kernels.HOME, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        work_profile = np.where(previous == soc_kernels.WORK, 
+                                chrg_profile * (2 - dischrg_eff), 0)
+        return ((state_of_charge_profile, chrg_profile, home_profile, 
+                 work_profile) 
+                + self.compiled_load_profiles(home_profile, 
+                                              work_profile, 
+                                              home_chrg_pwr, 
+                                              work_chrg_pwr))
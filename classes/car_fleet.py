@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""car_fleet.py
+
+Structure-of-arrays container for many cars.
+"""
+
+import numpy as np
+from classes import soc_kernels
+from classes.car import Car, consumption_profiles, max_profiles_fleet
+
+
+class CarFleet:
+    """ Class CarFleet:
+    - holds information about many cars in contiguous arrays
+      (one row per car) instead of one Car object per car
+    - simulates max strategy (incl. feasibility check) for all cars at once
+      and min strategy car by car (soc_kernels)
+    - strategy methods write into preallocated output buffers
+      (7 profiles x cars x timesteps, see Car.max_profile_generation())
+    - fleet[i] returns Car object for row i (per-row view, arrays are not
+      copied) for backwards compatibility
+    """
+    def __init__(self,
+                 states_profiles,
+                 speeds_profiles,
+                 temperature_arrays,
+                 segments,
+                 csv_database_electric_cars,
+                 min_charge,
+                 max_charge,
+                 ts_length):
+        """ inits CarFleet class with:
+        Args:
+          - states_profiles:      states of all cars (cars x timesteps)
+          - speeds_profiles:      speeds of all cars (cars x timesteps)
+          - temperature_arrays:   temperatures (cars x timesteps)
+          - segments:             car segments (before possible adjustment)
+          - csv_database_el.:     table with meta data electric cars
+          - min_charge:           min state of charge allowed [in %]
+          - max_charge:           max state of charge allowed
+          - ts_length:            timestep length
+        Instance attributes (one entry per car):
+          - segments, capacities, car_charging_powers,
+            min_state_of_charge, max_state_of_charge (see Car)
+          - feasible:             true, if profile generation is possible
+          - time_z:               timestep with lowest capacity in period
+          - cache:                consumption profiles of all cars for 
+              (segment, start, end, ts_length), see Car.cache
+        """
+        self.states = np.ascontiguousarray(states_profiles)
+        self.speeds = np.ascontiguousarray(speeds_profiles, dtype = float)
+        self.temperatures = np.ascontiguousarray(
+            np.broadcast_to(temperature_arrays, self.states.shape),
+            dtype = float)
+        self.csv_database_electric_cars = csv_database_electric_cars
+        self.min_charge = min_charge
+        self.max_charge = max_charge
+        self.ts_length = ts_length
+        self.no_of_cars = self.states.shape[0]
+
+        self.segments = np.array([np.ravel(segment)[0]
+                                  for segment in segments], dtype = int)
+        self.capacities = np.zeros(self.no_of_cars)
+        self.min_state_of_charge = np.zeros(self.no_of_cars)
+        self.max_state_of_charge = np.zeros(self.no_of_cars)
+        self.set_segments(self.segments)
+        self.car_charging_powers = csv_database_electric_cars[
+            self.segments, 5].astype(float)
+        self.feasible = np.ones(self.no_of_cars, dtype = bool)
+        self.time_z = np.zeros(self.no_of_cars, dtype = int)
+        self.cache = {}
+
+    @classmethod
+    def from_cars(cls, cars):
+        """ creates CarFleet from list of Car objects (same database,
+        min/max charge and timestep length)
+        """
+        return cls([car.states for car in cars],
+                   [car.speeds for car in cars],
+                   [car.temperature_array for car in cars],
+                   [car.segment for car in cars],
+                   cars[0].csv_database_electric_cars,
+                   cars[0].min_charge,
+                   cars[0].max_charge,
+                   cars[0].ts_length)
+
+    def __len__(self):
+        return self.no_of_cars
+
+    def __getitem__(self, i):
+        """ returns Car object for car i
+        (states, speeds, temperatures are views of fleet arrays,
+        changes of the Car object are not written back)
+        - current segment, feasible and time_z of car i
+        - charging power of car of initial segment (kept by escalation, 
+          see set_segments())
+        """
+        car = Car(self.states[i],
+                  self.speeds[i],
+                  self.temperatures[i],
+                  self.segments[i],
+                  self.csv_database_electric_cars,
+                  self.min_charge,
+                  self.max_charge,
+                  self.ts_length)
+        car.car_charging_power = self.car_charging_powers[i]
+        car.feasible = bool(self.feasible[i])
+        car.time_z = self.time_z[i]
+        return car
+
+    def set_segments(self, segments, rows = slice(None)):
+        """ sets car segments and adjusts capacities, min_soc, max_soc
+        (charging power of car stays the same, see Car.set_segment())
+        """
+        self.segments[rows] = segments
+        self.capacities[rows] = self.csv_database_electric_cars[
+            self.segments[rows], 3]
+        self.min_state_of_charge[rows] = (self.min_charge
+                                          * self.capacities[rows])
+        self.max_state_of_charge[rows] = (self.max_charge
+                                          * self.capacities[rows])
+
+    def allocate_profiles(self, start, end):
+        """ returns empty output buffer for 7 profiles of all cars
+        """
+        return np.zeros((7, self.no_of_cars, end-start))
+
+    def generate_consumption_profiles(self, 
+                                      start, 
+                                      end, 
+                                      out = None, 
+                                      rows = None):
+        """ returns consumption profiles of cars (cars x timesteps)
+        (see Car.generate_consumption_profile())
+        - profiles of all cars are cached per segment (kept when segments 
+          are changed, e.g. escalation or parameter sweep)
+        - rows: cars (default: all cars)
+        """
+        if rows is None:
+            rows = np.arange(self.no_of_cars)
+        if out is None:
+            out = np.zeros((len(rows), end-start))
+        segments = self.segments[rows]
+        for segment in np.unique(segments):
+            key = ("consumption", int(segment), start, end, self.ts_length)
+            if key not in self.cache:
+                consumption = consumption_profiles(
+                    self.speeds,
+                    self.temperatures,
+                    self.csv_database_electric_cars[segment, 4],
+                    self.ts_length)
+                consumption.flags.writeable = False    # shared via cache
+                self.cache[key] = consumption
+            out[segments == segment] = self.cache[key][
+                rows[segments == segment]]
+        return out
+
+    def max_state_of_charge_profiles(self,
+                                     start,
+                                     end,
+                                     home_chrg_pwr,
+                                     work_chrg_pwr,
+                                     chrg_eff,
+                                     dischrg_eff,
+                                     out = None):
+        """ generates state of charge profiles for max strategy for all cars
+        - feasibility check for all cars at once: cars with state of charge
+          below min_state_of_charge are increased by one segment (up to
+          segment 6) and simulated again
+        - same results as Car.max_state_of_charge_profile() for every car,
+          profiles of not feasible cars are kept (see self.feasible)
+        - out: output buffer (see allocate_profiles())
+        """
+        if out is None:
+            out = self.allocate_profiles(start, end)
+        consumption = np.zeros((self.no_of_cars, end-start))
+        rows = np.arange(self.no_of_cars)
+
+        while len(rows) > 0:
+            consumption[rows] = self.generate_consumption_profiles(
+                start, end, rows = rows)
+            profiles = max_profiles_fleet(self.states[rows],
+                                          consumption[rows],
+                                          self.capacities[rows],
+                                          self.car_charging_powers[rows],
+                                          self.max_charge,
+                                          self.ts_length,
+                                          home_chrg_pwr,
+                                          work_chrg_pwr,
+                                          chrg_eff,
+                                          dischrg_eff)
+            for k in range(7):
+                out[k, rows] = profiles[k]
+
+            # any state_of_charge below min_state_of_charge?
+            below = (profiles[0]
+                     < self.min_state_of_charge[rows, np.newaxis]).any(axis = 1)
+            self.feasible[rows] = ~below
+
+            # increase segment (max cap.: segment 6) and retry
+            rows = rows[below & np.isin(self.segments[rows], [1,2,3,4,5])]
+            self.set_segments(self.segments[rows] + 1, rows)
+
+        # timestep with minimal state_of_charge
+        self.time_z[:] = np.argmin(out[0], axis = 1)
+        return out
+
+    def min_state_of_charge_profiles(self,
+                                     start,
+                                     end,
+                                     home_chrg_pwr,
+                                     work_chrg_pwr,
+                                     chrg_eff,
+                                     dischrg_eff,
+                                     out = None):
+        """ generates state of charge profiles for min strategy for all cars
+        - max_state_of_charge_profiles() has to be run before (time_z)
+        - same results as Car.min_state_of_charge_profile() for every car
+        - out: output buffer (see allocate_profiles())
+        """
+        if out is None:
+            out = self.allocate_profiles(start, end)
+        consumption = self.generate_consumption_profiles(start, end)
+        locations = soc_kernels.location_codes(self.states)
+
+        for i in range(self.no_of_cars):
+            profiles = soc_kernels.min_soc_kernel(
+                consumption[i],
+                locations[i],
+                float(self.capacities[i]),
+                float(self.car_charging_powers[i]),
+                float(self.min_state_of_charge[i]),
+                int(self.time_z[i]),
+                float(self.ts_length),
+                float(home_chrg_pwr),
+                float(work_chrg_pwr),
+                float(chrg_eff),
+                float(dischrg_eff))
+            for k in range(4):
+                out[k, i] = profiles[k]
+
+        # load profiles
+        out[5] = np.where(out[2] != 0, home_chrg_pwr, 0)
+        out[6] = np.where(out[3] != 0, work_chrg_pwr, 0)
+        out[4] = out[5] + out[6]
+        return out
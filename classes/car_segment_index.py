@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""car_segment_index.py
+
+Car segments of all households of the TANK data set.
+"""
+
+import numpy as np
+
+# column of car segment in TANK data set
+SEGMENT_COLUMN = 174
+
+
+class CarSegmentIndex:
+    """ Class CarSegmentIndex:
+    - maps household ID to segments of all cars of the household
+      (order of cars as in csv.-file)
+    - segments are resolved once for all cars: if no valid segment
+      (1 - 13) is given, default_segment is used
+    - lookup of a car is a dict access instead of a scan of csv_cars
+    """
+    def __init__(self, csv_cars, default_segment = 3):
+        """ inits CarSegmentIndex class with:
+        Args:
+          - csv_cars:         TANK data set (household ID in column 0)
+          - default_segment:  segment of cars without valid segment,
+                              default: 3
+        Instance attributes:
+          - default_segment:  segment of cars without valid segment
+          - segments:         segments of all cars grouped by household ID
+          - household_IDs:    all household IDs (sorted)
+          - first, counts:    first entry in segments and number of cars
+                              for every household ID
+        """
+        rows = np.isfinite(csv_cars[:,0])    # without header row
+        ids = csv_cars[rows,0].astype(np.int64)
+        segments = csv_cars[rows,SEGMENT_COLUMN]
+        valid = np.isin(segments, np.arange(1, 14))
+        segments = np.where(valid, segments, default_segment).astype(int)
+
+        order = np.argsort(ids, kind = "stable")
+        IDs, first, counts = np.unique(ids[order],
+                                       return_index = True,
+                                       return_counts = True)
+        self.default_segment = default_segment
+        self.segments = segments[order]
+        self.household_IDs = IDs
+        self.first = first
+        self.counts = counts
+        self.lookup = {ID: k for k, ID in enumerate(IDs.tolist())}
+
+    def __len__(self):
+        return len(self.household_IDs)
+
+    def __contains__(self, ID):
+        return ID in self.lookup
+
+    def get_segments(self, ID):
+        """ returns segments of all cars of household ID
+        (empty, if household is not in data set)
+        """
+        k = self.lookup.get(ID)
+        if k is None:
+            return np.zeros(0, dtype = int)
+        return self.segments[self.first[k] : self.first[k] + self.counts[k]]
+
+    def get_segment(self, ID, car):
+        """ returns segment of car number car (0, 1, ...) of household ID
+        (default_segment, if car is not in data set)
+        """
+        k = self.lookup.get(ID)
+        if (k is None) or (car >= self.counts[k]):
+            return self.default_segment
+        return int(self.segments[self.first[k] + car])
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""events.py
+
+Event-based (trip/dwell) state of charge simulation.
+"""
+
+import numpy as np
+from classes import soc_kernels
+
+# event kind of trips (dwells: charging location code of the dwell)
+DRIVING = 255
+
+
+class CarEvents:
+    """ Class CarEvents:
+    - run-length encodes the profile of one car into events:
+      - trips:  timesteps with consumption (car is driving)
+      - dwells: timesteps at the same charging location (home, work, other)
+    - simulates max and min strategy per event, charging during a dwell is
+      calculated in closed form for every charging power band
+      (see soc_kernels.TAPER_LIMITS), so work scales with number of events
+    - results are lists of pieces (first timestep, number of timesteps,
+      state of charge before piece, change per timestep, driving)
+      and are expanded to per-timestep profiles on demand
+    """
+    def __init__(self, consumption, locations):
+        """ inits CarEvents class with:
+        Args:
+          - consumption:  consumption profile of car
+          - locations:    charging location codes (soc_kernels)
+        Instance attributes:
+          - starts, ends: first and (excl.) last timestep of every event
+          - kinds:        DRIVING or charging location code of dwell
+        """
+        self.consumption = np.asarray(consumption, dtype = float)
+        self.locations = np.asarray(locations)
+        self.no_of_ts = len(self.consumption)
+
+        kinds = np.where(self.consumption != 0, DRIVING, self.locations)
+        changes = np.flatnonzero(kinds[1:] != kinds[:-1]) + 1
+        self.starts = np.concatenate(([0], changes))
+        self.ends = np.concatenate((changes, [self.no_of_ts]))
+        self.kinds = kinds[self.starts]
+
+    def max_strategy(self,
+                     capacity,
+                     car_chrg_pwr,
+                     max_state_of_charge,
+                     ts_length,
+                     home_chrg_pwr,
+                     work_chrg_pwr,
+                     chrg_eff,
+                     dischrg_eff,
+                     state_of_charge = None):
+        """ simulates max strategy (forward, see Car.max_profile_generation)
+        (state of charge before first timestep: state_of_charge, default:
+        max_state_of_charge)
+        returns list of pieces (expand with expand_max())
+        """
+        table = soc_kernels.charging_power_table(home_chrg_pwr, work_chrg_pwr)
+        if state_of_charge is None:
+            state_of_charge = max_state_of_charge    # max cap. at ts 0
+        pieces = []
+
+        for start, end, kind in zip(self.starts, self.ends, self.kinds):
+            if (kind == DRIVING):
+                pieces.append((start, end - start, state_of_charge, 0, True))
+                state_of_charge = (state_of_charge
+                    - np.cumsum(self.consumption[start:end]
+                                * (2 - dischrg_eff))[-1])
+            elif (kind == soc_kernels.NO_CHARGING):
+                pieces.append((start, end - start, state_of_charge, 0, False))
+            else:
+                charging = self.charge(state_of_charge,
+                                       end - start,
+                                       max_state_of_charge,
+                                       capacity,
+                                       car_chrg_pwr,
+                                       table[kind],
+                                       ts_length,
+                                       chrg_eff,
+                                       rising = True)
+                for n, delta in charging:
+                    pieces.append((start, n, state_of_charge, delta, False))
+                    state_of_charge = state_of_charge + n * delta
+                    start = start + n
+        return pieces
+
+    def min_strategy(self,
+                     capacity,
+                     car_chrg_pwr,
+                     min_state_of_charge,
+                     time_z,
+                     ts_length,
+                     home_chrg_pwr,
+                     work_chrg_pwr,
+                     chrg_eff,
+                     dischrg_eff):
+        """ simulates min strategy (backward, see
+        Car.min_state_of_charge_profile)
+        1. from time_z to timestep 1 (state of charge at time_z: min)
+        2. from last timestep to time_z+1 (last timestep: min)
+        returns list of pieces (expand with expand_min()),
+        for piece timesteps t (descending): state of charge of t-1 is set
+        """
+        pieces = []
+        for first, last in [(time_z, 1), (self.no_of_ts - 1, time_z + 1)]:
+            pieces = pieces + self.backward(first,
+                                            last,
+                                            capacity,
+                                            car_chrg_pwr,
+                                            min_state_of_charge,
+                                            ts_length,
+                                            home_chrg_pwr,
+                                            work_chrg_pwr,
+                                            chrg_eff,
+                                            dischrg_eff)[0]
+        return pieces
+
+    def just_in_time(self,
+                     capacity,
+                     car_chrg_pwr,
+                     min_state_of_charge,
+                     ts_length,
+                     home_chrg_pwr,
+                     work_chrg_pwr,
+                     chrg_eff,
+                     dischrg_eff,
+                     end_state_of_charge = None):
+        """ simulates just in time charging (independent of max strategy)
+        - one backward pass from last timestep (state of charge: min or
+          end_state_of_charge) to first timestep: every trip adds its
+          energy to the required state of charge, charging windows before
+          the trip are used as late as possible to cover it
+        returns list of pieces (expand with expand_min()) and state of
+        charge required before first timestep
+        """
+        return self.backward(self.no_of_ts - 1,
+                             0,
+                             capacity,
+                             car_chrg_pwr,
+                             min_state_of_charge,
+                             ts_length,
+                             home_chrg_pwr,
+                             work_chrg_pwr,
+                             chrg_eff,
+                             dischrg_eff,
+                             end_state_of_charge)
+
+    def backward(self,
+                 first,
+                 last,
+                 capacity,
+                 car_chrg_pwr,
+                 min_state_of_charge,
+                 ts_length,
+                 home_chrg_pwr,
+                 work_chrg_pwr,
+                 chrg_eff,
+                 dischrg_eff,
+                 state_of_charge = None):
+        """ backward iteration over all events from first to last timestep
+        (state of charge at first timestep: state_of_charge, default:
+        min_state_of_charge)
+        returns list of pieces and state of charge before last timestep
+        """
+        table = soc_kernels.charging_power_table(home_chrg_pwr, work_chrg_pwr)
+        if state_of_charge is None:
+            state_of_charge = min_state_of_charge
+        pieces = []
+
+        for k in range(len(self.starts) - 1, -1, -1):
+            high = min(self.ends[k] - 1, first)
+            low = max(self.starts[k], last)
+            if high < low:
+                continue
+            kind = self.kinds[k]
+            if (kind == DRIVING):
+                pieces.append((high, high - low + 1, state_of_charge,
+                               0, True))
+                state_of_charge = (state_of_charge
+                    + np.cumsum(self.consumption[low:high+1][::-1]
+                                / dischrg_eff)[-1])
+            elif (kind == soc_kernels.NO_CHARGING):
+                pieces.append((high, high - low + 1, state_of_charge,
+                               0, False))
+            else:
+                charging = self.charge(state_of_charge,
+                                       high - low + 1,
+                                       min_state_of_charge,
+                                       capacity,
+                                       car_chrg_pwr,
+                                       table[kind],
+                                       ts_length,
+                                       chrg_eff,
+                                       rising = False)
+                for n, delta in charging:
+                    pieces.append((high, n, state_of_charge, delta, False))
+                    state_of_charge = state_of_charge - n * delta
+                    high = high - n
+        return pieces, state_of_charge
+
+    def trip_requirements(self, pieces, dischrg_eff):
+        """ returns one row per trip from pieces of just_in_time():
+        1. first timestep of trip
+        2. last timestep of trip
+        3. energy needed for trip [kWh] (depending on dischrg_eff)
+        4. required state of charge at departure [kWh]
+        5. latest start of charging for trip (first timestep of charging
+           between previous trip and this trip, -1: no charging needed)
+        """
+        requirements = []
+        for high, n, state_of_charge, delta, driving in pieces:
+            if driving:
+                energy = np.sum(self.consumption[high-n+1:high+1]
+                                / dischrg_eff)
+                requirements.append([high - n + 1,
+                                     high,
+                                     energy,
+                                     state_of_charge + energy,
+                                     -1])
+            elif (delta != 0) and requirements:
+                requirements[-1][4] = high - n + 1   # pieces are backwards
+        return np.array(requirements[::-1]).reshape(-1, 5)
+
+    def charge(self,
+               state_of_charge,
+               no_of_ts,
+               limit,
+               capacity,
+               car_chrg_pwr,
+               station_pwr,
+               ts_length,
+               chrg_eff,
+               rising):
+        """ closed-form charging during one dwell
+        - in every charging power band the energy per timestep is constant:
+          min(charging station, reduced charging power of car) * duration
+          * efficiency
+        - number of timesteps per band is calculated directly
+        - last timestep before limit: only remaining energy is charged
+        Args:
+          - state_of_charge: state of charge at beginning of dwell
+          - no_of_ts:        number of timesteps of dwell
+          - limit:           max_state_of_charge (rising, max strategy) or
+                             min_state_of_charge (falling, min strategy)
+          - car_chrg_pwr:    max poss chrg power of car (w/o reduction)
+          - station_pwr:     max power of charging station
+          - rising:          max strategy: state of charge rises
+        returns list of (number of timesteps, energy per timestep)
+        """
+        limits = soc_kernels.TAPER_LIMITS * capacity
+        charging = []
+        while no_of_ts > 0:
+            band = int((state_of_charge > limits).sum())
+            delta = (min(station_pwr, 
+                         soc_kernels.TAPER_FACTORS[band] * car_chrg_pwr)
+                     * (ts_length/60) * chrg_eff)
+            if rising:
+                room = limit - state_of_charge
+            else:
+                room = state_of_charge - limit
+
+            # battery full/empty or no charging possible: no change
+            if (room <= 0) or (delta <= 0):
+                charging.append((no_of_ts, 0))
+                break
+
+            # timesteps with full energy before limit is reached
+            n_full = int(np.floor(room / delta))
+            if n_full == 0:
+                charging.append((1, room))
+                if no_of_ts > 1:
+                    charging.append((no_of_ts - 1, 0))
+                break
+
+            # timesteps until state of charge leaves current band
+            if rising and (band < len(limits)):
+                n_band = int(np.floor((limits[band] - state_of_charge)
+                                      / delta)) + 1
+            elif (not rising) and (band > 0):
+                n_band = int(np.ceil((state_of_charge - limits[band - 1])
+                                     / delta))
+            else:
+                n_band = no_of_ts
+
+            n = min(n_full, n_band, no_of_ts)
+            charging.append((n, delta))
+            if rising:
+                state_of_charge = state_of_charge + n * delta
+            else:
+                state_of_charge = state_of_charge - n * delta
+            no_of_ts = no_of_ts - n
+        return charging
+
+    def expand_max(self, pieces, dischrg_eff):
+        """ returns state of charge profile and charged energy for every
+        timestep from pieces of max_strategy()
+        """
+        state_of_charge_profile = np.zeros(self.no_of_ts)
+        chrg_profile = np.zeros(self.no_of_ts)
+        for start, n, state_of_charge, delta, driving in pieces:
+            if driving:
+                state_of_charge_profile[start:start+n] = (state_of_charge
+                    - np.cumsum(self.consumption[start:start+n]
+                                * (2 - dischrg_eff)))
+            else:
+                state_of_charge_profile[start:start+n] = (state_of_charge
+                    + delta * np.arange(1, n + 1))
+                chrg_profile[start:start+n] = delta
+        return state_of_charge_profile, chrg_profile
+
+    def expand_min(self, pieces, end_state_of_charge, dischrg_eff):
+        """ returns state of charge profile and charged energy for every
+        timestep from pieces of min_strategy() or just_in_time()
+        (state of charge at last timestep: end_state_of_charge)
+        """
+        state_of_charge_profile = np.zeros(self.no_of_ts)
+        chrg_profile = np.zeros(self.no_of_ts)
+        state_of_charge_profile[self.no_of_ts - 1] = end_state_of_charge
+        for high, n, state_of_charge, delta, driving in pieces:
+            steps = np.arange(high, high - n, -1)     # timesteps (backwards)
+            if driving:
+                socs = (state_of_charge
+                        + np.cumsum(self.consumption[steps] / dischrg_eff))
+            else:
+                socs = state_of_charge - delta * np.arange(1, n + 1)
+                chrg_profile[steps] = delta
+
+            # state of charge before first timestep is not part of profile
+            state_of_charge_profile[steps[steps > 0] - 1] = socs[steps > 0]
+        return state_of_charge_profile, chrg_profile
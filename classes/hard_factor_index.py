@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""hard_factor_index.py
+
+Inverted index (posting lists) on the hard ranking factors.
+"""
+
+import numpy as np
+
+# hard factors of rank_households() (exact match)
+HARD_FACTORS = ["number_of_occupants",
+                "number_of_drivers",
+                "number_of_cars"]
+
+
+class HardFactorIndex:
+    """ Class HardFactorIndex:
+    - posting list for every value of every hard factor: rows of all
+      households with this value (rows of feature table, ascending)
+    - candidates of a query are retrieved by intersecting posting lists
+      (exact values) or unions of posting lists (value ranges), work
+      depends on size of posting lists, not on size of data set
+    """
+    def __init__(self, features, factors = HARD_FACTORS):
+        """ inits HardFactorIndex class with:
+        Args:
+          - features:     features of all households (one entry per
+                          household, see household_features())
+          - factors:      indexed factors, default: HARD_FACTORS
+        Instance attributes:
+          - postings:     dict: factor -> dict: value -> rows
+        """
+        self.no_of_households = len(features["household_ID"])
+        self.postings = {}
+        for factor in factors:
+            values = np.asarray(features[factor])
+            order = np.argsort(values, kind = "stable")
+            unique, first, counts = np.unique(values[order],
+                                              return_index = True,
+                                              return_counts = True)
+            self.postings[factor] = {
+                value: order[start : start + count]
+                for value, start, count in zip(unique.tolist(), first, counts)}
+
+    def get_rows(self, factor, value):
+        """ returns rows of all households with value of factor
+        """
+        return self.postings[factor].get(value, np.zeros(0, dtype = int))
+
+    def get_candidates(self, **values):
+        """ returns rows of households with all given factor values
+        e.g. get_candidates(number_of_occupants = 2, number_of_cars = 1)
+        """
+        return self.intersect([self.get_rows(factor, value)
+                               for factor, value in values.items()])
+
+    def get_range_candidates(self, **ranges):
+        """ returns rows of households with all factors in given ranges
+        (incl. limits)
+        e.g. get_range_candidates(number_of_occupants = (1, 5))
+        """
+        rows = []
+        for factor, (low, high) in ranges.items():
+            postings = [posting
+                        for value, posting in self.postings[factor].items()
+                        if low <= value <= high]
+            if postings:
+                rows.append(np.sort(np.concatenate(postings)))
+            else:
+                rows.append(np.zeros(0, dtype = int))
+        return self.intersect(rows)
+
+    def intersect(self, rows):
+        """ returns intersection of posting lists (shortest list first),
+        all rows if no posting list is given
+        """
+        if not rows:
+            return np.arange(self.no_of_households)
+        rows = sorted(rows, key = len)
+        candidates = rows[0]
+        for posting in rows[1:]:
+            candidates = np.intersect1d(candidates, posting,
+                                        assume_unique = True)
+        return candidates
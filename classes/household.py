@@ -39,6 +39,8 @@ class Household:
           - dates:            dates of data collection (SPS-format)
           - states:           all states of all occupants in obervation period
           - driver positions: list with positions of all household drivers
+          - member_cache:     per-member aggregates for (start, end)
+                              (see get_member_aggregates())
 
           - meta_data for household (# of occupants, # of cars, # of drivers, 
               net income, # of inhabitants in area, year of birth, job,
@@ -55,6 +57,7 @@ class Household:
 
         self.states = states
         self.speeds = speeds
+        self.member_cache = {}
         self.distances = self.get_distances(0, no_of_ts)
 
         self.number_of_drivers = self.get_number_of_drivers(0, no_of_ts)
@@ -68,55 +71,62 @@ class Household:
         self.driven_distance = self.get_driven_distances(0, no_of_ts)[0]
     
 
-    def generate_mobility_states_profiles(self, start, end):
-        """ generates mobility states profiles for all household cars 
-              (array with all car states profiles)
+    def generate_mobility_profiles(self, start, end):
+        """ generates mobility states and speeds profiles for all household 
+        cars at once (arrays with all car states/speeds profiles)
           - start: first timestep of observation
           - end: last timestep of observation
         """
+        # drivers sorted by driven distance (longest distance -> first car)
+        drivers = self.get_driver_positions(start, end)   # all drivers
+        positions = np.array(drivers, dtype = int) - self.first_position
+        states = self.get_states(start, end)[positions]
+        speeds = self.get_speeds(start, end)[positions]
+
         # if more drivers than cars: merge necessary
         # number of cars has to match number of mobility profiles
         # merge: drivers who drive the least share a car
-        # merge last driver and second to last driver
-        # check for merge and repeat
-        if (self.get_number_of_drivers(start, end) > self.number_of_cars):
-            cars_states_prf = self.states_merge(start, end)
-        else:
-            drivers = self.get_driver_positions(start, end)   # all drivers
-            positions = drivers - self.first_position   # get states order
+        if (len(positions) > self.number_of_cars):
+            states, speeds = self.merge_profiles(states, speeds)
 
-            cars_states_prf = [self.get_states(start, end)[i] for i in positions]
-            cars_states_prf = np.where(cars_states_prf, cars_states_prf, cars_states_prf)
+        # filter all speeds not belonging to driving states (state = 14)
+        speeds = np.where(states == 14, speeds, 0)
+        return states, speeds
 
-        return cars_states_prf
+    def generate_mobility_states_profiles(self, start, end):
+        """ generates mobility states profiles for all household cars 
+              (see generate_mobility_profiles())
+        """
+        return self.generate_mobility_profiles(start, end)[0]
 
     def generate_mobility_speeds_profiles(self, start, end):
         """ generates mobility speeds profiles for all household cars 
-              (array with all car speeds profiles)
-          - start: first timestep of observation period
-          - end: last timestep of observation period
+              (see generate_mobility_profiles())
         """
-        
-        states = np.array(self.generate_mobility_states_profiles(start, end))
-
-        # check for merge
-        if (self.get_number_of_drivers(start, end) > self.number_of_cars):
-            cars_speeds_prf = self.speeds_merge(start, end)
-        else:
-            drivers = self.get_driver_positions(start, end)   #  all drivers
-            positions = drivers - self.first_position  # get states in order
-
-            cars_speeds_prf = [self.get_speeds(start, end)[i] for i in positions]
-            cars_speeds_prf = np.where(cars_speeds_prf, cars_speeds_prf, cars_speeds_prf)
-
-        speeds = np.array(cars_speeds_prf)
-
-        # filter all speeds not belonging to driving states (state = 14)
-        mask = np.where((states == 14), False, True)
-        cars_speeds_prf = speeds.copy()
-        cars_speeds_prf[mask] = 0
-
-        return cars_speeds_prf
+        return self.generate_mobility_profiles(start, end)[1]
+
+    def merge_profiles(self, states, speeds):
+        """ returns merged states and speeds profiles (one per car)
+        - states, speeds: profiles of drivers (sorted by driven distance)
+        - drivers after the last car share the last car: state 14 and speed
+          of the driver with the shortest distance driving at a timestep 
+          are used (same as merging last two profiles repeatedly)
+        """
+        last_car = max(self.number_of_cars, 1) - 1
+        shared_states = states[last_car:]
+        shared_speeds = speeds[last_car:]
+
+        # last driver with speed != 0 at every timestep
+        driving = (shared_speeds[::-1] != 0)
+        last_driver = len(shared_speeds) - 1 - np.argmax(driving, axis = 0)
+
+        merged_states = states[:last_car + 1].copy()
+        merged_speeds = speeds[:last_car + 1].copy()
+        merged_states[last_car] = np.where((shared_states == 14).any(axis = 0),
+                                           14, states[last_car])
+        merged_speeds[last_car] = np.take_along_axis(
+            shared_speeds, last_driver[np.newaxis], axis = 0)[0]
+        return merged_states, merged_speeds
 
     def get_states(self, start, end):
         """ returns all states for timespace between start and end
@@ -128,85 +138,60 @@ class Household:
         """ returns all speeds for timespace between start and end
         returns only speeds from car drives (state = 14) (no other speeds!)
         """
-        speeds = self.speeds[:, start:end]
-        states = self.get_states(start,end)
-        return np.where(states == 14, speeds, 0)
+        return self.get_member_aggregates(start, end)["speeds"]
     
     def get_distances(self, start, end):
         """ returns all distances for timespace between start and end 
         (for states = 14)
         """
-        speeds = self.get_speeds(start,end)
-        states = self.get_states(start,end)
-        return np.where(states == 14, speeds * self.ts_length / 60, 0)
+        return self.get_member_aggregates(start, end)["distances"]
 
     def get_number_of_drivers(self, start, end):
         """ returns number of drivers 
         counts all occupants who drive (state = 14) at least once in timespace
         """
-        no_of_drivers = 0
-        for i in range(0, len(self.get_states(start, end))):
-            if ((self.get_states(start, end)[i] == 14).sum() > 0):
-                no_of_drivers += 1
-        return no_of_drivers
+        return int(self.get_member_aggregates(start, end)["drivers"].sum())
 
     def get_driven_distances(self, start, end):
         """ returns total driven distance for each household member
         """
-        distances = []
-        for i in range(0, len(self.positions)):
-            distances.append(sum(self.get_distances(start, end)[i]))
-        return distances
+        return self.get_member_aggregates(start, end)["driven_distances"]
 
     def get_driver_positions(self, start, end):
         """ returns list of positions of all drivers in data set 
         (sorted by driving distance)
         """
-        # find all drivers (at least one state = 14)
-        drivers = []
-        for i in range(0, len(self.positions)):
-            if ((self.get_states(start, end)[i] == 14).sum() > 0):
-                drivers.append(self.positions[i])
-        
-        # sort all drivers by their total driven distance
-        distances = self.get_driven_distances(start, end)
-        driver_pos_sorted = [x for _, x in sorted(zip(distances, drivers), reverse = True)]
-        return driver_pos_sorted
-
-    def states_merge(self, start, end):
-        """ returns merged states profiles between start and end
-        """
-        drivers = self.get_driver_positions(start, end)   # all drivers
-        positions = drivers - self.first_position   # get states in that order
-
-        states = []
-        # sort states profiles correctly (longest distance -> first car)
-        for i in positions:
-            states.append(self.get_states(start, end)[i])
-
-        # merge last two profiles to one profile
-        x = self.get_number_of_drivers(start,end)
-        while x > self.number_of_cars:
-            states[-2] = np.where(states[-1] == 14, 14, states[-2])
-            states = np.delete(states,[-1], axis = 0)
-            x -= 1
-        return states   
-
-    def speeds_merge(self, start, end):
-        """ returns merged speeds profiles between start and end
+        return self.get_member_aggregates(start, end)["driver_positions"]
+
+    def get_member_aggregates(self, start, end):
+        """ returns per-member aggregates for timespace between start and 
+        end (computed once per timespace, read only):
+          - speeds:           speeds while driving (state = 14)
+          - distances:        distances while driving
+          - drivers:          true for members with at least one state = 14
+          - driven_distances: total driven distance for each member
+          - driver_positions: positions of drivers (sorted by distance)
         """
-        drivers = self.get_driver_positions(start, end) # indices of all drivers
-        positions = drivers - self.first_position   # get speeds in that order
-
-        speeds = []
-        # sort states profiles correctly (longest distance -> first car)
-        for i in positions:
-            speeds.append(self.get_speeds(start, end)[i])
-        
-        # merge last two profiles to one profile
-        x = self.get_number_of_drivers(start,end)
-        while x > self.number_of_cars:
-            speeds[-2] = np.where(speeds[-1] != 0, speeds[-1], speeds[-2])
-            speeds = np.delete(speeds,[-1], axis = 0)
-            x -= 1
-        return speeds
\ No newline at end of file
+        key = (start, end)
+        if key not in self.member_cache:
+            states = self.get_states(start, end)
+            driving = (states == 14)
+            speeds = np.where(driving, self.speeds[:, start:end], 0)
+            distances = np.where(driving, speeds * self.ts_length / 60, 0)
+            drivers = driving.any(axis = 1)
+            driven_distances = distances.sum(axis = 1)
+
+            # sort all drivers by their total driven distance
+            # (distances of first members are assigned to drivers in order)
+            driver_positions = [x for _, x in sorted(
+                zip(driven_distances, np.asarray(self.positions)[drivers]), 
+                reverse = True)]
+
+            for array in [speeds, distances, drivers, driven_distances]:
+                array.flags.writeable = False    # shared via cache
+            self.member_cache[key] = {"speeds": speeds,
+                                      "distances": distances,
+                                      "drivers": drivers,
+                                      "driven_distances": driven_distances,
+                                      "driver_positions": driver_positions}
+        return self.member_cache[key]
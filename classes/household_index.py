@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""household_index.py
+
+Index of household IDs over the rows of the MOP data set.
+"""
+
+import numpy as np
+
+
+class HouseholdIndex:
+    """ Class HouseholdIndex:
+    - maps household ID to rows of all household members in data set
+      (meta_data_all, states_all, speeds_all have the same rows)
+    - rows are grouped once by household ID (stable sort), lookup of a
+      household is a dict access instead of a scan of meta_data_all
+    - meta data is cast to int once for all households
+    """
+    def __init__(self, meta_data_all):
+        """ inits HouseholdIndex class with:
+        Args:
+          - meta_data_all:    meta data of all household members
+        Instance attributes:
+          - meta_data_int:    meta_data_all cast to int
+          - household_IDs:    all household IDs (sorted)
+          - order:            rows of data set grouped by household ID
+          - first, counts:    first entry in order and number of members
+                              for every household ID
+        """
+        self.meta_data_int = meta_data_all.astype(int)
+        ids = meta_data_all[:,0]
+        self.order = np.argsort(ids, kind = "stable")
+        IDs, first, counts = np.unique(ids[self.order],
+                                       return_index = True,
+                                       return_counts = True)
+        self.household_IDs = IDs
+        self.first = first
+        self.counts = counts
+        self.lookup = {ID: k for k, ID in enumerate(IDs.tolist())}
+
+    def __len__(self):
+        return len(self.household_IDs)
+
+    def __contains__(self, ID):
+        return ID in self.lookup
+
+    def get_positions(self, ID):
+        """ returns rows of all members of household ID in data set
+        (ascending, same as np.where(meta_data_all[:,0] == ID)[0])
+        """
+        k = self.lookup[ID]
+        return self.order[self.first[k] : self.first[k] + self.counts[k]]
+
+    def get_rows(self, ID):
+        """ returns slice of rows of household ID, if its members are in
+        contiguous rows (as in MOP data set), else positions
+        (slices of data set arrays are views, no copies)
+        """
+        positions = self.get_positions(ID)
+        if positions[-1] - positions[0] + 1 == len(positions):
+            return slice(positions[0], positions[-1] + 1)
+        return positions
+
+    def get_meta_data(self, ID):
+        """ returns meta data (int) of all members of household ID
+        """
+        return self.meta_data_int[self.get_rows(ID)]
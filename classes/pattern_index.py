@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""pattern_index.py
+
+Similarity search over weekly mobility patterns of households.
+"""
+
+import numpy as np
+
+
+class PatternIndex:
+    """ Class PatternIndex:
+    - embeds the driving pattern of every household into a fixed-length
+      vector: driven distance of all household members (all car profiles,
+      see Household.get_distances()) per bin (default: hour of week)
+    - vectors are normalized (length 1), similarity of two patterns is
+      the cosine similarity (1: same pattern, 0: no common driving times)
+    - k nearest neighbours of a target pattern are found with one matrix
+      product and partial selection (np.argpartition)
+    """
+    def __init__(self,
+                 household_index,
+                 states_all,
+                 speeds_all,
+                 no_of_ts,
+                 ts_length,
+                 bin_length = 60):
+        """ inits PatternIndex class with:
+        Args:
+          - household_index:  HouseholdIndex of data set
+          - *_all:            states and speeds of data set
+          - no_of_ts:         # of timesteps
+          - ts_length:        timestep length [min]
+          - bin_length:       length of one bin [min], default: 60 (hour),
+                              positive multiple of ts_length (else:
+                              ValueError)
+        Instance attributes:
+          - household_IDs:    IDs of households (rows of patterns)
+          - patterns:         driven distance per bin (households x bins)
+          - vectors:          normalized patterns
+        """
+        if not ((bin_length > 0) and (bin_length % ts_length == 0)):
+            raise ValueError("bin_length must be a positive multiple of "
+                             "ts_length")
+        self.ts_length = ts_length
+        self.ts_per_bin = int(bin_length / ts_length)
+        self.no_of_bins = no_of_ts // self.ts_per_bin
+        self.household_IDs = household_index.household_IDs.astype(int)
+
+        # driven distances of all members (only while driving, state = 14)
+        states = states_all[:, 0 : no_of_ts]
+        distances = np.where(states == 14,
+                             speeds_all[:, 0 : no_of_ts] * ts_length / 60, 0)
+
+        # sum of all members of household (rows grouped by household ID)
+        distances = np.add.reduceat(distances[household_index.order],
+                                    household_index.first)
+        self.patterns = self.get_pattern(distances)
+        self.vectors = self.normalize(self.patterns)
+
+    def get_pattern(self, distances):
+        """ returns driven distance per bin for distance profile(s)
+        (timesteps after last full bin are ignored)
+        """
+        distances = np.atleast_2d(distances)
+        distances = distances[:, 0 : self.no_of_bins * self.ts_per_bin]
+        return distances.reshape(len(distances),
+                                 self.no_of_bins,
+                                 self.ts_per_bin).sum(axis = 2)
+
+    def normalize(self, patterns):
+        """ returns patterns with length 1 (patterns without driving: 0)
+        """
+        norms = np.linalg.norm(patterns, axis = 1, keepdims = True)
+        return np.divide(patterns, norms,
+                         out = np.zeros(patterns.shape), where = norms > 0)
+
+    def query(self, target, k, candidates = None):
+        """ returns IDs and similarities of k most similar households
+        (sorted by similarity, descending)
+        Args:
+          - target:       distance profile (one entry per timestep) or
+                          pattern (one entry per bin)
+          - k:            number of households
+          - candidates:   rows of households to search in (optional, e.g.
+                          from HardFactorIndex), default: all
+        """
+        target = np.asarray(target, dtype = float)
+        if len(target) != self.no_of_bins:
+            target = self.get_pattern(target)[0]
+        vector = self.normalize(target[np.newaxis])[0]
+
+        if candidates is None:
+            candidates = np.arange(len(self.household_IDs))
+        similarities = self.vectors[candidates] @ vector
+
+        # k best households (partial selection), then sorted
+        k = min(k, len(candidates))
+        if k <= 0:
+            return self.household_IDs[:0], similarities[:0]
+        best = np.argpartition(-similarities, k - 1)[:k]
+        best = best[np.argsort(-similarities[best], kind = "stable")]
+        return self.household_IDs[candidates[best]], similarities[best]
+
+    def query_household(self, ID, k):
+        """ returns IDs and similarities of k households with most similar
+        pattern to household ID (household ID itself is included)
+        (KeyError, if household ID is not in index)
+        """
+        row = np.searchsorted(self.household_IDs, ID)
+        if (row == len(self.household_IDs)) or (self.household_IDs[row] != ID):
+            raise KeyError(ID)
+        return self.query(self.patterns[row], k)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""profile_store.py
+
+Profiles of all cars of a run in one columnar .npz-file.
+"""
+
+import os.path
+import numpy as np
+
+# profile columns (order of columns in csv.-files)
+PROFILE_COLUMNS = ["consumption",
+                   "charging_power",
+                   "max_state_of_charge",
+                   "max_charging",
+                   "max_home",
+                   "max_work",
+                   "min_state_of_charge",
+                   "min_charging",
+                   "min_home",
+                   "min_work",
+                   "states"]
+
+# car meta data (one entry per car)
+META_COLUMNS = ["household_ID", "car", "segment", "feasible"]
+
+CSV_HEADER = ('Consumption;Possible Charging power;'
+              'State-of-charge MAX;Charging energy MAX;'
+              'Home demand MAX;Work demand MAX;'
+              'State-of-charge MIN;Charging energy MIN;'
+              'Home demand MIN;Work demand MIN;States')
+
+
+def profile_csv_file(path, household_ID, car):
+    """ returns path of csv.-file of car number car of household_ID
+    """
+    return os.path.join(path,
+                        'SOC_profile_ID_'
+                        + str (household_ID)
+                        + '_car_nr_'
+                        + str (car) + '.csv')
+
+
+def write_profile_csv(path_file, profiles):
+    """ writes profiles of one car (timesteps x PROFILE_COLUMNS) to
+    csv.-file (semicolon-delimited, 2 decimals)
+    """
+    np.savetxt(path_file,
+               profiles,
+               delimiter = ";",
+               encoding = "ISO-8859-1",
+               fmt = "%1.2f",
+               header = CSV_HEADER,
+               comments = '')
+
+
+class ProfileStore:
+    """ Class ProfileStore:
+    - profiles of all cars of a run, one array (cars x timesteps) per
+      profile column (PROFILE_COLUMNS) and car meta data (META_COLUMNS)
+    - saved to and loaded from one .npz-file (instead of one csv.-file
+      per car), profiles are stored as float64 or float32
+    - profiles of cars without feasible profile are nan
+    - csv.-files of all feasible cars can be exported (export_csv())
+    """
+    def __init__(self, household_IDs, cars, segments, feasible, profiles):
+        """ inits ProfileStore class with:
+        Args:
+          - household_IDs:    household ID of every car
+          - cars:             car number (1, 2, ...) in household
+          - segments:         final car segment
+          - feasible:         profile generation possible
+          - profiles:         dict: profile column -> array (cars x
+                              timesteps)
+        """
+        self.household_IDs = np.asarray(household_IDs, dtype = np.int64)
+        self.cars = np.asarray(cars, dtype = int)
+        self.segments = np.asarray(segments, dtype = int)
+        self.feasible = np.asarray(feasible, dtype = bool)
+        self.profiles = profiles
+        self.lookup = {(ID, car): k for k, (ID, car) in
+                       enumerate(zip(self.household_IDs.tolist(),
+                                     self.cars.tolist()))}
+
+    @classmethod
+    def from_results(cls, results, no_of_ts, dtype = np.float64):
+        """ returns ProfileStore of results of household_soc_profiles()
+        (profiles of each car: timesteps x PROFILE_COLUMNS, None if not
+        feasible)
+        """
+        cars = [(result["household_ID"], car) for result in results
+                for car in result["cars"]]
+        profiles = np.full((len(PROFILE_COLUMNS), len(cars), no_of_ts),
+                           np.nan, dtype = dtype)
+        for k, (ID, car) in enumerate(cars):
+            if car["profiles"] is not None:
+                profiles[:, k] = car["profiles"].T
+        return cls([ID for ID, car in cars],
+                   [car["car"] for ID, car in cars],
+                   [car["segment"] for ID, car in cars],
+                   [car["feasible"] for ID, car in cars],
+                   dict(zip(PROFILE_COLUMNS, profiles)))
+
+    @classmethod
+    def load(cls, file):
+        """ returns ProfileStore of .npz-file
+        """
+        with np.load(file) as data:
+            return cls(data["household_ID"],
+                       data["car"],
+                       data["segment"],
+                       data["feasible"],
+                       {column: data[column] for column in PROFILE_COLUMNS})
+
+    def __len__(self):
+        return len(self.cars)
+
+    def save(self, file, bool_compress = False):
+        """ saves profiles and car meta data to .npz-file
+        - bool_compress:    if true: file is compressed, default: False
+        """
+        save = np.savez_compressed if bool_compress else np.savez
+        save(file,
+             household_ID = self.household_IDs,
+             car = self.cars,
+             segment = self.segments,
+             feasible = self.feasible,
+             **self.profiles)
+
+    def get_row(self, household_ID, car):
+        """ returns row of car number car of household_ID in profiles
+        """
+        return self.lookup[(int(household_ID), int(car))]
+
+    def get_profiles(self, household_ID, car):
+        """ returns profiles of car (timesteps x PROFILE_COLUMNS)
+        """
+        k = self.get_row(household_ID, car)
+        return np.column_stack([self.profiles[column][k]
+                                for column in PROFILE_COLUMNS])
+
+    def export_csv(self, path):
+        """ writes one csv.-file per feasible car to folder path
+        (same layout as create_soc_profiles(bool_create_csv = True))
+        """
+        for k in np.flatnonzero(self.feasible):
+            ID = self.household_IDs[k]
+            car = self.cars[k]
+            write_profile_csv(profile_csv_file(path, ID, car),
+                              self.get_profiles(ID, car))
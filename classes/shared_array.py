@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""shared_array.py
+
+Read-only arrays in shared memory or memory-mapped files for worker
+processes.
+"""
+
+import os
+import os.path
+import sys
+import numpy as np
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+# shared memory blocks attached in this process (name -> SharedMemory),
+# kept open as long as the process uses the arrays
+attached_blocks = {}
+
+
+class SharedArray:
+    """ Class SharedArray:
+    - handle of an array in shared memory (by name) or in a memory-mapped
+      .npy-file (by path)
+    - handles are small when pickled (name/path, shape, dtype), worker
+      processes attach to the data without copies (attach())
+    - attached arrays are read-only
+    """
+    def __init__(self, shape, dtype, name = None, path = None):
+        """ inits SharedArray class with:
+        Args:
+          - shape, dtype:     shape and dtype of array
+          - name:             name of shared memory block
+          - path:             path of .npy-file (memory-mapped)
+        Instance attributes:
+          - block:            shared memory block (creator only)
+          - creator:          process ID of creator (shared memory)
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.name = name
+        self.path = path
+        self.block = None           # shared memory block of creator
+        self.creator = None
+
+    @classmethod
+    def create(cls, array, path = None):
+        """ copies array to new shared memory block (or .npy-file in path,
+        if path is given) and returns handle
+        """
+        array = np.ascontiguousarray(array)
+        if path is not None:
+            np.save(path, array)
+            return cls(array.shape, array.dtype, path = path)
+
+        block = shared_memory.SharedMemory(create = True,
+                                           size = max(array.nbytes, 1))
+        shared = cls(array.shape, array.dtype, name = block.name)
+        shared.block = block
+        shared.creator = os.getpid()
+        np.ndarray(array.shape, array.dtype, buffer = block.buf)[:] = array
+        return shared
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["block"] = None       # only creator owns block
+        return state
+
+    def attach(self):
+        """ returns read-only array (view of shared memory block or
+        memory-mapped file)
+        """
+        if self.path is not None:
+            return np.load(self.path, mmap_mode = "r")
+
+        if self.block is not None:
+            block = self.block
+        elif self.name in attached_blocks:
+            block = attached_blocks[self.name]
+        elif sys.version_info >= (3, 13):
+            # block is unlinked by creator, not at exit of this process
+            block = shared_memory.SharedMemory(name = self.name, 
+                                               track = False)
+            attached_blocks[self.name] = block
+        else:
+            block = shared_memory.SharedMemory(name = self.name)
+            # block is unlinked by creator, not at exit of this process:
+            # processes of creator (e.g. pool workers) share its resource
+            # tracker (block is already registered there, registration 
+            # is removed by unlink()), other processes unregister block
+            parent = multiprocessing.parent_process()
+            if ((os.getpid() != self.creator) 
+                    and ((parent is None) or (parent.pid != self.creator))):
+                resource_tracker.unregister(block._name, "shared_memory")
+            attached_blocks[self.name] = block
+        array = np.ndarray(self.shape, self.dtype, buffer = block.buf)
+        array.flags.writeable = False
+        return array
+
+    def unlink(self):
+        """ frees shared memory block (creator only, after all workers
+        are finished)
+        """
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+def attach_array(array):
+    """ returns array for SharedArray handle (or array itself)
+    """
+    if isinstance(array, SharedArray):
+        return array.attach()
+    return array
+
+
+def share_arrays(path = None, **arrays):
+    """ returns dict with SharedArray handles for all given arrays
+    (shared memory, or .npy-files in folder path if path is given)
+    e.g. share_arrays(states_all = states_all, speeds_all = speeds_all)
+    """
+    if path is None:
+        return {key: SharedArray.create(array)
+                for key, array in arrays.items()}
+    return {key: SharedArray.create(array, os.path.join(path, key + ".npy"))
+            for key, array in arrays.items()}
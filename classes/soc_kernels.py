@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""soc_kernels.py
+
+Compiled kernels for the time-recursive state of charge simulation.
+"""
+
+import numpy as np
+
+# numba is optional: without numba the kernels run as plain python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# backends of Car:
+# - "python":   reference implementation (methods of Car)
+# - "compiled": kernels of this module (compiled with numba, if available)
+# - "events":   event-based simulation (trips/dwells, classes/events.py)
+BACKENDS = ["python", "compiled", "events"]
+DEFAULT_BACKEND = "compiled" if NUMBA_AVAILABLE else "python"
+
+# charging location codes
+NO_CHARGING = 0
+HOME = 1
+WORK = 2
+
+# charging power reduction of car (relative to battery capacity)
+# state of charge between 80% and 100%: charging power of car reduced
+TAPER_LIMITS = np.array([0.8, 0.85, 0.9, 0.95, 1.0])
+TAPER_FACTORS = np.array([1, 1/2, 1/4, 1/8, 1/16, 1])
+
+
+def jit(function):
+    """ compiles function with numba (nopython mode), if numba is installed
+    """
+    if NUMBA_AVAILABLE:
+        return njit(cache = True)(function)
+    return function
+
+
+def location_codes(states):
+    """ returns integer charging location codes for mobility states
+    - 8 (home): HOME, 1/2 (work): WORK, else: NO_CHARGING
+    """
+    states = np.asarray(states)
+    return np.where(states == 8, HOME,
+                    np.where((states == 1) | (states == 2), WORK,
+                             NO_CHARGING)).astype(np.uint8)
+
+
+def charging_power_table(home_chrg_pwr, work_chrg_pwr):
+    """ returns lookup table: charging location code -> max power of 
+    charging station [kW] (index with location codes)
+    """
+    table = np.zeros(3)
+    table[HOME] = home_chrg_pwr
+    table[WORK] = work_chrg_pwr
+    return table
+
+
+@jit
+def car_charging_power(state_of_charge, capacity, car_chrg_pwr):
+    """ returns charging power of car (reduced above 80% state of charge)
+    """
+    if (0.8 * capacity < state_of_charge <= 0.85 * capacity):
+        return 1/2 * car_chrg_pwr
+    elif (0.85 * capacity < state_of_charge <= 0.9 * capacity):
+        return 1/4 * car_chrg_pwr
+    elif (0.9 * capacity < state_of_charge <= 0.95 * capacity):
+        return 1/8 * car_chrg_pwr
+    elif (0.95 * capacity < state_of_charge <= 1.0 * capacity):
+        return 1/16 * car_chrg_pwr
+    return car_chrg_pwr
+
+
+@jit
+def location_power(location, home_chrg_pwr, work_chrg_pwr):
+    """ returns max power of charging station at charging location
+    """
+    if location == HOME:
+        return home_chrg_pwr
+    elif location == WORK:
+        return work_chrg_pwr
+    return 0.0
+
+
+@jit
+def max_soc_step(state_of_charge,
+                 consumption,
+                 location,
+                 capacity,
+                 car_chrg_pwr,
+                 max_state_of_charge,
+                 ts_length,
+                 home_chrg_pwr,
+                 work_chrg_pwr,
+                 chrg_eff,
+                 dischrg_eff):
+    """ one timestep of max strategy (see Car.max_profile_generation)
+    returns state of charge after timestep and charged energy
+    """
+    if (consumption != 0):              # if car is driving
+        return state_of_charge - (consumption * (2 - dischrg_eff)), 0.0
+
+    # if car at home/work and battery not full
+    if ((location != NO_CHARGING)
+            and (state_of_charge < max_state_of_charge)):
+        pwr = car_charging_power(state_of_charge, capacity, car_chrg_pwr)
+        possible_kwh = (min(location_power(location,
+                                           home_chrg_pwr,
+                                           work_chrg_pwr), pwr)
+                        * (ts_length/60) * chrg_eff)
+        needed_kwh = min(possible_kwh, max_state_of_charge - state_of_charge)
+        return state_of_charge + needed_kwh, needed_kwh
+    return state_of_charge, 0.0
+
+
+@jit
+def max_soc_kernel(consumption,
+                   locations,
+                   capacity,
+                   car_chrg_pwr,
+                   max_state_of_charge,
+                   initial_state_of_charge,
+                   ts_length,
+                   home_chrg_pwr,
+                   work_chrg_pwr,
+                   chrg_eff,
+                   dischrg_eff):
+    """ forward iteration of max strategy (see Car.max_profile_generation)
+    starting with initial_state_of_charge before first timestep
+    returns state of charge profile and charged energy for every timestep
+    """
+    n = consumption.shape[0]
+    state_of_charge_profile = np.zeros(n)
+    chrg_profile = np.zeros(n)
+    state_of_charge = initial_state_of_charge
+
+    for i in range(n):
+        state_of_charge, chrg_profile[i] = max_soc_step(state_of_charge,
+                                                        consumption[i],
+                                                        locations[i],
+                                                        capacity,
+                                                        car_chrg_pwr,
+                                                        max_state_of_charge,
+                                                        ts_length,
+                                                        home_chrg_pwr,
+                                                        work_chrg_pwr,
+                                                        chrg_eff,
+                                                        dischrg_eff)
+        state_of_charge_profile[i] = state_of_charge
+
+    return state_of_charge_profile, chrg_profile
+
+
+@jit
+def max_soc_segments_kernel(consumption,
+                            locations,
+                            capacities,
+                            car_chrg_pwr,
+                            max_charge,
+                            min_charge,
+                            initial_states_of_charge,
+                            ts_length,
+                            home_chrg_pwr,
+                            work_chrg_pwr,
+                            chrg_eff,
+                            dischrg_eff,
+                            bool_stop):
+    """ feasibility check of max strategy for several segments of one car
+    (one row of consumption and one capacity per segment)
+    - simulation of a segment stops at first state of charge below min
+    - bool_stop: no further segments after first feasible segment
+      (not simulated: not feasible)
+    returns feasible and state of charge after last timestep per segment
+    """
+    k = capacities.shape[0]
+    n = consumption.shape[1]
+    feasible = np.zeros(k, dtype = np.bool_)
+    end_states_of_charge = initial_states_of_charge.copy()
+
+    for j in range(k):
+        max_state_of_charge = max_charge * capacities[j]
+        min_state_of_charge = min_charge * capacities[j]
+        state_of_charge = initial_states_of_charge[j]
+        feasible[j] = True
+        for i in range(n):
+            state_of_charge, needed_kwh = max_soc_step(state_of_charge,
+                                                       consumption[j, i],
+                                                       locations[i],
+                                                       capacities[j],
+                                                       car_chrg_pwr,
+                                                       max_state_of_charge,
+                                                       ts_length,
+                                                       home_chrg_pwr,
+                                                       work_chrg_pwr,
+                                                       chrg_eff,
+                                                       dischrg_eff)
+            if state_of_charge < min_state_of_charge:
+                feasible[j] = False
+                break
+        end_states_of_charge[j] = state_of_charge
+        if feasible[j] and bool_stop:
+            break
+
+    return feasible, end_states_of_charge
+
+
+@jit
+def min_soc_kernel(consumption,
+                   locations,
+                   capacity,
+                   car_chrg_pwr,
+                   min_state_of_charge,
+                   time_z,
+                   ts_length,
+                   home_chrg_pwr,
+                   work_chrg_pwr,
+                   chrg_eff,
+                   dischrg_eff):
+    """ backward iterations of min strategy
+    (see Car.min_state_of_charge_profile)
+    1. from time_z-1 to first timestep (state of charge at time_z: min)
+    2. from second to last timestep to time_z (last timestep: min)
+    returns state of charge profile, charged energy and consumed energy
+    at home and at work for every timestep
+    """
+    n = consumption.shape[0]
+    state_of_charge_profile = np.zeros(n)
+    chrg_profile = np.zeros(n)
+    home_profile = np.zeros(n)
+    work_profile = np.zeros(n)
+
+    for iteration in range(2):
+        if iteration == 0:
+            first = time_z - 1
+            last = -1
+        else:
+            state_of_charge_profile[n-1] = min_state_of_charge
+            first = n - 2
+            last = time_z - 1
+        state_of_charge = min_state_of_charge
+
+        for i in range(first, last, -1):
+
+            # car is driving in next periode
+            if (consumption[i+1] != 0):
+                state_of_charge = (state_of_charge
+                                   + (consumption[i+1] / dischrg_eff))
+
+            # if car at home/work in next periode
+            elif ((locations[i+1] == HOME)
+                    or ((locations[i+1] == WORK)
+                        and (state_of_charge > min_state_of_charge))):
+                pwr = car_charging_power(state_of_charge,
+                                         capacity,
+                                         car_chrg_pwr)
+                possible_kwh = (min(location_power(locations[i+1],
+                                                   home_chrg_pwr,
+                                                   work_chrg_pwr), pwr)
+                                * (ts_length/60) * chrg_eff)
+                needed_kwh = min(possible_kwh,
+                                 state_of_charge - min_state_of_charge)
+                state_of_charge = state_of_charge - needed_kwh
+
+                # [i+1] because of backwards iteration
+                chrg_profile[i+1] = needed_kwh
+                if locations[i] == HOME:
+                    home_profile[i+1] = needed_kwh * (2 - dischrg_eff)
+                elif locations[i] == WORK:
+                    work_profile[i+1] = needed_kwh * (2 - dischrg_eff)
+
+            state_of_charge_profile[i] = state_of_charge
+
+    return state_of_charge_profile, chrg_profile, home_profile, work_profile
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""weather_store.py
+
+Temperatures indexed by date (SPSS day number).
+"""
+
+import numpy as np
+
+# dates of winter scenario (SPSS day numbers, 2017-01-18 to 2017-01-24)
+WINTER_DATES = np.array([20837,20838,20839,20840,20841,20842,20843])
+
+
+class WeatherStore:
+    """ Class WeatherStore:
+    - temperature series of csv.-file (rows: SPSS day number, temperature)
+      reshaped once into array (days x timesteps per day)
+    - temperatures for dates of a household are gathered with one index
+      operation instead of one scan of the file per date
+    """
+    def __init__(self, csv_weather, bool_truncate = True):
+        """ inits WeatherStore class with:
+        Args:
+          - csv_weather:      table with SPSS day number and temperature
+                              for every timestep (header row is ignored)
+          - bool_truncate:    if true: temperatures are truncated to whole
+                              degrees (as before), default: True
+        Instance attributes:
+          - days:             SPSS day numbers (ascending)
+          - ts_per_day:       number of timesteps per day
+          - temperatures:     temperatures (days x timesteps per day)
+        """
+        rows = np.isfinite(csv_weather[:,0])
+        days = csv_weather[rows,0].astype(int)
+        temperatures = csv_weather[rows,1]
+        if bool_truncate:
+            temperatures = temperatures.astype(int).astype(float)
+
+        order = np.argsort(days, kind = "stable")
+        self.days, counts = np.unique(days, return_counts = True)
+        if (counts != counts[0]).any():
+            raise ValueError("Different number of timesteps per day")
+        self.ts_per_day = int(counts[0])
+        self.temperatures = temperatures[order].reshape(len(self.days),
+                                                        self.ts_per_day)
+
+    def get_rows(self, dates):
+        """ returns rows of temperatures for dates (SPSS day numbers)
+        """
+        dates = np.asarray(dates).astype(int)
+        rows = np.searchsorted(self.days, dates)
+        rows = np.minimum(rows, len(self.days) - 1)
+        if (self.days[rows] != dates).any():
+            raise ValueError("No temperatures for dates: "
+                             + str(dates[self.days[rows] != dates]))
+        return rows
+
+    def get_temperatures(self, dates, start = 0, end = None):
+        """ returns temperatures of all dates (one after another)
+        between start and end timestep
+        """
+        return self.temperatures[self.get_rows(dates)].reshape(-1)[start:end]
+
+    def get_winter_temperatures(self, start = 0, end = None):
+        """ returns temperatures of winter scenario (WINTER_DATES)
+        """
+        return self.get_temperatures(WINTER_DATES, start, end)
+
+    def get_series(self):
+        """ returns temperatures of all days (one after another)
+        """
+        return self.temperatures.reshape(-1)
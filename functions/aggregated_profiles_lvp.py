@@ -12,6 +12,10 @@ import csv
 import os.path
 import matplotlib.pyplot as plt
 from classes.household import Household
+from classes.shared_array import attach_array
+from classes.household_index import HouseholdIndex
+from classes.weather_store import WeatherStore
+from classes.car_segment_index import CarSegmentIndex
 from classes.car import Car
 
 def aggregated_profiles_lvp(households,
@@ -32,7 +36,11 @@ def aggregated_profiles_lvp(households,
                     csv_cars,
                     csv_database_electric_cars,
                     bool_winter = False,
-                    bool_plot = False):
+                    bool_plot = False,
+                    household_index = None,
+                    weather_store = None,
+                    car_segment_index = None,
+                    bool_truncate_temperatures = True):
     """ create_output():
     Creates aggregated profiles
     Args:
@@ -46,7 +54,32 @@ def aggregated_profiles_lvp(households,
     - min_state_of_charge:    min possible state of charge in %, default = 10%
     - max_state_of_charge:    min possible state of charge in %, default = 90%
     - bool_plot:              if true: plots are created, default: False
+    - household_index:        HouseholdIndex of meta_data_all (optional,
+                              created if not given)
+    - weather_store:          WeatherStore of csv_weather (optional,
+                              created if not given)
+    - car_segment_index:      CarSegmentIndex of csv_cars (optional,
+                              created if not given)
+    - bool_truncate_temperatures: if true: temperatures of csv_weather 
+                              are truncated to whole degrees (see 
+                              WeatherStore, only if weather_store is not 
+                              given), default: True
     """
+    # SharedArray handles (shared memory, memory-mapped files) -> arrays
+    meta_data_all = attach_array(meta_data_all)
+    states_all = attach_array(states_all)
+    speeds_all = attach_array(speeds_all)
+    csv_weather = attach_array(csv_weather)
+    csv_cars = attach_array(csv_cars)
+    csv_database_electric_cars = attach_array(csv_database_electric_cars)
+
+    if household_index is None:
+        household_index = HouseholdIndex(meta_data_all)
+    if weather_store is None:
+        weather_store = WeatherStore(
+            csv_weather, bool_truncate = bool_truncate_temperatures)
+    if car_segment_index is None:
+        car_segment_index = CarSegmentIndex(csv_cars)
 
     # create profiles for all of the following hosueholds:
     households_profiles = households    # result from rank_households
@@ -61,19 +94,13 @@ def aggregated_profiles_lvp(households,
         ID = households_profiles[i]    # Id of current HH
 
         # indices of household in data set
-        positions = np.where(meta_data_all[:,0] == ID)[0]
+        positions = household_index.get_positions(ID)
+        rows = household_index.get_rows(ID)
 
-        # meta data of all household members
-        meta_data = meta_data_all.astype(int)[np.where(meta_data_all[:,0] == ID)]
-
-        # states of all household members
-        for i in positions:
-            states = states_all[positions, 0 : no_of_ts]
-
-        # speeds of all household members
-        for i in positions:
-            speeds = speeds_all[positions, 0 : no_of_ts]
-            states = states_all[positions, 0 : no_of_ts]
+        # meta data, states and speeds of all household members
+        meta_data = household_index.get_meta_data(ID)
+        states = states_all[rows, 0 : no_of_ts]
+        speeds = speeds_all[rows, 0 : no_of_ts]
 
         # create new Household object
         household = Household(positions, 
@@ -84,43 +111,29 @@ def aggregated_profiles_lvp(households,
                               ts_length)
         
         # create states_profiles and speed_profiles for each car in household
-        states_profiles = household.generate_mobility_states_profiles(start, end)
+        states_profiles, speeds_profiles = household.generate_mobility_profiles(
+            start, end)
 
         # swap all "0" to "8"
         states_profiles = np.where(states_profiles == 8, 8,
                               np.where(states_profiles == 1, 1, 
                                        np.where(states_profiles == 2, 2,
                                                 np.where(states_profiles == 14, 14, 8))))
-                              
-        speeds_profiles = household.generate_mobility_speeds_profiles(start, end)
 
-        dates = household.dates
-        dates_winter = np.array([20837,20838,20839,20840,20841,20842,20843])
-        temperatures = []
         # create array with all temperatures in observation period
         if (bool_winter == True):
-            for i in dates_qinter:
-                x = np.where(csv_weather[:,0] == i)
-                temperatures.append(csv_weather[x,1].astype(int)[0])
-            result = np.concatenate(temperatures[0:7])
-            temperature_array = result[start:end].astype(float)
+            temperature_array = weather_store.get_winter_temperatures(start, 
+                                                                      end)
         else:
-            for i in dates:
-                x = np.where(csv_weather[:,0] == i)
-                temperatures.append(csv_weather[x,1].astype(int)[0])
-            result = np.concatenate(temperatures[0:7])
-            temperature_array = result[start:end].astype(float)
+            temperature_array = weather_store.get_temperatures(household.dates, 
+                                                               start, 
+                                                               end)
 
         # create Car objects for real dates
         for j in range(0, len(states_profiles)):
           
-            # get car segment
-            cars = csv_cars[np.where(csv_cars[:,0] == household.household_ID)]
-            segment = cars[j : j + 1 , 174]
-            if segment not in range(1, 14):  # if no segment is given, set 3
-                segment = 3
-            else:
-                segment = segment.astype(int)
+            # get car segment (if no segment is given: 3)
+            segment = car_segment_index.get_segment(household.household_ID, j)
 
             car = Car(states_profiles[j], # only profiles for car j
                       speeds_profiles[j],  
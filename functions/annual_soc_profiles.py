@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""annual_soc_profiles.py
+
+Streaming simulation of long horizons (e.g. one year) in week-sized chunks.
+"""
+
+import numpy as np
+from classes.household import Household
+from classes.shared_array import attach_array
+from classes.household_index import HouseholdIndex
+from classes.weather_store import WeatherStore
+from classes.car_segment_index import CarSegmentIndex
+from classes.car import Car
+
+
+def chunk_car(states_profile,
+              speeds_profile,
+              temperatures_all,
+              segment,
+              first,
+              chunk_length,
+              offset,
+              csv_database_electric_cars,
+              min_charge,
+              max_charge,
+              ts_length):
+    """ returns Car object and length of chunk starting at first
+    - mobility: repeated mobility profile, first timestep of horizon is 
+      timestep offset of mobility profile
+    - temperatures: timesteps of chunk in temperatures_all
+    - segment: initial car segment (charging power of car)
+    """
+    length = min(chunk_length, len(temperatures_all) - first)
+    week = (offset + first + np.arange(length)) % len(states_profile)
+    car = Car(states_profile[week],
+              speeds_profile[week],
+              temperatures_all[first : first + length],
+              segment,
+              csv_database_electric_cars,
+              min_charge,
+              max_charge,
+              ts_length)
+    return car, length
+
+
+def find_segment(states_profile,
+                 speeds_profile,
+                 temperatures_all,
+                 segment,
+                 chunk_length,
+                 offset,
+                 strategy_args,
+                 csv_database_electric_cars,
+                 min_charge,
+                 max_charge,
+                 ts_length):
+    """ returns lowest segment that is feasible for the whole horizon
+    (segments 1-5 can be increased up to segment 6) and feasible
+    - max strategy of all candidate segments is checked chunk by chunk 
+      in one call per chunk (Car.get_segment_feasibility()), state of 
+      charge is carried per segment
+    - segments with state of charge below min are dropped
+    - strategy_args: home/work charging power, charging/discharging 
+      efficiency
+    """
+    initial_segment = int(np.ravel(segment)[0])
+    if initial_segment in [1,2,3,4,5,6]:
+        segments = np.arange(initial_segment, 7)
+    else:
+        segments = np.array([initial_segment])
+    highest_segment = int(segments[-1])
+
+    state_of_charge = None      # first chunk: max soc of every segment
+    for first in range(0, len(temperatures_all), chunk_length):
+        car, length = chunk_car(states_profile,
+                                speeds_profile,
+                                temperatures_all,
+                                segment,
+                                first,
+                                chunk_length,
+                                offset,
+                                csv_database_electric_cars,
+                                min_charge,
+                                max_charge,
+                                ts_length)
+        feasible, state_of_charge = car.get_segment_feasibility(
+            0,
+            length,
+            *strategy_args,
+            segments,
+            state_of_charge,
+            False)
+        if not feasible.any():
+            return highest_segment, False
+        segments = segments[feasible]
+        state_of_charge = state_of_charge[feasible]
+    return int(segments[0]), True
+
+
+def max_chunks(states_profile,
+               speeds_profile,
+               temperatures_all,
+               segment,
+               current_segment,
+               feasible,
+               chunk_length,
+               offset,
+               strategy_args,
+               csv_database_electric_cars,
+               min_charge,
+               max_charge,
+               ts_length,
+               sink,
+               ID,
+               car_number):
+    """ max strategy: chunks forward with current_segment, state of 
+    charge at end of chunk is carried, every chunk is passed to sink
+    """
+    state_of_charge = None      # first chunk: max soc
+    for first in range(0, len(temperatures_all), chunk_length):
+        car, length = chunk_car(states_profile,
+                                speeds_profile,
+                                temperatures_all,
+                                segment,
+                                first,
+                                chunk_length,
+                                offset,
+                                csv_database_electric_cars,
+                                min_charge,
+                                max_charge,
+                                ts_length)
+        car.set_segment(current_segment)
+        profiles = car.max_profile_generation(0,
+                                              length,
+                                              *strategy_args,
+                                              state_of_charge)
+        state_of_charge = profiles[0][-1]
+        sink(ID, car_number, "max", first, profiles, current_segment, 
+             feasible)
+
+
+def min_chunks(states_profile,
+               speeds_profile,
+               temperatures_all,
+               segment,
+               current_segment,
+               feasible,
+               chunk_length,
+               offset,
+               strategy_args,
+               csv_database_electric_cars,
+               min_charge,
+               max_charge,
+               ts_length,
+               sink,
+               ID,
+               car_number):
+    """ min strategy: chunks backward with current_segment, state of 
+    charge required before first timestep of chunk is carried 
+    (Car.just_in_time_profile()), every chunk is passed to sink
+    """
+    state_of_charge = None      # last chunk: min soc
+    for first in reversed(range(0, len(temperatures_all), chunk_length)):
+        car, length = chunk_car(states_profile,
+                                speeds_profile,
+                                temperatures_all,
+                                segment,
+                                first,
+                                chunk_length,
+                                offset,
+                                csv_database_electric_cars,
+                                min_charge,
+                                max_charge,
+                                ts_length)
+        car.set_segment(current_segment)
+        profiles = car.just_in_time_profile(0,
+                                            length,
+                                            *strategy_args,
+                                            state_of_charge)
+        state_of_charge = car.required_state_of_charge
+        sink(ID, car_number, "min", first, profiles, current_segment, 
+             feasible)
+
+
+def annual_soc_profiles(households,
+                        meta_data_all,
+                        states_all,
+                        speeds_all,
+                        no_of_ts,
+                        ts_length,
+                        home_charging_power,
+                        work_charging_power,
+                        charging_efficiency,
+                        discharging_efficiency,
+                        min_charge,
+                        max_charge,
+                        csv_weather,
+                        csv_cars,
+                        csv_database_electric_cars,
+                        sink,
+                        chunk_length = None,
+                        household_index = None,
+                        weather_store = None,
+                        car_segment_index = None,
+                        bool_truncate_temperatures = True):
+    """ annual_soc_profiles():
+    Creates profiles of all household cars for the whole horizon of the
+    weather file (e.g. 52,560 timesteps for one year) chunk by chunk.
+    The mobility profile (one week) is repeated over the whole horizon,
+    aligned to weekdays: the first day of the weather file gets the
+    mobility of the same weekday (dates of household). The temperatures 
+    are taken from the weather file in day order.
+    Only one chunk per car is kept in memory, every chunk is passed to sink:
+        sink(household ID, car number, strategy ("max"/"min"),
+             first timestep of chunk, profiles (7 profiles, see
+             Car.max_profile_generation()), segment, feasible)
+    State carried across chunk boundaries:
+        - max strategy (chunks forward): state of charge at end of chunk
+        - min strategy (chunks backward, final segment of max strategy):
+          state of charge required before first timestep of chunk
+          (just in time charging, see Car.just_in_time_profile())
+    Car segment: lowest segment that is feasible for the whole horizon
+    (see Car.max_state_of_charge_profile()), found with a first pass of
+    the max strategy for all candidate segments at once without sink 
+    (find_segment()), so profiles do not depend on chunk_length.
+    Args:
+    - *IDs:                   hh ID or list of household IDs (if multiple)
+    - no_of_ts:               number of timesteps of mobility profile
+    - home_charging_power:    power of home charging station [kW]
+    - work_charging_power:    power of work charging station [kW]
+    - charging_efficiency:    efficiency of charging
+    - discharging_efficiency: efficiency of discharging
+    - min_charge:             min possible state of charge in %
+    - max_charge:             max possible state of charge in %
+    - sink:                   function called for every chunk
+    - chunk_length:           timesteps per chunk (positive), default: 
+                              no_of_ts
+    - household_index:        HouseholdIndex of meta_data_all (optional,
+                              created if not given)
+    - weather_store:          WeatherStore of csv_weather (optional,
+                              created if not given)
+    - car_segment_index:      CarSegmentIndex of csv_cars (optional,
+                              created if not given)
+    - bool_truncate_temperatures: if true: temperatures of csv_weather 
+                              are truncated to whole degrees (see 
+                              WeatherStore, only if weather_store is not 
+                              given), default: True
+    Returns list of (household ID, car number, final segment, feasible)
+    """
+    # SharedArray handles (shared memory, memory-mapped files) -> arrays
+    meta_data_all = attach_array(meta_data_all)
+    states_all = attach_array(states_all)
+    speeds_all = attach_array(speeds_all)
+    csv_weather = attach_array(csv_weather)
+    csv_cars = attach_array(csv_cars)
+    csv_database_electric_cars = attach_array(csv_database_electric_cars)
+
+    if household_index is None:
+        household_index = HouseholdIndex(meta_data_all)
+    if weather_store is None:
+        weather_store = WeatherStore(
+            csv_weather, bool_truncate = bool_truncate_temperatures)
+    if car_segment_index is None:
+        car_segment_index = CarSegmentIndex(csv_cars)
+
+    if chunk_length is None:
+        chunk_length = no_of_ts
+    if not chunk_length > 0:
+        raise ValueError("chunk_length must be positive")
+
+    # temperatures of whole horizon (all days of weather store)
+    temperatures_all = weather_store.get_series()
+    strategy_args = (home_charging_power,
+                     work_charging_power,
+                     charging_efficiency,
+                     discharging_efficiency)
+
+    results = []
+    for i in range(0, len(households)):
+        ID = households[i]    # Id of current HH
+
+        # indices of household in data set
+        positions = household_index.get_positions(ID)
+        rows = household_index.get_rows(ID)
+
+        # meta data, states and speeds of all household members
+        meta_data = household_index.get_meta_data(ID)
+        states = states_all[rows, 0 : no_of_ts]
+        speeds = speeds_all[rows, 0 : no_of_ts]
+
+        # create new Household object
+        household = Household(positions,
+                              meta_data,
+                              states,
+                              speeds,
+                              no_of_ts,
+                              ts_length)
+
+        # create states_profiles and speed_profiles for each car in household
+        states_profiles, speeds_profiles = household.generate_mobility_profiles(
+            0, no_of_ts)
+
+        # swap all "0" to "8"
+        states_profiles = np.where(states_profiles == 8, 8,
+                              np.where(states_profiles == 1, 1,
+                                       np.where(states_profiles == 2, 2,
+                                                np.where(states_profiles == 14, 14, 8))))
+
+        # first timestep of horizon: same weekday in mobility profile
+        offset = (int(weather_store.days[0] - household.dates[0]) % 7
+                  * weather_store.ts_per_day)
+
+        for j in range(0, len(states_profiles)):
+
+            # get car segment (if no segment is given: 3)
+            segment = car_segment_index.get_segment(household.household_ID, j)
+            car_args = (states_profiles[j],
+                        speeds_profiles[j],
+                        temperatures_all,
+                        segment)
+            chunk_args = (chunk_length,
+                          offset,
+                          strategy_args,
+                          csv_database_electric_cars,
+                          min_charge,
+                          max_charge,
+                          ts_length)
+
+            # lowest feasible segment for whole horizon, then profiles
+            current_segment, feasible = find_segment(*car_args, 
+                                                     *chunk_args)
+            max_chunks(*car_args, current_segment, feasible, *chunk_args, 
+                       sink, household.household_ID, j + 1)
+            min_chunks(*car_args, current_segment, feasible, *chunk_args, 
+                       sink, household.household_ID, j + 1)
+
+            results.append((household.household_ID, j + 1, current_segment,
+                            feasible))
+    return results
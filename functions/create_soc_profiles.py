@@ -5,13 +5,25 @@ Automatically generated by Colaboratory.
 
 Original file is located at
     https://colab.research.google.com/drive/1AHMJmODSjT3HPFaWj4GmJVffHn_cgzHm
+
+create_soc_profiles() returns one result per household (final segment and
+feasibility of every car, warnings) in sequential and parallel mode.
 """
 
+import io
+import contextlib
 import numpy as np
 import csv
 import os.path
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from classes.household import Household
+from classes.household_index import HouseholdIndex
+from classes.weather_store import WeatherStore
+from classes.car_segment_index import CarSegmentIndex
+from classes.shared_array import attach_array
+from classes.profile_store import (ProfileStore, profile_csv_file, 
+                                   write_profile_csv)
 from classes.car import Car
 
 def create_soc_profiles(households,
@@ -33,7 +45,15 @@ def create_soc_profiles(households,
                     csv_database_electric_cars,
                     path,
                     bool_plot = False,
-                    bool_create_csv = False):
+                    bool_create_csv = False,
+                    household_index = None,
+                    weather_store = None,
+                    car_segment_index = None,
+                    processes = None,
+                    chunk_size = 1,
+                    store_file = None,
+                    store_dtype = np.float64,
+                    bool_truncate_temperatures = True):
     """ create_soc_profiles():
     Creates csv.-files with profiles for each car according
       to input parameters and saves them.
@@ -58,239 +78,382 @@ def create_soc_profiles(households,
     - path:                   path to folder for csv.-file creation
     - bool_plot:              if true: plots are created, default: False
     - bool_create_csv:        if true: csv-files are created, default: False
+    - household_index:        HouseholdIndex of meta_data_all (optional,
+                              created if not given)
+    - weather_store:          WeatherStore of csv_weather (optional,
+                              created if not given)
+    - car_segment_index:      CarSegmentIndex of csv_cars (optional,
+                              created if not given)
+    - processes:              number of worker processes (parallel mode),
+                              default: None (sequential)
+    - chunk_size:             households per task of a worker, default: 1
+    - store_file:             if given: profiles of all cars are saved to 
+                              one .npz-file (see ProfileStore, csv.-files 
+                              can be exported with export_csv()),
+                              default: None
+    - store_dtype:            dtype of profiles in store_file,
+                              default: float64
+    - bool_truncate_temperatures: if true: temperatures of csv_weather 
+                              are truncated to whole degrees (see 
+                              WeatherStore, only if weather_store is not 
+                              given), default: True
+    - *_all, csv_*:           arrays or SharedArray handles (see 
+                              share_arrays(), recommended for parallel mode)
+    Returns list with one result per household (same order as households,
+    see household_soc_profiles()): cars (car number, final segment, 
+    feasible) and warnings (segment adjustment, generation not possible),
+    same in sequential and parallel mode
     """
+    if household_index is None:
+        household_index = HouseholdIndex(attach_array(meta_data_all))
+    if weather_store is None:
+        weather_store = WeatherStore(
+            attach_array(csv_weather),
+            bool_truncate = bool_truncate_temperatures)
+    if car_segment_index is None:
+        car_segment_index = CarSegmentIndex(attach_array(csv_cars))
+
+    if bool_plot and (processes is not None):
+        raise ValueError("Plots are not possible in parallel mode")
+
+    # arguments of household_soc_profiles() (same for all households)
+    arguments = {"states_all": states_all,
+                 "speeds_all": speeds_all,
+                 "start": start,
+                 "end": end,
+                 "no_of_ts": no_of_ts,
+                 "ts_length": ts_length,
+                 "home_charging_power": home_charging_power,
+                 "work_charging_power": work_charging_power,
+                 "charging_efficiency": charging_efficiency,
+                 "discharging_efficiency": discharging_efficiency,
+                 "min_charge": min_charge,
+                 "max_charge": max_charge,
+                 "weather_store": weather_store,
+                 "car_segment_index": car_segment_index,
+                 "csv_database_electric_cars": csv_database_electric_cars,
+                 "path": path,
+                 "bool_plot": bool_plot,
+                 "bool_create_csv": bool_create_csv,
+                 "bool_store_profiles": store_file is not None,
+                 "household_index": household_index}
 
     # create profiles for all of the following hosueholds:
     households_profiles = households    # result from rank_households
 
-    # create household objects
-    for i in range(0, len(households)):
-        ID = households_profiles[i]    # Id of current HH
-        print("\n")
-        print("Household:", ID)
-
-        # indices of household in data set
-        positions = np.where(meta_data_all[:,0] == ID)[0]
-
-        # meta data of all household members
-        meta_data = meta_data_all.astype(int)[np.where(meta_data_all[:,0] == ID)]
-
-        # states of all household members
-        for i in positions:
-            states = states_all[positions, 0 : no_of_ts]
-
-        # speeds of all household members
-        for i in positions:
-            speeds = speeds_all[positions, 0 : no_of_ts]
-            states = states_all[positions, 0 : no_of_ts]
-
-        # create new Household object
-        household = Household(positions, 
-                              meta_data, 
-                              states, 
-                              speeds, 
-                              no_of_ts, 
-                              ts_length)
-        
-        # create states_profiles and speed_profiles for each car in household
-        states_profiles = household.generate_mobility_states_profiles(start, end)
-
-        # swap all "0" to "8"
-        states_profiles = np.where(states_profiles == 8, 8,
-                              np.where(states_profiles == 1, 1, 
-                                       np.where(states_profiles == 2, 2,
-                                                np.where(states_profiles == 14, 14, 8))))
-        
-
-        speeds_profiles = household.generate_mobility_speeds_profiles(start, end)
-
-        # get temperatures for correct dates from csv.-file
-        dates = household.dates
-        temperatures = []
-        for i in dates:
-            x = np.where(csv_weather[:,0]==i)
-            temperatures.append(csv_weather[x,1].astype(int)[0])
-            result = np.concatenate(temperatures[0:7])
-            weather_consumption = result[start:end].astype(float)   
-
-        # create Car objects
-        for j in range(0, len(states_profiles)):
-          
-            # get car segment
-            cars = csv_cars[np.where(csv_cars[:,0] == household.household_ID)]
-            segment = cars[j : j + 1 , 174]
-            if segment not in range(1, 14):  # if no segment is given, set 3
-                segment = 3
-            else:
-                segment = segment.astype(int)
-
-            car = Car(states_profiles[j], # only profiles for ith car
-                      speeds_profiles[j],  
-                      weather_consumption,
-                      segment,
-                      csv_database_electric_cars,
-                      min_charge, 
-                      max_charge,
-                      ts_length)
-            
-            print("Car:", j + 1)
-            print("Segment:", segment)
-
-            # Create profiles:
-            # max_states_of_charge_profile() has to run first because of 
-            # possible car segment adjustment
-            max_strategy = car.max_state_of_charge_profile(start, 
-                                                           end, 
-                                                           home_charging_power, 
-                                                           work_charging_power, 
-                                                           charging_efficiency, 
-                                                           discharging_efficiency)
-            
-            min_strategy = car.min_state_of_charge_profile(start, 
-                                                           end, 
-                                                           home_charging_power, 
-                                                           work_charging_power, 
-                                                           charging_efficiency, 
-                                                           discharging_efficiency)
-            
-            charging_pwr_profile = car.get_charging_power(start, 
-                                                          end, 
-                                                          home_charging_power, 
-                                                          work_charging_power)
-            
-            consumption_profile = car.generate_consumption_profile(start, end)
-
-            states = car.states
-            states = np.where(states == 8, 8,
-                              np.where(states == 1, 1, 
-                                       np.where(states == 2, 2,
-                                                np.where(states == 14, 14, 0))))
-
-            if max_strategy:     # if array not empty -> generation possible
-                max_state_of_charge_profile = max_strategy[0]
-                max_charge_profile = max_strategy[1]
-                max_home_profile = max_strategy[2]
-                max_work_profile = max_strategy[3]
-
-                min_state_of_charge_profile = min_strategy[0]
-                min_charge_profile = min_strategy[1]
-                min_home_profile = min_strategy[2]
-                min_work_profile = min_strategy[3]
-
-                print("\nOverall energy demand, Household", 
-                      household.household_ID, ", Car",
-                      j + 1, "[kWh]:", sum(consumption_profile))
-                print("\nHome energy demand max strategy, Household", 
-                      household.household_ID, ", Car",
-                      j + 1, "[kWh]:", sum(max_home_profile))
-                print("\nWork energy demand max strategy, Household", 
-                      household.household_ID, ", Car", 
-                      j + 1, "[kWh]:", sum(max_work_profile))
-                print("\nHome energy demand min strategy, Household", 
-                      household.household_ID, ", Car", 
-                      j + 1, "[kWh]:", sum(min_home_profile))
-                print("\nWork energy demand min strategy, Household", 
-                     household.household_ID, ", Car", 
-                      j + 1, "[kWh]:", sum(min_work_profile))
+    if processes is None:
+        arguments = {key: attach_array(value) 
+                     for key, value in arguments.items()}
+        results = [household_soc_profiles(ID, **arguments) 
+                   for ID in households_profiles]
+        return store_profiles(results, end-start, store_file, store_dtype)
+
+    # parallel mode: households are distributed to worker processes in 
+    # chunks, results (and printed output) keep order of households
+    # (SharedArray handles are sent to workers instead of arrays, workers
+    # attach to shared memory/memory-mapped files without copies)
+    results = []
+    with ProcessPoolExecutor(max_workers = processes,
+                             initializer = init_worker,
+                             initargs = (arguments,)) as pool:
+        for result, output in pool.map(household_worker,
+                                       households_profiles,
+                                       chunksize = chunk_size):
+            print(output, end = "")
+            results.append(result)
+    return store_profiles(results, end-start, store_file, store_dtype)
+
+
+def store_profiles(results, no_of_ts, store_file, store_dtype):
+    """ saves profiles of results to store_file (if given) and removes
+    them from results, returns results
+    """
+    if store_file is None:
+        return results
+    ProfileStore.from_results(results, no_of_ts, store_dtype).save(store_file)
+    for result in results:
+        for car in result["cars"]:
+            del car["profiles"]
+    return results
+
+
+# arguments of household_soc_profiles() in worker process (init_worker())
+worker_arguments = {}
+
+
+def init_worker(arguments):
+    """ stores arguments of household_soc_profiles() in worker process
+    (arguments are sent once per worker, not once per household,
+    SharedArray handles are attached)
+    """
+    worker_arguments.update({key: attach_array(value) 
+                             for key, value in arguments.items()})
+
+
+def household_worker(ID):
+    """ creates profiles of household ID in worker process
+    returns result of household_soc_profiles() and printed output
+    """
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = household_soc_profiles(ID, **worker_arguments)
+    return result, output.getvalue()
+
+
+def household_soc_profiles(ID,
+                           states_all,
+                           speeds_all,
+                           start,
+                           end,
+                           no_of_ts,
+                           ts_length,
+                           home_charging_power,
+                           work_charging_power,
+                           charging_efficiency,
+                           discharging_efficiency,
+                           min_charge,
+                           max_charge,
+                           weather_store,
+                           car_segment_index,
+                           csv_database_electric_cars,
+                           path,
+                           bool_plot,
+                           bool_create_csv,
+                           household_index,
+                           bool_store_profiles = False):
+    """ household_soc_profiles():
+    Creates profiles (and csv.-files, plots) for all cars of household ID
+    (see create_soc_profiles() for Args)
+    Returns dict with:
+    - household_ID
+    - cars:                   list with car number, final segment and 
+                              feasible for each car
+    - warnings:               list of warnings (segment adjustment, 
+                              profile generation not possible)
+    (if bool_store_profiles: profiles of each car (timesteps x 
+    PROFILE_COLUMNS, None if not feasible) in cars)
+    """
+    print("\n")
+    print("Household:", ID)
+    household_result = {"household_ID": ID, "cars": [], "warnings": []}
+
+    # indices of household in data set
+    positions = household_index.get_positions(ID)
+    rows = household_index.get_rows(ID)
+
+    # meta data, states and speeds of all household members
+    meta_data = household_index.get_meta_data(ID)
+    states = states_all[rows, 0 : no_of_ts]
+    speeds = speeds_all[rows, 0 : no_of_ts]
+
+    # create new Household object
+    household = Household(positions, 
+                          meta_data, 
+                          states, 
+                          speeds, 
+                          no_of_ts, 
+                          ts_length)
+
+    # create states_profiles and speed_profiles for each car in household
+    states_profiles, speeds_profiles = household.generate_mobility_profiles(
+        start, end)
+
+    # swap all "0" to "8"
+    states_profiles = np.where(states_profiles == 8, 8,
+                          np.where(states_profiles == 1, 1, 
+                                   np.where(states_profiles == 2, 2,
+                                            np.where(states_profiles == 14, 14, 8))))
+
+
+    # get temperatures for correct dates from weather store
+    weather_consumption = weather_store.get_temperatures(household.dates, 
+                                                         start, 
+                                                         end)
+
+    # create Car objects
+    for j in range(0, len(states_profiles)):
+
+        # get car segment (if no segment is given: 3)
+        segment = car_segment_index.get_segment(household.household_ID, j)
+
+        car = Car(states_profiles[j], # only profiles for ith car
+                  speeds_profiles[j],  
+                  weather_consumption,
+                  segment,
+                  csv_database_electric_cars,
+                  min_charge, 
+                  max_charge,
+                  ts_length)
+
+        print("Car:", j + 1)
+        print("Segment:", segment)
+
+        # Create profiles:
+        # max_states_of_charge_profile() has to run first because of 
+        # possible car segment adjustment
+        max_strategy = car.max_state_of_charge_profile(start, 
+                                                       end, 
+                                                       home_charging_power, 
+                                                       work_charging_power, 
+                                                       charging_efficiency, 
+                                                       discharging_efficiency)
+
+        min_strategy = car.min_state_of_charge_profile(start, 
+                                                       end, 
+                                                       home_charging_power, 
+                                                       work_charging_power, 
+                                                       charging_efficiency, 
+                                                       discharging_efficiency)
+
+        # feasibility and segment adjustment of car
+        final_segment = int(np.ravel(car.segment)[0])
+        car_result = {"car": j + 1,
+                      "segment": final_segment,
+                      "feasible": bool(max_strategy)}
+        if bool_store_profiles:
+            car_result["profiles"] = None
+        household_result["cars"].append(car_result)
+        if final_segment != int(np.ravel(segment)[0]):
+            household_result["warnings"].append(
+                "Car " + str(j + 1) + ": Battery Capacity of car not "
+                "high enough. Segment is adjusted to segment: " 
+                + str(final_segment))
+        if not max_strategy:
+            household_result["warnings"].append(
+                "Car " + str(j + 1) + ": Profile generation not "
+                "possible. Capacity too low.")
+
+        charging_pwr_profile = car.get_charging_power(start, 
+                                                      end, 
+                                                      home_charging_power, 
+                                                      work_charging_power)
+
+        consumption_profile = car.generate_consumption_profile(start, end)
+
+        states = car.states
+        states = np.where(states == 8, 8,
+                          np.where(states == 1, 1, 
+                                   np.where(states == 2, 2,
+                                            np.where(states == 14, 14, 0))))
+
+        if max_strategy:     # if array not empty -> generation possible
+            max_state_of_charge_profile = max_strategy[0]
+            max_charge_profile = max_strategy[1]
+            max_home_profile = max_strategy[2]
+            max_work_profile = max_strategy[3]
+
+            min_state_of_charge_profile = min_strategy[0]
+            min_charge_profile = min_strategy[1]
+            min_home_profile = min_strategy[2]
+            min_work_profile = min_strategy[3]
+
+            print("\nOverall energy demand, Household", 
+                  household.household_ID, ", Car",
+                  j + 1, "[kWh]:", sum(consumption_profile))
+            print("\nHome energy demand max strategy, Household", 
+                  household.household_ID, ", Car",
+                  j + 1, "[kWh]:", sum(max_home_profile))
+            print("\nWork energy demand max strategy, Household", 
+                  household.household_ID, ", Car", 
+                  j + 1, "[kWh]:", sum(max_work_profile))
+            print("\nHome energy demand min strategy, Household", 
+                  household.household_ID, ", Car", 
+                  j + 1, "[kWh]:", sum(min_home_profile))
+            print("\nWork energy demand min strategy, Household", 
+                 household.household_ID, ", Car", 
+                  j + 1, "[kWh]:", sum(min_work_profile))
+            print("\n")
+
+            if bool_plot == True:
+                figure_title = ("\nLadeprofil Haushalt " 
+                                + str (household.household_ID) 
+                                + " - Fahrzeug " 
+                                + str (j + 1) 
+                                + ":")
+                plt.figure()
+
+                ## plot lines:
+                plt.plot(max_state_of_charge_profile, 
+                         label = "Ladestand Max Strategie")
+                plt.plot(min_state_of_charge_profile, 
+                         label = "Ladestand Min Strategie")
+                plt.hlines(car.capacity, 0, end-start-1, "black", 
+                           label = "Batteriekapazität")
+                plt.hlines(0, 0, end-start-1, "black")
+
+                plt.hlines(car.capacity * max_charge, 0, end-start-1, "red", 
+                           label = "Kapazitätsbeschränkung", alpha = 0.5)
+                plt.hlines(car.capacity * min_charge, 0, end-start-1, "red", alpha = 0.5)
+
+                plt.xlabel("Zeitintervall (Länge: 10 min.)")
+                plt.ylabel("Ladestand [kWh]")
+                plt.tight_layout()
+
+                ## background colors:
+
+                driving = (states == 14)
+                # for correct plot: include start of timestep (i-1)
+                for i in range(0, len(driving)):
+                    if driving[i] == True:
+                        if i == 0:
+                            pass
+                        else:
+                            driving[i-1] = True
+
+                plt.fill_between(range(0, len(states)), car.capacity, 0, 
+                                 color = 'red', alpha = 0.1, 
+                                 where = driving, label = "Fahren")
+
+                home = (states == 8)
+                # for correct plot: include start of timestep (i-1)
+                for i in range(0, len(home)):
+                    if home[i] == True:
+                        if i == 0:
+                            pass
+                        else:
+                            home[i-1] = True
+
+                plt.fill_between(range(0, len(states)), car.capacity, 0, 
+                                 color = 'lawngreen', alpha = 0.1, 
+                                 where = home, label = "zu Hause")
+
+                work = np.where(states == 1, True, 
+                                np.where(states == 2, True, False))
+                # for correct plot: include start of timestep (i-1)
+                for i in range(0, len(work)):
+                    if work[i] == True:
+                        if i == 0:
+                            pass
+                        else:
+                            work[i-1] = True
+                plt.fill_between(range(0, len(states)), car.capacity, 0, 
+                                 color = 'darkgreen', alpha = 0.1, 
+                                 where = work, label = "Arbeit")
+
+                plt.legend(bbox_to_anchor = (1.05, 1), loc = 'upper left')
+                plt.title(figure_title)
+                plt.show()
+                #plt.savefig("...", bbox_inches='tight')
+                plt.close()
                 print("\n")
 
-                if bool_plot == True:
-                    figure_title = ("\nLadeprofil Haushalt " 
-                                    + str (household.household_ID) 
-                                    + " - Fahrzeug " 
-                                    + str (j + 1) 
-                                    + ":")
-                    plt.figure()
-
-                    ## plot lines:
-                    plt.plot(max_state_of_charge_profile, 
-                             label = "Ladestand Max Strategie")
-                    plt.plot(min_state_of_charge_profile, 
-                             label = "Ladestand Min Strategie")
-                    plt.hlines(car.capacity, 0, end-start-1, "black", 
-                               label = "Batteriekapazität")
-                    plt.hlines(0, 0, end-start-1, "black")
-
-                    plt.hlines(car.capacity * max_charge, 0, end-start-1, "red", 
-                               label = "Kapazitätsbeschränkung", alpha = 0.5)
-                    plt.hlines(car.capacity * min_charge, 0, end-start-1, "red", alpha = 0.5)
-
-                    plt.xlabel("Zeitintervall (Länge: 10 min.)")
-                    plt.ylabel("Ladestand [kWh]")
-                    plt.tight_layout()
-
-                    ## background colors:
-
-                    driving = (states == 14)
-                    # for correct plot: include start of timestep (i-1)
-                    for i in range(0, len(driving)):
-                        if driving[i] == True:
-                            if i == 0:
-                                pass
-                            else:
-                                driving[i-1] = True
-
-                    plt.fill_between(range(0, len(states)), car.capacity, 0, 
-                                     color = 'red', alpha = 0.1, 
-                                     where = driving, label = "Fahren")
-
-                    home = (states == 8)
-                    # for correct plot: include start of timestep (i-1)
-                    for i in range(0, len(home)):
-                        if home[i] == True:
-                            if i == 0:
-                                pass
-                            else:
-                                home[i-1] = True
-                        
-                    plt.fill_between(range(0, len(states)), car.capacity, 0, 
-                                     color = 'lawngreen', alpha = 0.1, 
-                                     where = home, label = "zu Hause")
- 
-                    work = np.where(states == 1, True, 
-                                    np.where(states == 2, True, False))
-                    # for correct plot: include start of timestep (i-1)
-                    for i in range(0, len(work)):
-                        if work[i] == True:
-                            if i == 0:
-                                pass
-                            else:
-                                work[i-1] = True
-                    plt.fill_between(range(0, len(states)), car.capacity, 0, 
-                                     color = 'darkgreen', alpha = 0.1, 
-                                     where = work, label = "Arbeit")
- 
-                    plt.legend(bbox_to_anchor = (1.05, 1), loc = 'upper left')
-                    plt.title(figure_title)
-                    plt.show()
-                    #plt.savefig("...", bbox_inches='tight')
-                    plt.close()
-                    print("\n")
-            
-                if bool_create_csv == True:
-                    path_file = os.path.join(path,
-                                             'SOC_profile_ID_' 
-                                             + str (household.household_ID) 
-                                             + '_car_nr_' 
-                                             + str (j + 1) + '.csv')
-                    np.savetxt(path_file, 
-                               np.column_stack((consumption_profile,
-                                                charging_pwr_profile,
-                                                max_state_of_charge_profile,
-                                                max_charge_profile,
-                                                max_home_profile,
-                                                max_work_profile,
-                                                min_state_of_charge_profile,
-                                                min_charge_profile,
-                                                min_home_profile,
-                                                min_work_profile,
-                                                states)),
-                                delimiter=";",
-                                encoding = "ISO-8859-1",
-                                fmt="%1.2f",
-                                header='Consumption;Possible Charging power;'\
-                                'State-of-charge MAX;Charging energy MAX;'\
-                                'Home demand MAX;Work demand MAX;'\
-                                'State-of-charge MIN;Charging energy MIN;'\
-                                'Home demand MIN;Work demand MIN;States',
-                                comments='')
\ No newline at end of file
+            profiles = np.column_stack((consumption_profile,
+                                        charging_pwr_profile,
+                                        max_state_of_charge_profile,
+                                        max_charge_profile,
+                                        max_home_profile,
+                                        max_work_profile,
+                                        min_state_of_charge_profile,
+                                        min_charge_profile,
+                                        min_home_profile,
+                                        min_work_profile,
+                                        states))
+            if bool_store_profiles:
+                car_result["profiles"] = profiles
+
+            if bool_create_csv == True:
+                write_profile_csv(profile_csv_file(path, 
+                                                   household.household_ID, 
+                                                   j + 1),
+                                  profiles)
+
+    return household_result
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""household_feature_table.py
+
+Household features persisted on disk (keyed by hash of input data).
+"""
+
+import hashlib
+import os.path
+import numpy as np
+from classes.shared_array import attach_array
+from classes.household_index import HouseholdIndex
+from functions.household_features import household_features, FEATURES
+
+
+def feature_table_key(meta_data_all,
+                      states_all,
+                      speeds_all,
+                      no_of_ts,
+                      ts_length):
+    """ returns hash (hex) of all inputs of household_features()
+    """
+    key = hashlib.sha1()
+    key.update(repr((no_of_ts, ts_length)).encode())
+    for array in [meta_data_all,
+                  states_all[:, 0 : no_of_ts],
+                  speeds_all[:, 0 : no_of_ts]]:
+        array = np.ascontiguousarray(array)
+        key.update(repr((array.dtype.str, array.shape)).encode())
+        key.update(array.tobytes())
+    return key.hexdigest()
+
+
+def household_feature_table(meta_data_all,
+                            states_all,
+                            speeds_all,
+                            no_of_ts,
+                            ts_length,
+                            path,
+                            household_index = None):
+    """ household_feature_table():
+    Returns features of all households (see household_features()).
+    The table is built once and saved as npz-file in path 
+    (household_features_<hash>.npz, hash of input data, see 
+    feature_table_key()), later calls with the same data load the file.
+    The table can be passed to rank_households() and rank_households_all()
+    (features), so ranking does not touch the mobility arrays.
+    Args:
+    - *_all:                  data set (meta data, states, speeds)
+    - no_of_ts:               # of timesteps
+    - ts_length:              timestep length
+    - path:                   path to folder for feature table
+    - household_index:        HouseholdIndex of meta_data_all (optional,
+                              created if not given)
+    """
+    # SharedArray handles (shared memory, memory-mapped files) -> arrays
+    meta_data_all = attach_array(meta_data_all)
+    states_all = attach_array(states_all)
+    speeds_all = attach_array(speeds_all)
+
+    key = feature_table_key(meta_data_all,
+                            states_all,
+                            speeds_all,
+                            no_of_ts,
+                            ts_length)
+    path_file = os.path.join(path, "household_features_" + key + ".npz")
+    if os.path.isfile(path_file):
+        with np.load(path_file) as table:
+            return {feature: table[feature] for feature in FEATURES}
+
+    if household_index is None:
+        household_index = HouseholdIndex(meta_data_all)
+    features = household_features(household_index,
+                                  states_all,
+                                  speeds_all,
+                                  no_of_ts,
+                                  ts_length)
+    np.savez(path_file, **features)
+    return features
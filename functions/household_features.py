@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""household_features.py
+
+Household features for all households at once (grouped reductions).
+"""
+
+import numpy as np
+
+# features of household_features() (same values as Household attributes)
+FEATURES = ["household_ID",
+            "number_of_occupants",
+            "number_of_drivers",
+            "number_of_cars",
+            "income",
+            "population",
+            "year_of_birth",
+            "job",
+            "driven_distance",
+            "member_distances"]
+
+
+def household_features(household_index,
+                       states_all,
+                       speeds_all,
+                       no_of_ts,
+                       ts_length):
+    """ household_features():
+    Returns features of all households in data set without creating
+    Household objects:
+    - meta data of first household member (row) for every household
+    - number of drivers: members with at least one state = 14
+    - driven distance: total driven distance of first household member
+    - member distances: total driven distance of every household member 
+      (households x max. # of members, nan if less members)
+    Args:
+    - household_index:        HouseholdIndex of meta_data_all
+    - *_all:                  states and speeds of data set
+    - no_of_ts:               # of timesteps
+    - ts_length:              timestep length
+    Returns dict: feature name (see FEATURES) -> array with one entry per
+    household (order of household_index.household_IDs)
+    """
+    first_rows = household_index.order[household_index.first]
+    meta_data = household_index.meta_data_int[first_rows]
+    driving = (states_all[:, 0 : no_of_ts] == 14)
+
+    # number of drivers: sum of driver flags per household
+    drivers = driving.any(axis = 1)[household_index.order]
+    number_of_drivers = np.add.reduceat(drivers.astype(int),
+                                        household_index.first)
+
+    # driven distances of all members (only while driving, state = 14)
+    speeds = np.where(driving, speeds_all[:, 0 : no_of_ts], 0)
+    distances = np.where(driving, speeds * ts_length / 60, 0).sum(axis = 1)
+
+    # one row per household, one column per member (order of data set)
+    members = (np.arange(len(household_index.order))
+               - np.repeat(household_index.first, household_index.counts))
+    member_distances = np.full((len(household_index), 
+                                household_index.counts.max()), np.nan)
+    member_distances[np.repeat(np.arange(len(household_index)), 
+                               household_index.counts), 
+                     members] = distances[household_index.order]
+
+    return {"household_ID": meta_data[:,0],
+            "number_of_occupants": meta_data[:,5],
+            "number_of_drivers": number_of_drivers,
+            "number_of_cars": meta_data[:,7],
+            "income": meta_data[:,6],
+            "population": meta_data[:,4],
+            "year_of_birth": meta_data[:,10],
+            "job": meta_data[:,11],
+            "driven_distance": distances[first_rows],
+            "member_distances": member_distances}
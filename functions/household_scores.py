@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""household_scores.py
+
+Scores of all households for one or many target profiles.
+"""
+
+import numpy as np
+from classes.hard_factor_index import HARD_FACTORS
+
+# soft factors with weights of a target (hard factors: exact match)
+SOFT_FACTORS = ["income",
+                "population",
+                "year_of_birth",
+                "job",
+                "distance"]
+WEIGHTS = ["w_" + factor for factor in SOFT_FACTORS]
+
+
+def household_scores(features, targets):
+    """ household_scores():
+    Returns scores and fitting households for all targets at once 
+    (targets x households, broadcasted array operations):
+    - fitting: all hard factors are fulfilled
+    - score: weighted points of soft factors (see rank_households())
+        (perfect fit (2 pts.), close fit (1 pt.), else (0 pts.))
+    Args:
+    - features:               features of all households 
+                              (see household_features())
+    - targets:                dict: factor/weight (HARD_FACTORS, 
+                              SOFT_FACTORS, WEIGHTS) -> value or array
+                              with one value per target
+    """
+    for parameter in HARD_FACTORS + SOFT_FACTORS + WEIGHTS:
+        if parameter not in targets:
+            raise ValueError("Missing target parameter: " + parameter)
+    targets = {parameter: np.atleast_1d(value)[:, np.newaxis]
+               for parameter, value in targets.items()}
+
+    # hh is looked at more closely, only if all main factors are fulfilled
+    fitting = ((features["number_of_occupants"] 
+                == targets["number_of_occupants"])
+               & (features["number_of_drivers"] 
+                  == targets["number_of_drivers"])
+               & (features["number_of_cars"] == targets["number_of_cars"]))
+
+    # income score
+    income_diff = np.abs(features["income"] - targets["income"])
+    income_pts = np.select([income_diff == 0, income_diff == 1], [2, 1], 0)
+    income_pts = income_pts * targets["w_income"]    # weighted score
+
+    # population score
+    population_diff = np.abs(features["population"] - targets["population"])
+    pop_pts = np.select([population_diff == 0, population_diff == 1], [2, 1], 0)
+    pop_pts = pop_pts * targets["w_population"]  # weighted score
+
+    # year of birth score
+    year_of_birth_diff = np.abs(features["year_of_birth"] 
+                                - targets["year_of_birth"])
+    year_o_b_pts = np.select([year_of_birth_diff <= 10,
+                              year_of_birth_diff <= 20], [2, 1], 0)
+    year_o_b_pts = year_o_b_pts * targets["w_year_of_birth"]  # weighted score
+
+    # occupation score
+    job_diff = np.abs(features["job"] - targets["job"])
+    job_pts = np.select([job_diff == 0, job_diff == 1], [2, 1], 0)
+    job_pts = job_pts * targets["w_job"] # weighted score
+
+    # driven distance score
+    distance_diff = np.abs(features["driven_distance"] - targets["distance"])
+    dist_pts = np.select([distance_diff <= 100,
+                          distance_diff <= 200,
+                          distance_diff <= 500], [2, 1, 0.5], 0)
+    dist_pts = dist_pts * targets["w_distance"]  # weighted score
+
+    scores = income_pts + pop_pts + year_o_b_pts + job_pts + dist_pts
+    return scores, fitting
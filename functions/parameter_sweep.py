@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""parameter_sweep.py
+
+Evaluates many charging parameter sets for the same households.
+"""
+
+import itertools
+import numpy as np
+from classes.household import Household
+from classes.shared_array import attach_array
+from classes.household_index import HouseholdIndex
+from classes.weather_store import WeatherStore
+from classes.car_segment_index import CarSegmentIndex
+from classes.car_fleet import CarFleet
+
+# charging parameters that can be varied in a sweep
+PARAMETERS = ["home_charging_power",
+              "work_charging_power",
+              "charging_efficiency",
+              "discharging_efficiency",
+              "min_charge",
+              "max_charge"]
+
+# profiles of max and min strategy (order of Car profile tuples)
+PROFILE_NAMES = ["max_state_of_charge",
+                 "max_charging",
+                 "max_home",
+                 "max_work",
+                 "max_load",
+                 "max_load_home",
+                 "max_load_work",
+                 "min_state_of_charge",
+                 "min_charging",
+                 "min_home",
+                 "min_work",
+                 "min_load",
+                 "min_load_home",
+                 "min_load_work"]
+
+
+def parameter_grid(**parameters):
+    """ returns list of parameter sets (dicts) for all combinations
+    e.g. parameter_grid(home_charging_power = [3.7, 11], min_charge = [0.1])
+    """
+    names = list(parameters)
+    return [dict(zip(names, values))
+            for values in itertools.product(*parameters.values())]
+
+
+def parameter_sweep(households,
+                    meta_data_all,
+                    states_all,
+                    speeds_all,
+                    start,
+                    end,
+                    no_of_ts,
+                    ts_length,
+                    parameter_sets,
+                    csv_weather,
+                    csv_cars,
+                    csv_database_electric_cars,
+                    profile_names = None,
+                    bool_aggregate = False,
+                    household_index = None,
+                    weather_store = None,
+                    car_segment_index = None,
+                    bool_truncate_temperatures = True):
+    """ parameter_sweep():
+    Creates profiles of all household cars for many parameter sets.
+    Parameter independent work is done once for all parameter sets:
+        - Household objects and mobility profiles (states, speeds)
+        - temperatures and car segments
+        - CarFleet of all cars (consumption profiles of every segment are 
+          cached in CarFleet, cache is kept when segments are reset)
+    For every parameter set only the charging strategies are simulated 
+    (all cars at once, see CarFleet).
+    Args:
+    - *IDs:                   hh ID or list of household IDs (if multiple)
+    - start:                  first timestep
+    - end:                    last timestep
+    - parameter_sets:         list of dicts with values for PARAMETERS
+                              (see parameter_grid()), at least one set
+                              (ValueError if empty or if a parameter 
+                              is missing)
+    - profile_names:          profiles for result cube (see PROFILE_NAMES),
+                              default: all profiles
+    - bool_aggregate:         if true: only aggregated load profiles of all
+                              feasible cars are returned, default: False
+    - household_index:        HouseholdIndex of meta_data_all (optional,
+                              created if not given)
+    - weather_store:          WeatherStore of csv_weather (optional,
+                              created if not given)
+    - car_segment_index:      CarSegmentIndex of csv_cars (optional,
+                              created if not given)
+    - bool_truncate_temperatures: if true: temperatures of csv_weather 
+                              are truncated to whole degrees (see 
+                              WeatherStore, only if weather_store is not 
+                              given), default: True
+    Returns dict with:
+    - parameter_sets:         list of parameter sets
+    - cars:                   list of (household ID, car number)
+    - segments:               final car segment (parameter sets x cars)
+    - feasible:               profile generation possible (param. x cars)
+    - profiles:               dict: profile name -> array (parameter sets
+                              x cars x timesteps), nan if not feasible
+      or (bool_aggregate)
+    - max_load, min_load:     aggregated load profiles of max and min
+                              strategy (parameter sets x timesteps)
+    """
+    if len(parameter_sets) == 0:
+        raise ValueError("No parameter sets given")
+    for parameter_set in parameter_sets:
+        for parameter in PARAMETERS:
+            if parameter not in parameter_set:
+                raise ValueError("Missing parameter: " + parameter)
+
+    # SharedArray handles (shared memory, memory-mapped files) -> arrays
+    meta_data_all = attach_array(meta_data_all)
+    states_all = attach_array(states_all)
+    speeds_all = attach_array(speeds_all)
+    csv_weather = attach_array(csv_weather)
+    csv_cars = attach_array(csv_cars)
+    csv_database_electric_cars = attach_array(csv_database_electric_cars)
+
+    if household_index is None:
+        household_index = HouseholdIndex(meta_data_all)
+    if weather_store is None:
+        weather_store = WeatherStore(
+            csv_weather, bool_truncate = bool_truncate_temperatures)
+    if car_segment_index is None:
+        car_segment_index = CarSegmentIndex(csv_cars)
+
+    if profile_names is None:
+        profile_names = PROFILE_NAMES
+
+    # parameter independent: CarFleet of all cars of all households
+    car_states = []
+    car_speeds = []
+    car_temperatures = []
+    car_labels = []
+    segments = []
+    for i in range(0, len(households)):
+        ID = households[i]    # Id of current HH
+
+        # indices of household in data set
+        positions = household_index.get_positions(ID)
+        rows = household_index.get_rows(ID)
+
+        # meta data, states and speeds of all household members
+        meta_data = household_index.get_meta_data(ID)
+        states = states_all[rows, 0 : no_of_ts]
+        speeds = speeds_all[rows, 0 : no_of_ts]
+
+        # create new Household object
+        household = Household(positions,
+                              meta_data,
+                              states,
+                              speeds,
+                              no_of_ts,
+                              ts_length)
+
+        # create states_profiles and speed_profiles for each car in household
+        states_profiles, speeds_profiles = household.generate_mobility_profiles(
+            start, end)
+
+        # swap all "0" to "8"
+        states_profiles = np.where(states_profiles == 8, 8,
+                              np.where(states_profiles == 1, 1,
+                                       np.where(states_profiles == 2, 2,
+                                                np.where(states_profiles == 14, 14, 8))))
+
+        # get temperatures for correct dates from weather store
+        temperature_array = weather_store.get_temperatures(household.dates,
+                                                           start,
+                                                           end)
+
+        for j in range(0, len(states_profiles)):
+
+            # get car segment (if no segment is given: 3)
+            segment = car_segment_index.get_segment(household.household_ID, j)
+
+            car_states.append(states_profiles[j])
+            car_speeds.append(speeds_profiles[j])
+            car_temperatures.append(temperature_array)
+            car_labels.append((household.household_ID, j + 1))
+            segments.append(int(np.ravel(segment)[0]))
+
+    segments = np.array(segments, dtype = int)
+    fleet = CarFleet(np.reshape(car_states, (len(car_labels), end-start)),
+                     np.reshape(car_speeds, (len(car_labels), end-start)),
+                     np.reshape(car_temperatures, 
+                                (len(car_labels), end-start)),
+                     segments,
+                     csv_database_electric_cars,
+                     parameter_sets[0]["min_charge"],
+                     parameter_sets[0]["max_charge"],
+                     ts_length)
+    max_out = fleet.allocate_profiles(start, end)
+    min_out = fleet.allocate_profiles(start, end)
+
+    # results
+    no_of_sets = len(parameter_sets)
+    feasible = np.zeros((no_of_sets, len(fleet)), dtype = bool)
+    final_segments = np.zeros((no_of_sets, len(fleet)), dtype = int)
+    if bool_aggregate:
+        max_load = np.zeros((no_of_sets, end-start))
+        min_load = np.zeros((no_of_sets, end-start))
+    else:
+        profiles = {name: np.full((no_of_sets, len(fleet), end-start), np.nan)
+                    for name in profile_names}
+
+    # parameter dependent: charging strategies for every parameter set
+    for p, parameter_set in enumerate(parameter_sets):
+
+        # reset cars to initial segments and SOC limits of parameter set
+        fleet.min_charge = parameter_set["min_charge"]
+        fleet.max_charge = parameter_set["max_charge"]
+        fleet.set_segments(segments)
+
+        strategy_args = (start,
+                         end,
+                         parameter_set["home_charging_power"],
+                         parameter_set["work_charging_power"],
+                         parameter_set["charging_efficiency"],
+                         parameter_set["discharging_efficiency"])
+        fleet.max_state_of_charge_profiles(*strategy_args, out = max_out)
+        fleet.min_state_of_charge_profiles(*strategy_args, out = min_out)
+        final_segments[p] = fleet.segments
+        feasible[p] = fleet.feasible   # false: generation not possible
+
+        if bool_aggregate:
+            max_load[p] = max_out[4][fleet.feasible].sum(axis = 0)
+            min_load[p] = min_out[4][fleet.feasible].sum(axis = 0)
+        else:
+            strategies = np.concatenate((max_out, min_out))
+            for name in profile_names:
+                profiles[name][p, fleet.feasible] = strategies[
+                    PROFILE_NAMES.index(name), fleet.feasible]
+
+    results = {"parameter_sets": parameter_sets,
+               "cars": car_labels,
+               "segments": final_segments,
+               "feasible": feasible}
+    if bool_aggregate:
+        results["max_load"] = max_load
+        results["min_load"] = min_load
+    else:
+        results["profiles"] = profiles
+    return results
@@ -8,7 +8,11 @@ Original file is located at
 """
 
 import numpy as np
-from classes.household import Household
+from classes.shared_array import attach_array
+from classes.household_index import HouseholdIndex
+from classes.hard_factor_index import HardFactorIndex
+from functions.household_features import household_features
+from functions.household_scores import household_scores
 
 def rank_households(meta_data_all,
                     states_all,
@@ -28,11 +32,15 @@ def rank_households(meta_data_all,
                     w_job,
                     distance,
                     w_distance,
-                    quantity):
+                    quantity,
+                    household_index = None,
+                    features = None,
+                    factor_index = None):
     """ Function rank_households():
     - searches for fitting households in dataset
     - returns list of up to 10 best fitting households according to user input
     - main factors (# of occupants, # of drivers, # of cars) are fulfilled
+    - factors of all households are computed at once (household_features())
     - soft factors are checked for shortest distance to best fitting
     - shortest fitting is calculated with scoring system (based on weight) 
         (perfect fit (2 pts.), close fit (1 pt.), else (0 pts.))
@@ -50,149 +58,62 @@ def rank_households(meta_data_all,
     - year_of_birth:            year of birth of first household member, weight
     - job:                      occupation of first household member, weight
     - distance:                 total driven distance by 1st hh member, weight
+    - household_index:          HouseholdIndex of meta_data_all (optional,
+                                created if not given)
+    - features:                 features of all households (optional, e.g.
+                                from household_feature_table(), mobility
+                                data is not used then)
+    - factor_index:             HardFactorIndex of features (optional,
+                                created if not given)
     """
-
-    households = []
-
-    # for every entry in dataset: create Household object
-    # check the values for goodness of fit
-    for i in range(0, len(meta_data_all)): 
-        ID = meta_data_all[i,0 ]    # ID of current HH
-
-        # indices of household in data set
-        positions = np.where(meta_data_all[:,0] == ID)[0]
-
-        # meta data of all household members
-        meta_data = meta_data_all.astype(int)[np.where(meta_data_all[:,0]==ID)]
-        
-
-        # states of all household members
-        for i in positions:
-            states = states_all[positions, 0 : no_of_ts]
-
-        # speeds of all household members
-        for i in positions:
-            speeds = speeds_all[positions, 0 : no_of_ts]
-            states = states_all[positions, 0 : no_of_ts]
-
-        # create new Household object
-        household = Household(positions, 
-                              meta_data, 
-                              states, 
-                              speeds, 
-                              no_of_ts, 
-                              ts_length)
-        
-        
-        # all households
-        #if (household.number_of_occupants <= 5) and (household.number_of_occupants >= 1) and (household.number_of_drivers >= 1) and (household.number_of_drivers <= 5) and (household.number_of_cars >= 1)and (household.number_of_cars <= 5):          
-         #   households.append(household.household_ID.astype(int))
-
-        # hh is looked at more closely, only if all main factors are fulfilled
-        if ((household.number_of_occupants == number_of_occupants) 
-                and (household.number_of_drivers == number_of_drivers) 
-                and (household.number_of_cars == number_of_cars)):          
-            households.append(household.household_ID.astype(int))
-
-    households = np.unique(households)    # delete duplicates
-    #return households
-
-    
-    score_array = []
-
-
-    # determine score for all households that fulfill above condition
-    for i in range(0, len(households)):
-        ID = households[i]    # Id of current HH
-
-        # indices of household in data set
-        positions = np.where(meta_data_all[:,0] == ID)[0]
-
-        # meta data of all household members
-        meta_data = meta_data_all.astype(int)[np.where(meta_data_all[:,0]==ID)]
-
-        # states of all household members
-        for i in positions:
-            states = states_all[positions, 0 : no_of_ts]
-
-        # speeds of all household members
-        for i in positions:
-            speeds = speeds_all[positions, 0 : no_of_ts]
-            states = states_all[positions, 0 : no_of_ts]
-
-        # create new Household object
-        household = Household(positions, 
-                              meta_data, 
-                              states, 
-                              speeds, 
-                              no_of_ts, 
-                              ts_length)
-        
-        # income score
-        income_hh = household.income
-        income_diff = income_hh - income
-        if (income_diff == 0):
-            income_pts = 2
-        elif (abs(income_diff) == 1):
-            income_pts = 1
-        else:
-            income_pts = 0
-        income_pts = income_pts * w_income    # weighted score
-
-        # population score
-        population_hh = household.population
-        population_diff = population_hh - population
-        if (population_diff == 0):
-            pop_pts = 2
-        elif (abs(population_diff) == 1):
-            pop_pts = 1
-        else:
-            pop_pts = 0
-        pop_pts = pop_pts * w_population  # weighted score
-
-        # year of birth score
-        year_of_birth_hh = household.year_of_birth
-        year_of_birth_diff = year_of_birth_hh - year_of_birth
-        if (abs(year_of_birth_diff) <= 10):
-            year_o_b_pts = 2
-        elif (abs(year_of_birth_diff) <= 20):
-            year_o_b_pts = 1
-        else:
-            year_o_b_pts = 0
-        year_o_b_pts = year_o_b_pts * w_year_of_birth   # weighted score
-
-        # occupation score
-        job_hh = household.job
-        job_diff = job_hh - job
-        if (job_diff == 0):
-            job_pts = 2
-        elif (abs(job_diff) == 1):
-            job_pts = 1
-        else:
-            job_pts = 0
-        job_pts = job_pts * w_job # weighted score
-
-        # driven distance score
-        distance_hh = household.driven_distance
-        distance_diff = distance_hh - distance
-        if (abs(distance_diff) <= 100):
-            dist_pts = 2
-        elif (abs(distance_diff) <= 200):
-            dist_pts = 1
-        elif (abs(distance_diff) <= 500):
-            dist_pts = 0.5
-        else:
-            dist_pts = 0
-        dist_pts = dist_pts * w_distance  # weighted score
-
-        score = sum([income_pts, pop_pts, year_o_b_pts, job_pts, dist_pts])
-        score_array.append(score)
-    
-    # sort households by overall score and return x best fitting
-    households_fitting = [x for _, x in sorted(zip(score_array, households))]
+    # SharedArray handles (shared memory, memory-mapped files) -> arrays
+    meta_data_all = attach_array(meta_data_all)
+    states_all = attach_array(states_all)
+    speeds_all = attach_array(speeds_all)
+
+    # features of all households (grouped reductions, no Household objects)
+    if features is None:
+        if household_index is None:
+            household_index = HouseholdIndex(meta_data_all)
+        features = household_features(household_index,
+                                      states_all,
+                                      speeds_all,
+                                      no_of_ts,
+                                      ts_length)
+
+    if factor_index is None:
+        factor_index = HardFactorIndex(features)
+
+    # hh is looked at more closely, only if all main factors are fulfilled
+    rows = factor_index.get_candidates(
+        number_of_occupants = number_of_occupants,
+        number_of_drivers = number_of_drivers,
+        number_of_cars = number_of_cars)
+    candidates = {feature: values[rows] for feature, values in features.items()}
+
+    # scores of candidates (see household_scores())
+    scores, fitting = household_scores(
+        candidates,
+        {"number_of_occupants": number_of_occupants,
+         "number_of_drivers": number_of_drivers,
+         "number_of_cars": number_of_cars,
+         "income": income,
+         "w_income": w_income,
+         "population": population,
+         "w_population": w_population,
+         "year_of_birth": year_of_birth,
+         "w_year_of_birth": w_year_of_birth,
+         "job": job,
+         "w_job": w_job,
+         "distance": distance,
+         "w_distance": w_distance})
+    households = candidates["household_ID"][fitting[0]]
+    score_array = scores[0][fitting[0]]
+
+    # sort households by overall score (and ID) and return x best fitting
+    households_fitting = households[np.lexsort((households, score_array))]
     number_of_households = len(households_fitting)
     print("Number of fitting households:", number_of_households)
-    #print("Number of cars:", sum(arr))
 
     # return only input quantity of fitting households (or all)
     if (quantity == "all"):
@@ -200,4 +121,4 @@ def rank_households(meta_data_all,
     else:
         ranked_households = list(reversed(households_fitting)) [0:quantity]
 
-    return ranked_households
\ No newline at end of file
+    return ranked_households
@@ -9,6 +9,10 @@ Original file is located at
 
 import numpy as np
 from classes.household import Household
+from classes.shared_array import attach_array
+from classes.household_index import HouseholdIndex
+from classes.hard_factor_index import HardFactorIndex
+from functions.household_features import household_features
 
 def rank_households_all(meta_data_all,
                     states_all,
@@ -28,7 +32,10 @@ def rank_households_all(meta_data_all,
                     w_job,
                     distance,
                     w_distance,
-                    quantity):
+                    quantity,
+                    household_index = None,
+                    features = None,
+                    factor_index = None):
     """ Function rank_households():
     - searches for fitting households in dataset
     - returns list of up to 10 best fitting households according to user input
@@ -50,48 +57,37 @@ def rank_households_all(meta_data_all,
     - year_of_birth:            year of birth of first household member, weight
     - job:                      occupation of first household member, weight
     - distance:                 total driven distance by 1st hh member, weight
+    - household_index:          HouseholdIndex of meta_data_all (optional,
+                                created if not given)
+    - features:                 features of all households (optional, e.g.
+                                from household_feature_table(), mobility
+                                data is not used then)
+    - factor_index:             HardFactorIndex of features (optional,
+                                created if not given)
     """
-
-    households = []
-
-    # for every entry in dataset: create Household object
-    # check the values for goodness of fit
-    for i in range(0, len(meta_data_all)): 
-        ID = meta_data_all[i,0 ]    # ID of current HH
-
-        # indices of household in data set
-        positions = np.where(meta_data_all[:,0] == ID)[0]
-
-        # meta data of all household members
-        meta_data = meta_data_all.astype(int)[np.where(meta_data_all[:,0]==ID)]
-
-        # states of all household members
-        for i in positions:
-            states = states_all[positions, 0 : no_of_ts]
-
-        # speeds of all household members
-        for i in positions:
-            speeds = speeds_all[positions, 0 : no_of_ts]
-            states = states_all[positions, 0 : no_of_ts]
-
-        # create new Household object
-        household = Household(positions, 
-                              meta_data, 
-                              states, 
-                              speeds, 
-                              no_of_ts, 
-                              ts_length)
-        
-        
-        # all households
-        if (household.number_of_occupants <= 5) and (household.number_of_occupants >= 1) and (household.number_of_drivers >= 1) and (household.number_of_drivers <= 5) and (household.number_of_cars >= 1)and (household.number_of_cars <= 5):          
-            households.append(household.household_ID.astype(int))
-
-        # hh is looked at more closely, only if all main factors are fulfilled
-        #if ((household.number_of_occupants == number_of_occupants) 
-         #       and (household.number_of_drivers == number_of_drivers) 
-          #      and (household.number_of_cars == number_of_cars)):          
-           # households.append(household.household_ID.astype(int))
+    # SharedArray handles (shared memory, memory-mapped files) -> arrays
+    meta_data_all = attach_array(meta_data_all)
+    states_all = attach_array(states_all)
+    speeds_all = attach_array(speeds_all)
+
+    # features of all households (grouped reductions, no Household objects)
+    if features is None:
+        if household_index is None:
+            household_index = HouseholdIndex(meta_data_all)
+        features = household_features(household_index,
+                                      states_all,
+                                      speeds_all,
+                                      no_of_ts,
+                                      ts_length)
+
+    if factor_index is None:
+        factor_index = HardFactorIndex(features)
+
+    # all households
+    rows = factor_index.get_range_candidates(number_of_occupants = (1, 5),
+                                             number_of_drivers = (1, 5),
+                                             number_of_cars = (1, 5))
+    households = features["household_ID"][rows]
 
     households = np.unique(households)    # delete duplicates
     return households
@@ -104,19 +100,13 @@ def rank_households_all(meta_data_all,
         ID = households[i]    # Id of current HH
 
         # indices of household in data set
-        positions = np.where(meta_data_all[:,0] == ID)[0]
-
-        # meta data of all household members
-        meta_data = meta_data_all.astype(int)[np.where(meta_data_all[:,0]==ID)]
-
-        # states of all household members
-        for i in positions:
-            states = states_all[positions, 0 : no_of_ts]
+        positions = household_index.get_positions(ID)
+        rows = household_index.get_rows(ID)
 
-        # speeds of all household members
-        for i in positions:
-            speeds = speeds_all[positions, 0 : no_of_ts]
-            states = states_all[positions, 0 : no_of_ts]
+        # meta data, states and speeds of all household members
+        meta_data = household_index.get_meta_data(ID)
+        states = states_all[rows, 0 : no_of_ts]
+        speeds = speeds_all[rows, 0 : no_of_ts]
 
         # create new Household object
         household = Household(positions, 
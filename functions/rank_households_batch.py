@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""rank_households_batch.py
+
+Ranking of households for many target profiles in one call.
+"""
+
+import numpy as np
+from functions.household_scores import (household_scores, HARD_FACTORS,
+                                        SOFT_FACTORS, WEIGHTS)
+
+
+def rank_households_batch(features, targets, quantity):
+    """ Function rank_households_batch():
+    - ranks households for every target profile (same results as
+      rank_households() for each target)
+    - all households are scored against all targets at once
+      (household_scores(), targets x households)
+    - best fitting households are selected with partial selection
+      (np.partition), only candidates with at least the score of the
+      quantity-th household are sorted (by score and ID)
+
+    Args:
+    - features:               features of all households
+                              (see household_features(),
+                              household_feature_table())
+    - targets:                list of dicts (one per target) with hard
+                              factors, soft factors and weights (see
+                              rank_households(), e.g. from parameter_grid())
+    - quantity:               # of households per target or "all"
+    Returns list (one entry per target) of lists with ranked household IDs
+    """
+    table = {parameter: np.array([target[parameter] for target in targets])
+             for parameter in HARD_FACTORS + SOFT_FACTORS + WEIGHTS}
+    scores, fitting = household_scores(features, table)
+    scores = np.where(fitting, scores, -np.inf)   # exclude not fitting
+    households = features["household_ID"]
+
+    # score of quantity-th best household for every target
+    if (quantity == "all") or (quantity >= scores.shape[1]):
+        limits = np.full(len(targets), -np.inf)
+    elif quantity <= 0:
+        return [[] for target in targets]
+    else:
+        limits = -np.partition(-scores, quantity - 1, axis = 1)[:, quantity - 1]
+
+    ranked_households = []
+    for k in range(len(targets)):
+        candidates = np.flatnonzero(fitting[k] & (scores[k] >= limits[k]))
+
+        # sort candidates by overall score and ID (descending)
+        order = np.lexsort((households[candidates], scores[k, candidates]))
+        ranked = list(households[candidates[order[::-1]]])
+        if quantity != "all":
+            ranked = ranked[0:quantity]
+        ranked_households.append(ranked)
+    return ranked_households
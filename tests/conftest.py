@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""conftest.py
+
+Test data: input files of the repository (electric car database,
+temperatures) and a small synthetic MOP/TANK data set (the original
+data sets are not part of the repository).
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from classes.household import Household
+from classes.household_index import HouseholdIndex
+from classes.weather_store import WeatherStore
+from classes.car_segment_index import CarSegmentIndex
+
+NO_OF_TS = 1008     # one week
+TS_LENGTH = 10      # [min]
+
+# charging parameters of all tests
+HOME_CHARGING_POWER = 11
+WORK_CHARGING_POWER = 3.7
+CHARGING_EFFICIENCY = 0.95
+DISCHARGING_EFFICIENCY = 0.95
+MIN_CHARGE = 0.1
+MAX_CHARGE = 0.9
+CHARGING_PARAMETERS = (HOME_CHARGING_POWER,
+                       WORK_CHARGING_POWER,
+                       CHARGING_EFFICIENCY,
+                       DISCHARGING_EFFICIENCY)
+
+
+def make_household(rng, household_ID, no_of_occupants, no_of_cars, day):
+    """ returns meta data, states and speeds of random household members
+    """
+    meta_data = np.zeros((no_of_occupants, 40))
+    meta_data[:,0] = household_ID
+    meta_data[:,4] = rng.integers(1, 8)
+    meta_data[:,5] = no_of_occupants
+    meta_data[:,6] = rng.integers(1, 11)
+    meta_data[:,7] = no_of_cars
+    meta_data[:,10] = rng.integers(1940, 2005, no_of_occupants)
+    meta_data[:,11] = rng.integers(0, 9, no_of_occupants)
+    meta_data[:,32:39] = day + np.arange(7)
+
+    states = np.full((no_of_occupants, NO_OF_TS), 8.0)
+    speeds = np.zeros((no_of_occupants, NO_OF_TS))
+    for member in range(no_of_occupants):
+        t = 0
+        while (rng.random() < 0.7) and (t < NO_OF_TS - 8):
+            t = t + rng.integers(20, 120)
+            duration = rng.integers(1, 8)
+            if t + duration >= NO_OF_TS:
+                break
+            states[member, t:t+duration] = 14
+            speeds[member, t:t+duration] = (rng.choice([0, 20, 40, 60, 90, 130])
+                                            * (rng.random() < 0.95))
+            t = t + duration
+            dwell = rng.integers(3, 60)
+            states[member, t:t+dwell] = rng.choice([1, 2, 4, 5, 7, 8, 0, 3])
+            t = t + dwell
+        # speeds in non-driving states are ignored by Household
+        speeds[member, states[member] != 14] = rng.random(
+            (states[member] != 14).sum()) * 5
+    return meta_data, states, speeds
+
+
+def make_mop_data(seed = 0, no_of_households = 12):
+    """ returns synthetic data set (meta data, states, speeds, cars) with
+    random households and two households with long trips:
+    - car of segment 1 that has to be increased to segment 2
+    - car that is not feasible with any segment
+    """
+    rng = np.random.default_rng(seed)
+    meta_data, states, speeds, cars = [], [], [], []
+    household_ID = 4301011000
+    for h in range(no_of_households):
+        household_ID = household_ID + int(rng.integers(1, 20))
+        no_of_cars = int(rng.integers(1, 4))
+        household = make_household(rng,
+                                   household_ID,
+                                   int(rng.integers(1, 5)),
+                                   no_of_cars,
+                                   20820 + int(rng.integers(0, 350)))
+        meta_data.append(household[0])
+        states.append(household[1])
+        speeds.append(household[2])
+        for c in range(no_of_cars):
+            car = np.zeros(175)
+            car[0] = household_ID
+            car[174] = rng.choice([1, 2, 3, 4, 5, 6, 7, 0, 99])
+            cars.append(car)
+
+    # long trips: 100 km (segment 1 -> 2) and 1300 km (not feasible)
+    for speed, duration in [(60, 10), (130, 60)]:
+        household_ID = household_ID + 1
+        household = make_household(rng, household_ID, 1, 1, 20900)
+        household[1][0, 200:] = 8
+        household[1][0, 300:300+duration] = 14
+        household[2][0, 300:300+duration] = speed
+        meta_data.append(household[0])
+        states.append(household[1])
+        speeds.append(household[2])
+        car = np.zeros(175)
+        car[0] = household_ID
+        car[174] = 1
+        cars.append(car)
+
+    return (np.concatenate(meta_data),
+            np.concatenate(states),
+            np.concatenate(speeds),
+            np.array(cars))
+
+
+@pytest.fixture(scope = "session")
+def database():
+    return np.genfromtxt(os.path.join(ROOT, "inputs",
+                                      "Elektroauto_Datenbank.csv"),
+                         delimiter = ";",
+                         encoding = "ISO-8859-1")
+
+
+@pytest.fixture(scope = "session")
+def weather():
+    return np.genfromtxt(os.path.join(ROOT, "inputs",
+                                      "Temperaturen_Deutschland_2017.csv"),
+                         delimiter = ";",
+                         encoding = "ISO-8859-1")
+
+
+@pytest.fixture(scope = "session")
+def mop_data():
+    return make_mop_data()
+
+
+@pytest.fixture(scope = "session")
+def households(mop_data):
+    """ IDs of all households of mop_data (order of data set)
+    """
+    return list(dict.fromkeys(mop_data[0][:,0].astype(int).tolist()))
+
+
+@pytest.fixture(scope = "session")
+def car_inputs(mop_data, weather):
+    """ list of Car arguments (states, speeds, temperatures, segment) for
+    all cars of mop_data (as in create_soc_profiles())
+    """
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    household_index = HouseholdIndex(meta_data_all)
+    weather_store = WeatherStore(weather)
+    car_segment_index = CarSegmentIndex(csv_cars)
+    inputs = []
+    for ID in household_index.household_IDs:
+        rows = household_index.get_rows(ID)
+        household = Household(household_index.get_positions(ID),
+                              household_index.get_meta_data(ID),
+                              states_all[rows],
+                              speeds_all[rows],
+                              NO_OF_TS,
+                              TS_LENGTH)
+        states, speeds = household.generate_mobility_profiles(0, NO_OF_TS)
+        states = np.where(np.isin(states, [1, 2, 8, 14]), states, 8)
+        temperatures = weather_store.get_temperatures(household.dates,
+                                                      0,
+                                                      NO_OF_TS)
+        for j in range(len(states)):
+            inputs.append((states[j],
+                           speeds[j],
+                           temperatures,
+                           car_segment_index.get_segment(
+                               household.household_ID, j)))
+    return inputs
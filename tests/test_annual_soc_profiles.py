@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""test_annual_soc_profiles.py
+
+Tests of annual_soc_profiles(): chunks against one simulation of the
+whole horizon.
+"""
+
+import numpy as np
+import pytest
+from conftest import (NO_OF_TS, TS_LENGTH, MIN_CHARGE, MAX_CHARGE,
+                      CHARGING_PARAMETERS)
+from classes.car import Car
+from classes.household import Household
+from classes.household_index import HouseholdIndex
+from classes.car_segment_index import CarSegmentIndex
+from classes.weather_store import WeatherStore
+from functions.annual_soc_profiles import annual_soc_profiles
+
+NO_OF_DAYS = 17     # horizon: 2448 timesteps (not a multiple of a week)
+
+
+def run_annual(households, mop_data, weather, database, chunk_length):
+    """ returns results and profiles (dict: (household ID, car, strategy)
+    -> 7 profiles of whole horizon) of annual_soc_profiles()
+    """
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    profiles = {}
+    def sink(ID, car, strategy, first, chunk, segment, feasible):
+        key = (ID, car, strategy)
+        if key not in profiles:
+            profiles[key] = np.full((7, NO_OF_DAYS * 144), np.nan)
+        profiles[key][:, first:first + len(chunk[0])] = chunk
+    results = annual_soc_profiles(households, meta_data_all, states_all,
+                                  speeds_all, NO_OF_TS, TS_LENGTH,
+                                  *CHARGING_PARAMETERS, MIN_CHARGE,
+                                  MAX_CHARGE, weather[:1 + NO_OF_DAYS * 144],
+                                  csv_cars, database, sink, chunk_length)
+    return results, profiles
+
+
+@pytest.fixture(scope = "module")
+def annual(households, mop_data, weather, database):
+    return run_annual(households, mop_data, weather, database, None)
+
+
+@pytest.mark.parametrize("chunk_length", [144, 100, 1500])
+def test_independent_of_chunk_length(annual, chunk_length, households,
+                                     mop_data, weather, database):
+    results, profiles = run_annual(households, mop_data, weather, database,
+                                   chunk_length)
+    assert results == annual[0]
+    assert profiles.keys() == annual[1].keys()
+    for key in profiles:
+        np.testing.assert_allclose(profiles[key], annual[1][key],
+                                   rtol = 1e-9, atol = 1e-9)
+
+
+def test_chunks_match_whole_horizon(annual, mop_data, weather, database):
+    results, profiles = annual
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    household_index = HouseholdIndex(meta_data_all)
+    car_segment_index = CarSegmentIndex(csv_cars)
+    weather_store = WeatherStore(weather[:1 + NO_OF_DAYS * 144])
+    temperatures = weather_store.get_series()
+    horizon = len(temperatures)
+    escalated = False
+    for ID, car_number, segment, feasible in results:
+        rows = household_index.get_rows(ID)
+        household = Household(household_index.get_positions(ID),
+                              household_index.get_meta_data(ID),
+                              states_all[rows], speeds_all[rows],
+                              NO_OF_TS, TS_LENGTH)
+        states, speeds = household.generate_mobility_profiles(0, NO_OF_TS)
+        states = np.where(np.isin(states, [1, 2, 8, 14]), states, 8)
+        initial_segment = car_segment_index.get_segment(ID, car_number - 1)
+
+        # mobility profile repeated over the whole horizon, same weekday
+        # as first day of weather file
+        weekday = int(weather_store.days[0] - household.dates[0]) % 7
+        week = (weekday * 144 + np.arange(horizon)) % NO_OF_TS
+        car = Car(states[car_number - 1, week],
+                  speeds[car_number - 1, week],
+                  temperatures, initial_segment, database, MIN_CHARGE,
+                  MAX_CHARGE, TS_LENGTH, "python")
+        max_strategy = car.max_state_of_charge_profile(0, horizon,
+                                                       *CHARGING_PARAMETERS)
+        assert segment == np.ravel(car.segment)[0]
+        assert feasible == (max_strategy is not None)
+        escalated = escalated or (segment != np.ravel(initial_segment)[0])
+        if max_strategy is None:
+            continue
+        np.testing.assert_allclose(profiles[(ID, car_number, "max")],
+                                   max_strategy, rtol = 1e-9, atol = 1e-9)
+        np.testing.assert_allclose(profiles[(ID, car_number, "min")],
+                                   car.just_in_time_profile(
+                                       0, horizon, *CHARGING_PARAMETERS),
+                                   rtol = 1e-9, atol = 1e-9)
+    assert escalated
+    assert not all(result[3] for result in results)
+
+
+def test_chunk_length_must_be_positive(households, mop_data, weather, 
+                                       database):
+    with pytest.raises(ValueError):
+        run_annual(households, mop_data, weather, database, 0)
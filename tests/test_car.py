@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""test_car.py
+
+Tests of Car: consumption, charging options, feasibility check and
+state of charge profiles of all backends.
+"""
+
+import numpy as np
+import pytest
+from conftest import (NO_OF_TS, TS_LENGTH, MIN_CHARGE, MAX_CHARGE,
+                      CHARGING_PARAMETERS)
+from classes import soc_kernels
+from classes import car as car_module
+from classes.car import Car, max_profiles_fleet
+
+
+def reference_consumption(speeds, temperatures, base_consumption, ts_length):
+    """ consumption profile calculated timestep by timestep
+    (speed and temperature bands as in README)
+    """
+    consumption = np.zeros(len(speeds))
+    for i in range(len(speeds)):
+        if speeds[i] == 0:
+            continue
+        elif speeds[i] <= 30:
+            factor = 1.473
+        elif speeds[i] <= 50:
+            factor = 1.08
+        elif speeds[i] <= 70:
+            factor = 0.955
+        else:
+            factor = 1.286
+        consumption[i] = (factor * (ts_length / 60) * speeds[i]
+                          * base_consumption / 100)
+
+        power = 0
+        for limit, band_power in [(-20, 4), (-15, 3.5), (-10, 3), (-5, 2.5),
+                                  (0, 2), (5, 1.5), (10, 1), (15, 0.5),
+                                  (20, 0), (25, 0.25), (30, 0.5), (35, 0.75),
+                                  (40, 1)]:
+            if temperatures[i] <= limit:
+                power = band_power
+                break
+        consumption[i] = consumption[i] + power * (ts_length / 60)
+    return consumption
+
+
+def make_car(car_input, database, backend = None):
+    states, speeds, temperatures, segment = car_input
+    return Car(states, speeds, temperatures, segment, database,
+               MIN_CHARGE, MAX_CHARGE, TS_LENGTH, backend)
+
+
+def test_consumption_profile_matches_reference(car_inputs, database):
+    for car_input in car_inputs:
+        car = make_car(car_input, database)
+        base_consumption = database[car_input[3], 4]
+        np.testing.assert_allclose(
+            car.generate_consumption_profile(0, NO_OF_TS),
+            reference_consumption(car_input[1], car_input[2],
+                                  base_consumption, TS_LENGTH),
+            rtol = 1e-12)
+
+
+def test_consumption_band_limits(database):
+    # band limits are inclusive: speed 30 -> 1.473, temperature 20 -> 0
+    speeds = np.array([0, 0.5, 30, 30.5, 50, 70, 70.5, 130, 30, 30, 30, 30])
+    temperatures = np.array([-30, -20, -19.5, 0, 20, 20.5, 40, 40.5,
+                             -15, 25, 35, 10])
+    states = np.where(speeds != 0, 14, 8)
+    car = Car(states, speeds, temperatures, 3, database,
+              MIN_CHARGE, MAX_CHARGE, TS_LENGTH)
+    np.testing.assert_allclose(
+        car.generate_consumption_profile(0, len(speeds)),
+        reference_consumption(speeds, temperatures, database[3, 4],
+                              TS_LENGTH),
+        rtol = 1e-12)
+
+
+def test_fleet_max_profiles_match_single_cars(car_inputs, database):
+    cars = [make_car(car_input, database, "python")
+            for car_input in car_inputs]
+    consumption = np.array([car.generate_consumption_profile(0, NO_OF_TS)
+                            for car in cars])
+    profiles = max_profiles_fleet(np.array([car.states for car in cars]),
+                                  consumption,
+                                  [car.capacity for car in cars],
+                                  [car.car_charging_power for car in cars],
+                                  MAX_CHARGE,
+                                  TS_LENGTH,
+                                  *CHARGING_PARAMETERS)
+    for k, car in enumerate(cars):
+        single = car.max_profile_generation(0, NO_OF_TS, *CHARGING_PARAMETERS)
+        for fleet_profile, profile in zip(profiles, single):
+            np.testing.assert_allclose(fleet_profile[k], profile,
+                                       rtol = 1e-12, atol = 1e-12)
+
+
+def reference_max_strategy(car_input, database):
+    """ segment escalation one segment after another (python backend)
+    returns final segment and profiles of max strategy (None: not feasible)
+    """
+    car = make_car(car_input, database, "python")
+    segment = car_input[3]
+    while True:
+        car.set_segment(segment)
+        profiles = car.max_profile_generation(0, NO_OF_TS, *CHARGING_PARAMETERS)
+        if not (profiles[0] < car.min_state_of_charge).any():
+            return segment, profiles
+        if segment not in [1,2,3,4,5]:
+            return segment, None
+        segment = segment + 1
+
+
+def test_max_strategy_escalation_matches_reference(car_inputs, database):
+    escalated = 0
+    not_feasible = 0
+    for car_input in car_inputs:
+        segment, reference = reference_max_strategy(car_input, database)
+        car = make_car(car_input, database, "python")
+        profiles = car.max_state_of_charge_profile(0, NO_OF_TS,
+                                                   *CHARGING_PARAMETERS)
+        assert car.segment == segment
+        escalated = escalated + (segment != car_input[3])
+        if reference is None:
+            assert profiles is None
+            not_feasible = not_feasible + 1
+            continue
+        for profile, reference_profile in zip(profiles, reference):
+            np.testing.assert_allclose(profile, reference_profile,
+                                       rtol = 1e-12, atol = 1e-12)
+        assert car.time_z == np.argmin(reference[0])
+    # test data covers escalation and cars without feasible segment
+    assert escalated > 1
+    assert not_feasible > 0
+
+
+def test_required_capacity(car_inputs, database):
+    car = make_car(car_inputs[0], database)
+    assert car.max_state_of_charge_profile(0, NO_OF_TS,
+                                           *CHARGING_PARAMETERS) is not None
+    capacity = car.get_required_capacity(0, NO_OF_TS, *CHARGING_PARAMETERS)
+    assert 0 <= capacity <= car.capacity
+
+    car.min_charge = car.max_charge
+    with pytest.raises(ValueError):
+        car.get_required_capacity(0, NO_OF_TS, *CHARGING_PARAMETERS)
+
+
+@pytest.mark.parametrize("backend", ["compiled", "events"])
+def test_backends_match_python(car_inputs, database, backend):
+    for car_input in car_inputs:
+        reference = make_car(car_input, database, "python")
+        car = make_car(car_input, database, backend)
+        for strategy in ["max_state_of_charge_profile",
+                         "min_state_of_charge_profile"]:
+            reference_profiles = getattr(reference, strategy)(
+                0, NO_OF_TS, *CHARGING_PARAMETERS)
+            profiles = getattr(car, strategy)(0, NO_OF_TS,
+                                              *CHARGING_PARAMETERS)
+            assert car.segment == reference.segment
+            assert car.time_z == reference.time_z
+            if reference_profiles is None:     # not feasible
+                assert profiles is None
+                break
+            for profile, reference_profile in zip(profiles,
+                                                  reference_profiles):
+                np.testing.assert_allclose(profile, reference_profile,
+                                           rtol = 1e-9, atol = 1e-9)
+
+
+def test_compiled_backend_runs_kernels_once(monkeypatch, car_inputs, 
+                                            database):
+    calls = {"max_soc_kernel": 0, "max_soc_segments_kernel": 0}
+    for name in calls:
+        def counting_kernel(*args, name = name, 
+                            kernel = getattr(soc_kernels, name)):
+            calls[name] = calls[name] + 1
+            return kernel(*args)
+        monkeypatch.setattr(soc_kernels, name, counting_kernel)
+    escalated = 0
+    for car_input in car_inputs:
+        car = make_car(car_input, database, "compiled")
+        car.max_state_of_charge_profile(0, NO_OF_TS, *CHARGING_PARAMETERS)
+        escalated = escalated + (car.segment != car_input[3])
+        # one batched feasibility check and one run for final segment
+        assert calls == {"max_soc_kernel": 1, "max_soc_segments_kernel": 1}
+        calls.update({"max_soc_kernel": 0, "max_soc_segments_kernel": 0})
+    assert escalated > 1
+
+
+@pytest.mark.parametrize("initial_charge", [None, 0.5])
+def test_segment_feasibility_matches_python(car_inputs, database, 
+                                            initial_charge):
+    segments = np.arange(1, 7)
+    capacities = database[segments, 3]
+    initial_state_of_charge = None
+    if initial_charge is not None:
+        initial_state_of_charge = initial_charge * capacities
+    for car_input in car_inputs:
+        reference = make_car(car_input, database, "python")
+        car = make_car(car_input, database, "compiled")
+        reference_feasible, reference_ends = (
+            reference.get_segment_feasibility(0, NO_OF_TS, 
+                                              *CHARGING_PARAMETERS, 
+                                              segments, 
+                                              initial_state_of_charge))
+        feasible, ends = car.get_segment_feasibility(0, NO_OF_TS, 
+                                                     *CHARGING_PARAMETERS, 
+                                                     segments, 
+                                                     initial_state_of_charge,
+                                                     False)
+        np.testing.assert_array_equal(feasible, reference_feasible)
+        np.testing.assert_allclose(ends[feasible], 
+                                   reference_ends[feasible], 
+                                   rtol = 1e-9, atol = 1e-9)
+
+        # stop after lowest feasible segment
+        feasible = car.get_segment_feasibility(0, NO_OF_TS, 
+                                               *CHARGING_PARAMETERS, 
+                                               segments, 
+                                               initial_state_of_charge)[0]
+        assert feasible.sum() == reference_feasible.any()
+        assert np.argmax(feasible) == np.argmax(reference_feasible)
+
+
+def test_consumption_cache_kept_across_segments(monkeypatch, car_inputs,
+                                                database):
+    calls = []
+    consumption_profiles = car_module.consumption_profiles
+    def counting_consumption_profiles(*args):
+        calls.append(args)
+        return consumption_profiles(*args)
+    monkeypatch.setattr(car_module, "consumption_profiles",
+                        counting_consumption_profiles)
+    car = make_car(car_inputs[-2], database, "python")     # 100 km trip
+    car.max_state_of_charge_profile(0, NO_OF_TS, *CHARGING_PARAMETERS)
+    assert car.segment == 2
+    computed = len(calls)
+
+    # escalation, sweep: set_segment() keeps consumption of all segments
+    for segment in [1, 2, 3, 1]:
+        car.set_segment(segment)
+        car.get_feasible_segment(0, NO_OF_TS, *CHARGING_PARAMETERS)
+        car.max_state_of_charge_profile(0, NO_OF_TS, *CHARGING_PARAMETERS)
+    assert len(calls) == computed
+    np.testing.assert_array_equal(car.generate_consumption_profile(0,
+                                                                   NO_OF_TS,
+                                                                   3),
+                                  car.cache[("consumption", 3, 0, NO_OF_TS,
+                                             TS_LENGTH)])
+
+
+def test_charging_options_and_power(database):
+    states = np.array([8, 1, 2, 14, 8, 3, 0, 2, 8])
+    car = Car(states, np.where(states == 14, 50, 0), np.zeros(len(states)),
+              3, database, MIN_CHARGE, MAX_CHARGE, TS_LENGTH)
+    chrg_opts = car.get_charging_options(0, len(states))
+    assert chrg_opts.dtype == np.uint8
+    np.testing.assert_array_equal(
+        chrg_opts,
+        [soc_kernels.HOME, soc_kernels.WORK, soc_kernels.WORK,
+         soc_kernels.NO_CHARGING, soc_kernels.HOME, soc_kernels.NO_CHARGING,
+         soc_kernels.NO_CHARGING, soc_kernels.WORK, soc_kernels.HOME])
+    np.testing.assert_array_equal(
+        car.get_charging_power(0, len(states), 11, 3.7),
+        [11, 3.7, 3.7, 0, 11, 0, 0, 3.7, 11])
+
+
+def test_resume_profiles_match_full_run(car_inputs, database):
+    for car_input in car_inputs:
+        car = make_car(car_input, database)
+        max_strategy = car.max_state_of_charge_profile(0, NO_OF_TS,
+                                                       *CHARGING_PARAMETERS)
+        if max_strategy is None:
+            continue
+        min_strategy = car.just_in_time_profile(0, NO_OF_TS,
+                                                *CHARGING_PARAMETERS)
+        for checkpoint in car.get_checkpoints([143, 500], max_strategy[0],
+                                              min_strategy[0]):
+            t = checkpoint["timestep"] + 1
+            resumed = car.resume_profiles(checkpoint, NO_OF_TS,
+                                          *CHARGING_PARAMETERS)
+            for profile, full_profile in zip(resumed[0], max_strategy):
+                np.testing.assert_allclose(profile, full_profile[t:],
+                                           rtol = 1e-9, atol = 1e-9)
+            for profile, full_profile in zip(resumed[1], min_strategy):
+                np.testing.assert_allclose(profile, full_profile[t:],
+                                           rtol = 1e-9, atol = 1e-9)
+            assert resumed[2]["segment"] == checkpoint["segment"]
+            assert np.isclose(resumed[2]["required_state_of_charge"],
+                              checkpoint["required_state_of_charge"])
+
+
+def test_resume_profiles_with_higher_segment(car_inputs, database):
+    car = make_car(car_inputs[-2], database)     # 100 km trip at ts 300
+    assert car.segment == 1
+    checkpoint = {"timestep": 250,
+                  "segment": 1,
+                  "state_of_charge": float(car.max_state_of_charge),
+                  "required_state_of_charge": 0.0}
+    resumed = car.resume_profiles(checkpoint, NO_OF_TS,
+                                  *CHARGING_PARAMETERS)
+
+    # suffix needs segment 2, car itself is not changed
+    assert resumed[2]["segment"] == 2
+    assert car.segment == 1
+    assert car.capacity == database[1, 3]
+
+    suffix = Car(car.states[251:], car.speeds[251:],
+                 car.temperature_array[251:], 2, database, MIN_CHARGE,
+                 MAX_CHARGE, TS_LENGTH, "python")
+    suffix.car_charging_power = car.car_charging_power
+    reference = suffix.max_profile_generation(0, NO_OF_TS - 251,
+                                              *CHARGING_PARAMETERS,
+                                              checkpoint["state_of_charge"])
+    for profile, reference_profile in zip(resumed[0], reference):
+        np.testing.assert_allclose(profile, reference_profile,
+                                   rtol = 1e-9, atol = 1e-9)
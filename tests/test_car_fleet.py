@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""test_car_fleet.py
+
+Tests of CarFleet against single Car objects.
+"""
+
+import numpy as np
+from conftest import (NO_OF_TS, TS_LENGTH, MIN_CHARGE, MAX_CHARGE,
+                      CHARGING_PARAMETERS)
+from classes.car_fleet import CarFleet
+from test_car import make_car
+
+
+def make_fleet(car_inputs, database):
+    return CarFleet([car_input[0] for car_input in car_inputs],
+                    [car_input[1] for car_input in car_inputs],
+                    [car_input[2] for car_input in car_inputs],
+                    [car_input[3] for car_input in car_inputs],
+                    database, MIN_CHARGE, MAX_CHARGE, TS_LENGTH)
+
+
+def test_fleet_matches_cars(car_inputs, database):
+    fleet = make_fleet(car_inputs, database)
+    max_out = fleet.max_state_of_charge_profiles(0, NO_OF_TS,
+                                                 *CHARGING_PARAMETERS)
+    min_out = fleet.min_state_of_charge_profiles(0, NO_OF_TS,
+                                                 *CHARGING_PARAMETERS)
+    assert (~fleet.feasible).any()
+    for i, car_input in enumerate(car_inputs):
+        car = make_car(car_input, database, "python")
+        max_strategy = car.max_state_of_charge_profile(0, NO_OF_TS,
+                                                       *CHARGING_PARAMETERS)
+        assert fleet.segments[i] == np.ravel(car.segment)[0]
+        assert fleet.feasible[i] == (max_strategy is not None)
+        if max_strategy is None:
+            continue
+        min_strategy = car.min_state_of_charge_profile(0, NO_OF_TS,
+                                                       *CHARGING_PARAMETERS)
+        assert fleet.time_z[i] == car.time_z
+        for k in range(7):
+            np.testing.assert_allclose(max_out[k, i], max_strategy[k],
+                                       rtol = 1e-9, atol = 1e-9)
+            np.testing.assert_allclose(min_out[k, i], min_strategy[k],
+                                       rtol = 1e-9, atol = 1e-9)
+
+        # per-row view
+        np.testing.assert_array_equal(
+            fleet[i].generate_consumption_profile(0, NO_OF_TS),
+            car.generate_consumption_profile(0, NO_OF_TS))
+
+
+def test_fleet_rows_keep_charging_power(car_inputs, database):
+    fleet = make_fleet(car_inputs, database)
+    max_out = fleet.max_state_of_charge_profiles(0, NO_OF_TS,
+                                                 *CHARGING_PARAMETERS)
+    escalated = 0
+    for i, car_input in enumerate(car_inputs):
+        car = fleet[i]
+        assert car.segment == fleet.segments[i]
+        assert car.feasible == fleet.feasible[i]
+        assert car.time_z == fleet.time_z[i]
+        assert car.car_charging_power == database[car_input[3], 5]
+        if (fleet.segments[i] == car_input[3]) or not fleet.feasible[i]:
+            continue
+        escalated = escalated + 1
+        profiles = car.max_state_of_charge_profile(0, NO_OF_TS,
+                                                   *CHARGING_PARAMETERS)
+        for k in range(7):
+            np.testing.assert_allclose(profiles[k], max_out[k, i],
+                                       rtol = 1e-9, atol = 1e-9)
+    assert escalated > 1
+
+
+def test_fleet_consumption_cache(car_inputs, database):
+    fleet = make_fleet(car_inputs, database)
+    initial = fleet.segments.copy()
+    fleet.max_state_of_charge_profiles(0, NO_OF_TS, *CHARGING_PARAMETERS)
+    cached = dict(fleet.cache)
+    fleet.set_segments(initial)
+    fleet.max_state_of_charge_profiles(0, NO_OF_TS, *CHARGING_PARAMETERS)
+    assert fleet.cache.keys() == cached.keys()
+    assert all(fleet.cache[key] is cached[key] for key in cached)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""test_car_segment_index.py
+
+Tests of CarSegmentIndex against scans of the TANK data set per car.
+"""
+
+import numpy as np
+from classes.car_segment_index import CarSegmentIndex, SEGMENT_COLUMN
+
+
+def reference_segment(csv_cars, ID, car):
+    """ segment of car number car of household ID, one scan per car
+    (if no valid segment is given: 3)
+    """
+    cars = csv_cars[np.where(csv_cars[:,0] == ID)]
+    segment = cars[car : car + 1, SEGMENT_COLUMN]
+    if (len(segment) == 0) or (segment[0] not in range(1, 14)):
+        return 3
+    return int(segment[0])
+
+
+def test_segments_match_scan(mop_data):
+    csv_cars = mop_data[3].copy()
+    csv_cars[0, SEGMENT_COLUMN] = np.nan
+    csv_cars[1, SEGMENT_COLUMN] = 2.5
+    csv_cars[2, SEGMENT_COLUMN] = 20
+    csv_cars[3, SEGMENT_COLUMN] = 13
+    # header row and cars of one household in non-contiguous rows
+    header = np.full((1, csv_cars.shape[1]), np.nan)
+    csv_cars = np.concatenate((header, csv_cars, csv_cars[-3:-2]))
+    csv_cars[-1, SEGMENT_COLUMN] = 5
+
+    car_segment_index = CarSegmentIndex(csv_cars)
+    IDs = np.unique(csv_cars[1:,0]).astype(np.int64)
+    assert len(car_segment_index) == len(IDs)
+    for ID in IDs.tolist() + [int(IDs[0]) - 1]:
+        counts = (csv_cars[:,0] == ID).sum()
+        assert len(car_segment_index.get_segments(ID)) == counts
+        for car in range(counts + 2):
+            assert (car_segment_index.get_segment(ID, car)
+                    == reference_segment(csv_cars, ID, car))
+    assert car_segment_index.get_segments(csv_cars[-1,0])[-1] == 5
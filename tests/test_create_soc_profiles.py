@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""test_create_soc_profiles.py
+
+Tests of create_soc_profiles(): results, parallel mode.
+"""
+
+import numpy as np
+from conftest import (NO_OF_TS, TS_LENGTH, MIN_CHARGE, MAX_CHARGE,
+                      CHARGING_PARAMETERS)
+from classes.profile_store import ProfileStore
+from functions.create_soc_profiles import create_soc_profiles
+from test_car import reference_max_strategy
+from test_parameter_sweep import run_create_soc_profiles
+
+
+def test_results(tmp_path, households, mop_data, weather, database,
+                 car_inputs):
+    results, store = run_create_soc_profiles(households, mop_data, weather,
+                                             database, str(tmp_path))
+    assert [result["household_ID"] for result in results] == households
+    cars = [car for result in results for car in result["cars"]]
+    assert len(cars) == len(car_inputs)
+    for car, car_input in zip(cars, car_inputs):
+        segment, profiles = reference_max_strategy(car_input, database)
+        assert car["segment"] == segment
+        assert car["feasible"] == (profiles is not None)
+    warnings = [warning for result in results
+                for warning in result["warnings"]]
+    assert any("Segment is adjusted" in warning for warning in warnings)
+    assert any("not possible" in warning for warning in warnings)
+
+
+def test_parallel_matches_sequential(tmp_path, households, mop_data,
+                                     weather, database):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    sequential = run_create_soc_profiles(households, mop_data, weather,
+                                         database, str(tmp_path))
+    parallel_file = str(tmp_path / "parallel.npz")
+    parallel = create_soc_profiles(households, meta_data_all, states_all,
+                                   speeds_all, 0, NO_OF_TS, NO_OF_TS,
+                                   TS_LENGTH, *CHARGING_PARAMETERS, MIN_CHARGE,
+                                   MAX_CHARGE, weather, csv_cars, database,
+                                   str(tmp_path), processes = 2,
+                                   chunk_size = 3,
+                                   store_file = parallel_file)
+    assert parallel == sequential[0]
+    store = ProfileStore.load(parallel_file)
+    for column in store.profiles:
+        np.testing.assert_array_equal(store.profiles[column],
+                                      sequential[1].profiles[column])
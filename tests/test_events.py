@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""test_events.py
+
+Tests of CarEvents: run-length encoding and event-based max/min strategy
+against the timestep-based reference of Car.
+"""
+
+import numpy as np
+from conftest import NO_OF_TS, TS_LENGTH, CHARGING_PARAMETERS
+from classes import soc_kernels
+from classes.events import CarEvents, DRIVING
+from test_car import make_car
+
+
+def test_events_cover_profile(car_inputs, database):
+    for car_input in car_inputs:
+        car = make_car(car_input, database)
+        consumption = car.generate_consumption_profile(0, NO_OF_TS)
+        locations = car.get_charging_options(0, NO_OF_TS)
+        events = CarEvents(consumption, locations)
+        assert events.starts[0] == 0
+        assert events.ends[-1] == NO_OF_TS
+        np.testing.assert_array_equal(events.starts[1:], events.ends[:-1])
+        kinds = np.repeat(events.kinds, events.ends - events.starts)
+        np.testing.assert_array_equal(
+            kinds, np.where(consumption != 0, DRIVING, locations))
+
+
+def test_max_strategy_with_initial_state_of_charge(car_inputs, database):
+    for car_input in car_inputs:
+        car = make_car(car_input, database, "python")
+        if car.segment not in [1,2,3,4,5,6]:
+            continue
+        capacity = np.ravel(car.capacity)[0]
+        max_state_of_charge = np.ravel(car.max_state_of_charge)[0]
+        events = CarEvents(car.generate_consumption_profile(0, NO_OF_TS),
+                           car.get_charging_options(0, NO_OF_TS))
+        for initial_state_of_charge in [None, 0.3 * capacity]:
+            reference = car.max_profile_generation(0, NO_OF_TS,
+                                                   *CHARGING_PARAMETERS,
+                                                   initial_state_of_charge)
+            pieces = events.max_strategy(capacity,
+                                         np.ravel(car.car_charging_power)[0],
+                                         max_state_of_charge,
+                                         TS_LENGTH,
+                                         *CHARGING_PARAMETERS,
+                                         initial_state_of_charge)
+            profiles = events.expand_max(pieces, CHARGING_PARAMETERS[3])
+            for profile, reference_profile in zip(profiles, reference):
+                np.testing.assert_allclose(profile, reference_profile,
+                                           rtol = 1e-9, atol = 1e-9)
+
+
+def test_charge_matches_timestep_iteration():
+    # one dwell at home through all charging power bands of the car
+    capacity = 50
+    car_chrg_pwr = 22
+    for rising, start, limit in [(True, 5.0, 49.0), (False, 49.0, 5.0)]:
+        charging = CarEvents(np.zeros(1), np.ones(1)).charge(
+            start, 200, limit, capacity, car_chrg_pwr, 11, TS_LENGTH, 0.95,
+            rising)
+        state_of_charge = start
+        deltas = []
+        for i in range(200):
+            pwr = soc_kernels.car_charging_power(state_of_charge,
+                                                 capacity, car_chrg_pwr)
+            room = (limit - state_of_charge if rising
+                    else state_of_charge - limit)
+            delta = min(min(11, pwr) * (TS_LENGTH/60) * 0.95, room)
+            state_of_charge = state_of_charge + (delta if rising else -delta)
+            deltas.append(delta)
+        assert sum(n for n, delta in charging) == 200
+        np.testing.assert_allclose(
+            np.repeat([delta for n, delta in charging],
+                      [n for n, delta in charging]),
+            deltas, rtol = 1e-12, atol = 1e-12)
+
+
+def test_just_in_time_profile(car_inputs, database):
+    dischrg_eff = CHARGING_PARAMETERS[3]
+    for car_input in car_inputs:
+        car = make_car(car_input, database)
+        if car.segment not in [1,2,3,4,5,6]:
+            continue
+        # no max strategy needed before just in time charging
+        profiles = car.just_in_time_profile(0, NO_OF_TS, *CHARGING_PARAMETERS)
+        assert len(profiles) == 7
+        state_of_charge, chrg = profiles[0], profiles[1]
+        consumption = car.generate_consumption_profile(0, NO_OF_TS)
+        min_state_of_charge = np.ravel(car.min_state_of_charge)[0]
+
+        # energy balance of every timestep, min soc at last timestep
+        before = np.concatenate(([car.required_state_of_charge],
+                                 state_of_charge[:-1]))
+        np.testing.assert_allclose(state_of_charge - before,
+                                   chrg - consumption / dischrg_eff,
+                                   atol = 1e-9)
+        assert np.isclose(state_of_charge[-1], min_state_of_charge)
+        assert (state_of_charge >= min_state_of_charge - 1e-9).all()
+        assert car.required_state_of_charge >= min_state_of_charge - 1e-9
+
+        # one row per trip, energy of all trips
+        requirements = car.get_trip_requirements(0, NO_OF_TS,
+                                                 *CHARGING_PARAMETERS)
+        trips = np.diff(np.concatenate(([0], consumption != 0, [0])))
+        assert len(requirements) == (trips == 1).sum()
+        assert np.isclose(requirements[:,2].sum(),
+                          consumption.sum() / dischrg_eff)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""test_hard_factor_index.py
+
+Tests of HardFactorIndex against masks over all households.
+"""
+
+import itertools
+import numpy as np
+from conftest import NO_OF_TS, TS_LENGTH
+from classes.hard_factor_index import HardFactorIndex, HARD_FACTORS
+from classes.household_index import HouseholdIndex
+from functions.household_features import household_features
+
+
+def test_candidates_match_masks(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    features = household_features(HouseholdIndex(meta_data_all), states_all,
+                                  speeds_all, NO_OF_TS, TS_LENGTH)
+    factor_index = HardFactorIndex(features)
+    np.testing.assert_array_equal(factor_index.get_candidates(),
+                                  np.arange(len(features["household_ID"])))
+    for values in itertools.product(range(0, 6), repeat = 3):
+        query = dict(zip(HARD_FACTORS, values))
+        mask = np.ones(len(features["household_ID"]), dtype = bool)
+        for factor, value in query.items():
+            mask = mask & (features[factor] == value)
+        np.testing.assert_array_equal(factor_index.get_candidates(**query),
+                                      np.flatnonzero(mask))
+
+    for low, high in [(1, 2), (2, 4), (0, 0), (3, 10)]:
+        mask = ((features["number_of_occupants"] >= low)
+                & (features["number_of_occupants"] <= high)
+                & (features["number_of_cars"] >= 1)
+                & (features["number_of_cars"] <= 2))
+        np.testing.assert_array_equal(
+            factor_index.get_range_candidates(number_of_occupants = (low,
+                                                                     high),
+                                              number_of_cars = (1, 2)),
+            np.flatnonzero(mask))
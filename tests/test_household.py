@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""test_household.py
+
+Tests of Household: per-member aggregates and mobility profiles of cars
+against the member-by-member reference.
+"""
+
+import numpy as np
+from conftest import NO_OF_TS, TS_LENGTH
+from classes.household import Household
+from classes.household_index import HouseholdIndex
+
+
+def make_households(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    household_index = HouseholdIndex(meta_data_all)
+    for ID in household_index.household_IDs:
+        rows = household_index.get_rows(ID)
+        yield Household(household_index.get_positions(ID),
+                        household_index.get_meta_data(ID),
+                        states_all[rows],
+                        speeds_all[rows],
+                        NO_OF_TS,
+                        TS_LENGTH)
+
+
+def reference_aggregates(household, start, end):
+    """ speeds, distances, number of drivers, driven distances and driver
+    positions calculated member by member
+    """
+    states = household.states[:, start:end]
+    speeds = np.where(states == 14, household.speeds[:, start:end], 0)
+    distances = np.where(states == 14, speeds * TS_LENGTH / 60, 0)
+    drivers = []
+    driven_distances = []
+    for i in range(len(household.positions)):
+        if (states[i] == 14).sum() > 0:
+            drivers.append(household.positions[i])
+        driven_distances.append(sum(distances[i]))
+    driver_positions = [x for _, x in sorted(zip(driven_distances, drivers),
+                                             reverse = True)]
+    return speeds, distances, len(drivers), driven_distances, driver_positions
+
+
+def test_member_aggregates_match_reference(mop_data):
+    for household in make_households(mop_data):
+        for start, end in [(0, NO_OF_TS), (144, 600)]:
+            reference = reference_aggregates(household, start, end)
+            np.testing.assert_array_equal(household.get_speeds(start, end),
+                                          reference[0])
+            np.testing.assert_array_equal(
+                household.get_distances(start, end), reference[1])
+            assert household.get_number_of_drivers(start, end) == reference[2]
+            np.testing.assert_allclose(
+                household.get_driven_distances(start, end), reference[3],
+                rtol = 1e-12)
+            assert (household.get_driver_positions(start, end)
+                    == reference[4])
+        assert np.isclose(household.driven_distance,
+                          reference_aggregates(household, 0, NO_OF_TS)[3][0])
+
+        # aggregates are computed once per timespace and read only
+        aggregates = household.get_member_aggregates(0, NO_OF_TS)
+        assert household.get_member_aggregates(0, NO_OF_TS) is aggregates
+        assert not aggregates["speeds"].flags.writeable
+
+
+def reference_mobility_profiles(household, start, end):
+    """ states and speeds profiles of cars, drivers after the last car are
+    merged two at a time (last two profiles, repeatedly)
+    """
+    drivers = household.get_driver_positions(start, end)
+    positions = np.array(drivers, dtype = int) - household.first_position
+    states = [household.states[i, start:end] for i in positions]
+    speeds = [np.where(household.states[i, start:end] == 14,
+                       household.speeds[i, start:end], 0)
+              for i in positions]
+    while len(states) > household.number_of_cars:
+        states[-2] = np.where(states[-1] == 14, 14, states[-2])
+        speeds[-2] = np.where(speeds[-1] != 0, speeds[-1], speeds[-2])
+        states = states[:-1]
+        speeds = speeds[:-1]
+    states = np.array(states).reshape(-1, end - start)
+    speeds = np.array(speeds).reshape(-1, end - start)
+    return states, np.where(states == 14, speeds, 0)
+
+
+def test_mobility_profiles_match_reference(mop_data):
+    merged = 0
+    for household in make_households(mop_data):
+        states, speeds = household.generate_mobility_profiles(0, NO_OF_TS)
+        reference = reference_mobility_profiles(household, 0, NO_OF_TS)
+        np.testing.assert_array_equal(states, reference[0])
+        np.testing.assert_array_equal(speeds, reference[1])
+        np.testing.assert_array_equal(
+            household.generate_mobility_states_profiles(0, NO_OF_TS), states)
+        np.testing.assert_array_equal(
+            household.generate_mobility_speeds_profiles(0, NO_OF_TS), speeds)
+        merged = merged + (household.number_of_drivers
+                           > household.number_of_cars)
+    # test data covers households with more drivers than cars
+    assert merged > 0
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""test_household_index.py
+
+Tests of HouseholdIndex against scans of meta_data_all.
+"""
+
+import numpy as np
+import pytest
+from classes.household_index import HouseholdIndex
+
+
+def test_lookup_matches_scan(mop_data):
+    meta_data_all = mop_data[0]
+    # members of one household in non-contiguous rows
+    meta_data_all = np.concatenate((meta_data_all, meta_data_all[:1]))
+    household_index = HouseholdIndex(meta_data_all)
+    IDs = np.unique(meta_data_all[:,0])
+    np.testing.assert_array_equal(household_index.household_IDs, IDs)
+    assert len(household_index) == len(IDs)
+    for ID in IDs:
+        positions = np.where(meta_data_all[:,0] == ID)[0]
+        np.testing.assert_array_equal(household_index.get_positions(ID),
+                                      positions)
+        rows = household_index.get_rows(ID)
+        np.testing.assert_array_equal(np.arange(len(meta_data_all))[rows],
+                                      positions)
+        np.testing.assert_array_equal(household_index.get_meta_data(ID),
+                                      meta_data_all[positions].astype(int))
+    assert isinstance(household_index.get_rows(IDs[1]), slice)
+    assert not isinstance(household_index.get_rows(meta_data_all[0,0]),
+                          slice)
+
+
+def test_unknown_household(mop_data):
+    household_index = HouseholdIndex(mop_data[0])
+    assert 1 not in household_index
+    with pytest.raises(KeyError):
+        household_index.get_positions(1)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""test_parameter_sweep.py
+
+Tests of parameter_sweep() against create_soc_profiles().
+"""
+
+import os.path
+import numpy as np
+import pytest
+from conftest import (NO_OF_TS, TS_LENGTH, MIN_CHARGE, MAX_CHARGE,
+                      CHARGING_PARAMETERS)
+from classes.profile_store import ProfileStore
+from classes.weather_store import WeatherStore
+from functions.create_soc_profiles import create_soc_profiles
+from functions.parameter_sweep import (parameter_sweep, parameter_grid,
+                                       PROFILE_NAMES)
+
+
+def run_create_soc_profiles(households, mop_data, weather, database, path,
+                            min_charge = MIN_CHARGE,
+                            max_charge = MAX_CHARGE):
+    """ returns results and ProfileStore of create_soc_profiles()
+    """
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    store_file = os.path.join(path, "profiles.npz")
+    results = create_soc_profiles(households, meta_data_all, states_all,
+                                  speeds_all, 0, NO_OF_TS, NO_OF_TS,
+                                  TS_LENGTH, *CHARGING_PARAMETERS,
+                                  min_charge, max_charge, weather, csv_cars,
+                                  database, path, store_file = store_file)
+    return results, ProfileStore.load(store_file)
+
+
+def test_parameter_grid():
+    grid = parameter_grid(home_charging_power = [3.7, 11],
+                          min_charge = [0.1, 0.2, 0.3])
+    assert len(grid) == 6
+    assert grid[1] == {"home_charging_power": 3.7, "min_charge": 0.2}
+
+
+def test_single_parameter_set_matches_create_soc_profiles(
+        tmp_path, households, mop_data, weather, database):
+    results, store = run_create_soc_profiles(households, mop_data, weather,
+                                             database, str(tmp_path))
+    parameter_sets = parameter_grid(
+        home_charging_power = [CHARGING_PARAMETERS[0]],
+        work_charging_power = [CHARGING_PARAMETERS[1]],
+        charging_efficiency = [CHARGING_PARAMETERS[2]],
+        discharging_efficiency = [CHARGING_PARAMETERS[3]],
+        min_charge = [MIN_CHARGE],
+        max_charge = [MAX_CHARGE])
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    sweep = parameter_sweep(households, meta_data_all, states_all,
+                            speeds_all, 0, NO_OF_TS, NO_OF_TS, TS_LENGTH,
+                            parameter_sets, weather, csv_cars, database)
+
+    assert sweep["cars"] == list(zip(store.household_IDs.tolist(),
+                                     store.cars.tolist()))
+    np.testing.assert_array_equal(sweep["segments"][0], store.segments)
+    np.testing.assert_array_equal(sweep["feasible"][0], store.feasible)
+    assert (~store.feasible).any()
+    for name in PROFILE_NAMES:
+        if name in store.profiles:
+            np.testing.assert_allclose(sweep["profiles"][name][0],
+                                       store.profiles[name],
+                                       rtol = 1e-12, atol = 1e-12)
+
+
+def test_sweep_of_many_parameter_sets(tmp_path, households, mop_data,
+                                      weather, database):
+    parameter_sets = parameter_grid(
+        home_charging_power = [CHARGING_PARAMETERS[0]],
+        work_charging_power = [CHARGING_PARAMETERS[1]],
+        charging_efficiency = [CHARGING_PARAMETERS[2]],
+        discharging_efficiency = [CHARGING_PARAMETERS[3]],
+        min_charge = [MIN_CHARGE, 0.2],
+        max_charge = [MAX_CHARGE])
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    sweep = parameter_sweep(households, meta_data_all, states_all,
+                            speeds_all, 0, NO_OF_TS, NO_OF_TS, TS_LENGTH,
+                            parameter_sets, weather, csv_cars, database,
+                            bool_aggregate = True)
+    results, store = run_create_soc_profiles(households, mop_data, weather,
+                                             database, str(tmp_path),
+                                             min_charge = 0.2)
+    np.testing.assert_array_equal(sweep["feasible"][1], store.feasible)
+    assert sweep["max_load"].shape == (2, NO_OF_TS)
+
+
+def test_parameter_sets_are_checked(households, mop_data, weather, database):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    parameter_set = dict(zip(["home_charging_power", "work_charging_power",
+                              "charging_efficiency", 
+                              "discharging_efficiency"], 
+                             CHARGING_PARAMETERS))
+    parameter_set["min_charge"] = MIN_CHARGE
+    for parameter_sets in [[], [parameter_set]]:
+        with pytest.raises(ValueError):
+            parameter_sweep(households, meta_data_all, states_all,
+                            speeds_all, 0, NO_OF_TS, NO_OF_TS, TS_LENGTH,
+                            parameter_sets, weather, csv_cars, database)
+
+
+def test_weather_without_truncation(households, mop_data, weather, database):
+    parameter_sets = parameter_grid(
+        home_charging_power = [CHARGING_PARAMETERS[0]],
+        work_charging_power = [CHARGING_PARAMETERS[1]],
+        charging_efficiency = [CHARGING_PARAMETERS[2]],
+        discharging_efficiency = [CHARGING_PARAMETERS[3]],
+        min_charge = [MIN_CHARGE],
+        max_charge = [MAX_CHARGE])
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    args = (households, meta_data_all, states_all, speeds_all, 0, NO_OF_TS,
+            NO_OF_TS, TS_LENGTH, parameter_sets, weather, csv_cars, database)
+    truncated = parameter_sweep(*args)
+    sweep = parameter_sweep(*args, bool_truncate_temperatures = False)
+    reference = parameter_sweep(*args, weather_store = WeatherStore(
+        weather, bool_truncate = False))
+    for name in PROFILE_NAMES:
+        np.testing.assert_array_equal(sweep["profiles"][name],
+                                      reference["profiles"][name])
+    assert not np.array_equal(sweep["profiles"]["max_state_of_charge"],
+                              truncated["profiles"]["max_state_of_charge"],
+                              equal_nan = True)
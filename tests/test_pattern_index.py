@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""test_pattern_index.py
+
+Tests of PatternIndex against cosine similarities of all households.
+"""
+
+import numpy as np
+import pytest
+from conftest import NO_OF_TS, TS_LENGTH
+from classes.household_index import HouseholdIndex
+from classes.pattern_index import PatternIndex
+
+
+def test_query_matches_cosine_similarity(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    household_index = HouseholdIndex(meta_data_all)
+    pattern_index = PatternIndex(household_index, states_all, speeds_all,
+                                 NO_OF_TS, TS_LENGTH)
+    assert pattern_index.patterns.shape == (len(household_index), 168)
+
+    distances = np.where(states_all == 14, speeds_all * TS_LENGTH / 60, 0)
+    patterns = []
+    for ID in household_index.household_IDs:
+        household = distances[meta_data_all[:,0] == ID].sum(axis = 0)
+        patterns.append(household.reshape(168, 6).sum(axis = 1))
+    patterns = np.array(patterns)
+    np.testing.assert_allclose(pattern_index.patterns, patterns,
+                               rtol = 1e-12)
+
+    for k, ID in enumerate(household_index.household_IDs):
+        norms = np.linalg.norm(patterns, axis = 1) * np.linalg.norm(
+            patterns[k])
+        similarities = np.divide(patterns @ patterns[k], norms,
+                                 out = np.zeros(len(patterns)),
+                                 where = norms > 0)
+        IDs, best = pattern_index.query_household(ID, 3)
+        np.testing.assert_allclose(best, -np.sort(-similarities)[:3],
+                                   atol = 1e-12)
+        rows = np.searchsorted(household_index.household_IDs, IDs)
+        np.testing.assert_allclose(similarities[rows], best, atol = 1e-12)
+
+
+def test_unknown_household(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    household_index = HouseholdIndex(meta_data_all)
+    pattern_index = PatternIndex(household_index, states_all, speeds_all,
+                                 NO_OF_TS, TS_LENGTH)
+    for ID in [household_index.household_IDs[0] - 1,
+               household_index.household_IDs[0] + 1,
+               household_index.household_IDs[-1] + 1]:
+        if ID in household_index:
+            continue
+        with pytest.raises(KeyError):
+            pattern_index.query_household(ID, 3)
+
+
+def test_bin_length_must_be_multiple_of_ts_length(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    household_index = HouseholdIndex(meta_data_all)
+    for bin_length in [0, -60, 5, 25]:
+        with pytest.raises(ValueError):
+            PatternIndex(household_index, states_all, speeds_all,
+                         NO_OF_TS, TS_LENGTH, bin_length)
+    pattern_index = PatternIndex(household_index, states_all, speeds_all,
+                                 NO_OF_TS, TS_LENGTH, 120)
+    assert pattern_index.patterns.shape == (len(household_index), 84)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""test_profile_store.py
+
+Tests of ProfileStore: .npz round trip and csv.-export against
+create_soc_profiles(bool_create_csv = True).
+"""
+
+import os
+import numpy as np
+from conftest import (NO_OF_TS, TS_LENGTH, MIN_CHARGE, MAX_CHARGE,
+                      CHARGING_PARAMETERS)
+from classes.profile_store import ProfileStore, PROFILE_COLUMNS
+from functions.create_soc_profiles import create_soc_profiles
+
+
+def test_store_round_trip_and_csv_export(tmp_path, households, mop_data,
+                                         weather, database):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    csv_path = tmp_path / "csv"
+    export_path = tmp_path / "export"
+    csv_path.mkdir()
+    export_path.mkdir()
+    store_file = str(tmp_path / "profiles.npz")
+    results = create_soc_profiles(households, meta_data_all, states_all,
+                                  speeds_all, 0, NO_OF_TS, NO_OF_TS,
+                                  TS_LENGTH, *CHARGING_PARAMETERS,
+                                  MIN_CHARGE, MAX_CHARGE, weather, csv_cars,
+                                  database, str(csv_path),
+                                  bool_create_csv = True,
+                                  store_file = store_file)
+    assert all("profiles" not in car for result in results
+               for car in result["cars"])
+
+    store = ProfileStore.load(store_file)
+    cars = [(result["household_ID"], car) for result in results
+            for car in result["cars"]]
+    assert len(store) == len(cars)
+    for k, (ID, car) in enumerate(cars):
+        assert store.get_row(ID, car["car"]) == k
+        assert store.segments[k] == car["segment"]
+        assert store.feasible[k] == car["feasible"]
+        profiles = store.get_profiles(ID, car["car"])
+        assert profiles.shape == (NO_OF_TS, len(PROFILE_COLUMNS))
+        assert np.isnan(profiles).all() != car["feasible"]
+
+    # csv.-export: same files as create_soc_profiles()
+    store.export_csv(str(export_path))
+    files = sorted(os.listdir(csv_path))
+    assert len(files) == store.feasible.sum()
+    assert sorted(os.listdir(export_path)) == files
+    for file in files:
+        assert ((export_path / file).read_bytes()
+                == (csv_path / file).read_bytes())
+
+    # compressed, float32
+    ProfileStore(store.household_IDs, store.cars, store.segments,
+                 store.feasible,
+                 {column: profiles.astype(np.float32)
+                  for column, profiles in store.profiles.items()}).save(
+                     str(tmp_path / "profiles32.npz"), bool_compress = True)
+    store32 = ProfileStore.load(str(tmp_path / "profiles32.npz"))
+    for column in PROFILE_COLUMNS:
+        assert store32.profiles[column].dtype == np.float32
+        np.testing.assert_allclose(store32.profiles[column],
+                                   store.profiles[column], rtol = 1e-6)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""test_rank_households.py
+
+Tests of household features and ranking against Household objects.
+"""
+
+import numpy as np
+from conftest import NO_OF_TS, TS_LENGTH
+from classes.household_index import HouseholdIndex
+from functions.household_features import household_features, FEATURES
+from functions.household_feature_table import (household_feature_table,
+                                               feature_table_key)
+from functions.rank_households import rank_households
+from functions.rank_households_batch import rank_households_batch
+from test_household import make_households
+
+# weights of soft factors (income, population, year of birth, job, distance)
+WEIGHTS = (0.3, 0.1, 0.2, 0.15, 0.25)
+
+
+def points(difference, limits, pts):
+    """ points of first limit that is not exceeded by difference
+    """
+    for limit, pt in zip(limits, pts):
+        if abs(difference) <= limit:
+            return pt
+    return 0
+
+
+def reference_ranking(mop_data, target, quantity):
+    """ ranking household by household (Household objects)
+    """
+    households = []
+    score_array = []
+    for household in make_households(mop_data):
+        if ((household.number_of_occupants != target["number_of_occupants"])
+                or (household.number_of_drivers
+                    != target["number_of_drivers"])
+                or (household.number_of_cars != target["number_of_cars"])):
+            continue
+        households.append(int(household.household_ID))
+        score_array.append(sum([
+            points(household.income - target["income"], [0, 1], [2, 1])
+            * target["w_income"],
+            points(household.population - target["population"], [0, 1],
+                   [2, 1]) * target["w_population"],
+            points(household.year_of_birth - target["year_of_birth"],
+                   [10, 20], [2, 1]) * target["w_year_of_birth"],
+            points(household.job - target["job"], [0, 1], [2, 1])
+            * target["w_job"],
+            points(household.driven_distance - target["distance"],
+                   [100, 200, 500], [2, 1, 0.5]) * target["w_distance"]]))
+    ranked = [x for _, x in sorted(zip(score_array, households))][::-1]
+    return ranked if quantity == "all" else ranked[0:quantity]
+
+
+def make_targets(mop_data):
+    """ one target per household (hard factors of household, soft factors
+    of the next household)
+    """
+    households = list(make_households(mop_data))
+    targets = []
+    for household, other in zip(households, households[1:] + households[:1]):
+        targets.append({"number_of_occupants": household.number_of_occupants,
+                        "number_of_drivers": household.number_of_drivers,
+                        "number_of_cars": household.number_of_cars,
+                        "income": other.income,
+                        "w_income": WEIGHTS[0],
+                        "population": other.population,
+                        "w_population": WEIGHTS[1],
+                        "year_of_birth": other.year_of_birth,
+                        "w_year_of_birth": WEIGHTS[2],
+                        "job": other.job,
+                        "w_job": WEIGHTS[3],
+                        "distance": other.driven_distance,
+                        "w_distance": WEIGHTS[4]})
+    return targets
+
+
+def test_household_features_match_households(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    features = household_features(HouseholdIndex(meta_data_all), states_all,
+                                  speeds_all, NO_OF_TS, TS_LENGTH)
+    for k, household in enumerate(make_households(mop_data)):
+        assert features["household_ID"][k] == household.household_ID
+        for feature in ["number_of_occupants", "number_of_drivers",
+                        "number_of_cars", "income", "population",
+                        "year_of_birth", "job"]:
+            assert features[feature][k] == getattr(household, feature)
+        assert np.isclose(features["driven_distance"][k],
+                          household.driven_distance)
+        distances = features["member_distances"][k]
+        np.testing.assert_allclose(distances[~np.isnan(distances)],
+                                   household.get_driven_distances(
+                                       0, NO_OF_TS))
+
+
+def test_rank_households_matches_reference(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    for target in make_targets(mop_data):
+        for quantity in ["all", 1]:
+            ranked = rank_households(meta_data_all, states_all, speeds_all,
+                                     NO_OF_TS, TS_LENGTH,
+                                     quantity = quantity, **target)
+            assert ranked == reference_ranking(mop_data, target, quantity)
+            assert len(ranked) > 0
+
+
+def test_feature_table_round_trip(tmp_path, mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    features = household_features(HouseholdIndex(meta_data_all), states_all,
+                                  speeds_all, NO_OF_TS, TS_LENGTH)
+    table = household_feature_table(meta_data_all, states_all, speeds_all,
+                                    NO_OF_TS, TS_LENGTH, str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    loaded = household_feature_table(meta_data_all, states_all, speeds_all,
+                                     NO_OF_TS, TS_LENGTH, str(tmp_path))
+    for feature in FEATURES:
+        np.testing.assert_array_equal(table[feature], features[feature])
+        np.testing.assert_array_equal(loaded[feature], features[feature])
+
+    # ranking with loaded table does not touch mobility data
+    target = make_targets(mop_data)[0]
+    assert rank_households(meta_data_all, None, None, NO_OF_TS, TS_LENGTH,
+                           quantity = "all", features = loaded,
+                           **target) == reference_ranking(mop_data, target,
+                                                          "all")
+
+    # key changes with data and timestep parameters
+    key = feature_table_key(meta_data_all, states_all, speeds_all,
+                            NO_OF_TS, TS_LENGTH)
+    changed_speeds = speeds_all.copy()
+    changed_speeds[0, 0] = changed_speeds[0, 0] + 1
+    for arguments in [(meta_data_all, states_all, changed_speeds,
+                       NO_OF_TS, TS_LENGTH),
+                      (meta_data_all, states_all, speeds_all, 144,
+                       TS_LENGTH),
+                      (meta_data_all, states_all, speeds_all, NO_OF_TS, 5)]:
+        assert feature_table_key(*arguments) != key
+
+
+def test_batch_ranking_matches_single_ranking(mop_data):
+    meta_data_all, states_all, speeds_all, csv_cars = mop_data
+    features = household_features(HouseholdIndex(meta_data_all), states_all,
+                                  speeds_all, NO_OF_TS, TS_LENGTH)
+    targets = make_targets(mop_data)
+    for quantity in ["all", 0, 1, 2, 100]:
+        ranked = rank_households_batch(features, targets, quantity)
+        assert len(ranked) == len(targets)
+        for target, households in zip(targets, ranked):
+            assert households == rank_households(meta_data_all, states_all,
+                                                 speeds_all, NO_OF_TS,
+                                                 TS_LENGTH,
+                                                 quantity = quantity,
+                                                 features = features,
+                                                 **target)
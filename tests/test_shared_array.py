@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""test_shared_array.py
+
+Tests of SharedArray: shared memory and memory-mapped handles, worker
+processes (spawn start method).
+"""
+
+import os.path
+import pickle
+import subprocess
+import sys
+import numpy as np
+import pytest
+from conftest import ROOT
+from classes.shared_array import SharedArray, attach_array, share_arrays
+
+# create_soc_profiles() with shared memory handles in 2 worker processes
+SPAWN_SCRIPT = """
+import contextlib, io, sys
+import multiprocessing as mp
+sys.path.insert(0, {tests!r})
+from conftest import (make_mop_data, NO_OF_TS, TS_LENGTH,
+                      CHARGING_PARAMETERS)
+import numpy as np
+from classes.shared_array import share_arrays
+from functions.create_soc_profiles import create_soc_profiles
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    meta_data_all, states_all, speeds_all, csv_cars = make_mop_data()
+    database = np.genfromtxt("inputs/Elektroauto_Datenbank.csv",
+                             delimiter = ";", encoding = "ISO-8859-1")
+    weather = np.genfromtxt("inputs/Temperaturen_Deutschland_2017.csv",
+                            delimiter = ";", encoding = "ISO-8859-1")
+    shared = share_arrays(meta_data_all = meta_data_all,
+                          states_all = states_all,
+                          speeds_all = speeds_all,
+                          csv_weather = weather,
+                          csv_cars = csv_cars,
+                          csv_database_electric_cars = database)
+    households = list(dict.fromkeys(meta_data_all[:,0].astype(int)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = create_soc_profiles(
+            households, shared["meta_data_all"], shared["states_all"],
+            shared["speeds_all"], 0, NO_OF_TS, NO_OF_TS, TS_LENGTH,
+            *CHARGING_PARAMETERS, 0.1, 0.9, shared["csv_weather"],
+            shared["csv_cars"], shared["csv_database_electric_cars"], ".",
+            processes = 2)
+    for handle in shared.values():
+        handle.unlink()
+    print(len(results))
+"""
+
+
+@pytest.mark.parametrize("path", [False, True])
+def test_share_and_attach(tmp_path, mop_data, path):
+    states_all = mop_data[1]
+    handle = share_arrays(path = str(tmp_path) if path else None,
+                          states_all = states_all)["states_all"]
+    copy = pickle.loads(pickle.dumps(handle))
+    assert copy.block is None
+    for shared in [handle, copy]:
+        array = attach_array(shared)
+        np.testing.assert_array_equal(array, states_all)
+        assert not array.flags.writeable
+    del array
+    handle.unlink()
+    assert attach_array(states_all) is states_all
+
+
+def test_spawn_workers_keep_registration(tmp_path):
+    script = tmp_path / "spawn_workers.py"
+    script.write_text(SPAWN_SCRIPT.format(tests = os.path.join(ROOT,
+                                                               "tests")))
+    process = subprocess.run([sys.executable, str(script)], cwd = ROOT,
+                             capture_output = True, text = True,
+                             timeout = 300)
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.strip() == "14"
+    assert "KeyError" not in process.stderr
+    assert "leaked" not in process.stderr
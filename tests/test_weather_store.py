@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""test_weather_store.py
+
+Tests of WeatherStore against scans of the temperature file per date.
+"""
+
+import numpy as np
+import pytest
+from classes.weather_store import WeatherStore, WINTER_DATES
+
+
+def reference_temperatures(csv_weather, dates, start, end):
+    """ temperatures of dates, one scan of csv_weather per date
+    """
+    temperatures = []
+    for date in dates:
+        rows = np.where(csv_weather[:,0] == date)
+        temperatures.append(csv_weather[rows,1].astype(int)[0])
+    return np.concatenate(temperatures)[start:end].astype(float)
+
+
+def test_temperatures_match_scan(weather):
+    weather_store = WeatherStore(weather)
+    assert weather_store.ts_per_day == 144
+    for dates, start, end in [(20820 + np.arange(7), 0, 1008),
+                              (np.array([20900, 20830, 21184]), 100, 300),
+                              (WINTER_DATES, 0, None)]:
+        np.testing.assert_array_equal(
+            weather_store.get_temperatures(dates, start, end),
+            reference_temperatures(weather, dates, start, end))
+    np.testing.assert_array_equal(
+        weather_store.get_winter_temperatures(),
+        reference_temperatures(weather, WINTER_DATES, 0, None))
+    assert len(weather_store.get_series()) == 365 * 144
+
+
+def test_unsorted_rows_and_missing_dates(weather):
+    days = weather[1:1 + 3 * 144]
+    weather_store = WeatherStore(days[::-1], bool_truncate = False)
+    np.testing.assert_array_equal(
+        weather_store.get_temperatures([20821]),
+        days[144:288, 1][::-1])
+    with pytest.raises(ValueError):
+        weather_store.get_temperatures([20821, 20825])
+    with pytest.raises(ValueError):
+        weather_store.get_temperatures([20819])
+    with pytest.raises(ValueError):
+        WeatherStore(days[:-1])